@@ -1,57 +1,168 @@
 # backend/app.py
 
+import time
+BOOT_STARTED = time.perf_counter()  # before the imports below, for the cold-start report
+
 import joblib
-import pandas as pd
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, send_from_directory
+import json
+import math
 from flask_cors import CORS
-import requests
 import os
+import base64
+import atexit
+import re
+import sys
+import threading
 from dotenv import load_dotenv
 import numpy as np
 
 # --- 1. IMPORTS FOR ADVANCED FEATURES ---
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 import urllib3
 import jwt
-import bcrypt
 import datetime
 from functools import wraps
-from pymongo import MongoClient
+from pymongo import MongoClient, ASCENDING, DESCENDING
 from bson.objectid import ObjectId
+from compiled_model import compile_pipeline, CompileError, save_compiled, load_saved
+from micro_batcher import MicroBatcher, BatcherOverloaded
+from ttl_cache import TTLCache, MISSING
+from sentiment_service import SentimentService
+from rppg_sessions import RPPGSessionStore, SessionLimitReached, check_fps
+from auth_cache import AuthCache
+from hashing_pool import HashingPool, HashingPoolSaturated
+from write_behind import WriteBehindBuffer, WriteBehindFull
+from db_stats import DBStatsSnapshot
+from gemini_client import GeminiClient
+from genai_cache import GenAICache, make_key
+from readiness import Readiness
+from memory_report import process_memory
+from model_registry import ModelRegistry, LoadedModel, artifact_sha256
+import metrics
+from profiling import RequestProfiler
+import rppg_engine
+import rppg_payload
+from rppg_engine import pos_signal, estimate_bpm
 
 # --- 2. SETUP ---
 load_dotenv()
-import sklearn
-print(f"DEBUG: Sklearn Version: {sklearn.__version__}")
 print(f"DEBUG: CWD: {os.getcwd()}")
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 app = Flask(__name__, static_folder='../frontend/build', static_url_path='/')
 CORS(app)
 
+# Per-route latency, in-flight and error metrics for every request, plus JSON
+# encoding time; the other stages are wired up in section 11.1. See /metrics.
+app.json = metrics.TimedJSONProvider(app)
+metrics.instrument_app(app)
+
+# STARTUP_MODE=blocking (default): connect to MongoDB, load the models and
+# warm up before the module finishes importing, as before.
+# STARTUP_MODE=background: importing returns almost at once; MongoDB connects
+# (and keeps retrying) in one thread while the models load and warm up in
+# another. /healthz answers immediately, /readyz only once all is warm, and
+# prediction routes answer 503 until the models are in.
+STARTUP_MODE = os.getenv("STARTUP_MODE", "blocking")
+READYZ_REQUIRE_DB = os.getenv("READYZ_REQUIRE_DB", "1") == "1"
+readiness = Readiness(
+    ['database', 'models', 'warmup'],
+    required=['database', 'models', 'warmup'] if READYZ_REQUIRE_DB else ['models', 'warmup'],
+    started=BOOT_STARTED
+)
+
 # --- 3.1 MongoDB Setup ---
 mongo_uri = os.getenv("MONGO_URI")
-try:
-    client = MongoClient(mongo_uri, serverSelectionTimeoutMS=5000)
-    db = client['HealthPrism']
-    # Trigger connection to verify
-    db.command('ismaster')
-    users_collection = db.users
-    heart_predictions_collection = db.heart_predictions
-    stress_predictions_collection = db.stress_predictions
-    print(f"✅ Connected to MongoDB. Database: {db.name}")
-    print(f"DEBUG: Collections: {db.list_collection_names()}")
-except Exception as e:
-    print(f"⚠️ Warning: Could not connect to MongoDB. Database features will be disabled. Error: {e}")
-    db = None
-    users_collection = None
-    heart_predictions_collection = None
-    stress_predictions_collection = None
+MONGO_CONNECT_RETRY_SECONDS = float(os.getenv("MONGO_CONNECT_RETRY_SECONDS", "10"))
+
+# Routes check these for None and degrade gracefully until connect_mongo() succeeds
+db = None
+users_collection = None
+heart_predictions_collection = None
+stress_predictions_collection = None
+
+# Times every MongoDB command (find, insert, getMore, ...) as a metrics stage
+mongo_command_timer = metrics.MongoCommandTimer()
+
+def connect_mongo():
+    """Connect and publish the collection globals; False if MongoDB is unreachable."""
+    global db, users_collection, heart_predictions_collection, stress_predictions_collection
+    readiness.begin('database')
+    try:
+        client = MongoClient(mongo_uri, serverSelectionTimeoutMS=5000, event_listeners=[mongo_command_timer])
+        database = client['HealthPrism']
+        # Trigger connection to verify
+        database.command('ismaster')
+        print(f"✅ Connected to MongoDB. Database: {database.name}")
+        print(f"DEBUG: Collections: {database.list_collection_names()}")
+        # History pages are served newest-first per user; this index makes that a
+        # bounded index scan however many entries a user has
+        for collection in (database.heart_predictions, database.stress_predictions):
+            collection.create_index(
+                [('user_id', ASCENDING), ('timestamp', DESCENDING), ('_id', DESCENDING)],
+                name='user_id_timestamp_id'
+            )
+    except Exception as e:
+        print(f"⚠️ Warning: Could not connect to MongoDB. Database features will be disabled. Error: {e}")
+        readiness.failed('database', e)
+        return False
+    users_collection = database.users
+    heart_predictions_collection = database.heart_predictions
+    stress_predictions_collection = database.stress_predictions
+    db = database
+    readiness.done('database')
+    return True
+
+def connect_mongo_until_ready():
+    while not connect_mongo():
+        print(f"DEBUG: Retrying MongoDB in {MONGO_CONNECT_RETRY_SECONDS:.0f}s")
+        time.sleep(MONGO_CONNECT_RETRY_SECONDS)
 
 # --- 3.2 JWT & Auth Helpers ---
 SECRET_KEY = os.getenv("SECRET_KEY", "your_secret_key")
 JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your_jwt_secret_key")
 
+# Verified tokens and user documents (minus password) are cached so most
+# authenticated requests skip the DB. With JWT_EMBED_USER_CLAIMS=1, login also
+# signs is_admin/fullname/email into the token and token_required builds
+# current_user from those claims with no DB access at all (role changes then
+# take effect when the user next logs in).
+JWT_EMBED_USER_CLAIMS = os.getenv("JWT_EMBED_USER_CLAIMS", "0") == "1"
+auth_cache = AuthCache(
+    user_ttl=float(os.getenv("AUTH_USER_CACHE_TTL", "60")),
+    user_size=int(os.getenv("AUTH_USER_CACHE_SIZE", "10000")),
+    token_ttl=float(os.getenv("AUTH_TOKEN_CACHE_TTL", "300")),
+    token_size=int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+)
+
+# bcrypt runs in a bounded process pool (see hashing_pool.py); when it is
+# saturated, register/login answer 503 instead of stalling the worker.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+BCRYPT_REHASH_ON_LOGIN = os.getenv("BCRYPT_REHASH_ON_LOGIN", "1") == "1"
+hashing_pool = HashingPool(
+    workers=int(os.getenv("BCRYPT_POOL_WORKERS", "2")),
+    max_pending=int(os.getenv("BCRYPT_POOL_MAX_PENDING", "32")),
+    rounds=BCRYPT_ROUNDS
+)
+
+def hashing_busy_response(e):
+    response = jsonify({'error': str(e)})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+def decode_jwt(token):
+    return jwt.decode(token, JWT_SECRET_KEY, algorithms=["HS256"])
+
+def load_user(user_id):
+    return users_collection.find_one({'_id': ObjectId(user_id)}, {'password': 0})
+
+def user_from_claims(data):
+    return {
+        '_id': ObjectId(data['user_id']),
+        'fullname': data.get('fullname'),
+        'email': data.get('email'),
+        'is_admin': data.get('is_admin', False)
+    }
+
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
@@ -65,18 +176,37 @@ def token_required(f):
             return jsonify({'error': 'Token is missing!'}), 401
         
         try:
-            data = jwt.decode(token, JWT_SECRET_KEY, algorithms=["HS256"])
-            if users_collection is None:
-                return jsonify({'error': 'Database is unavailable!'}), 503
-            current_user = users_collection.find_one({'_id': ObjectId(data['user_id'])})
-            if not current_user:
-                return jsonify({'error': 'User not found!'}), 401
+            data = auth_cache.decode_token(token, decode_jwt)
+            if JWT_EMBED_USER_CLAIMS and 'is_admin' in data:
+                current_user = user_from_claims(data)
+            else:
+                if users_collection is None:
+                    return jsonify({'error': 'Database is unavailable!'}), 503
+                current_user = auth_cache.get_user(data['user_id'], load_user)
+                if not current_user:
+                    return jsonify({'error': 'User not found!'}), 401
         except Exception as e:
             return jsonify({'error': 'Token is invalid!', 'message': str(e)}), 401
             
         return f(current_user, *args, **kwargs)
     return decorated
 
+def request_is_admin():
+    """True if the current request carries a valid admin token (for hooks outside token_required)."""
+    auth_header = request.headers.get('Authorization', '')
+    if not auth_header.startswith('Bearer '):
+        return False
+    try:
+        data = auth_cache.decode_token(auth_header.split(" ")[1], decode_jwt)
+        if JWT_EMBED_USER_CLAIMS and 'is_admin' in data:
+            return bool(data['is_admin'])
+        if users_collection is None:
+            return False
+        user = auth_cache.get_user(data['user_id'], load_user)
+        return bool(user and user.get('is_admin', False))
+    except Exception:
+        return False
+
 def admin_required(f):
     @wraps(f)
     def decorated(current_user, *args, **kwargs):
@@ -86,26 +216,110 @@ def admin_required(f):
     return decorated
 
 # --- 4. Load ALL OUR ML Models ---
+# Which artifact serves each model is set in the registry manifest
+# (models.json, see model_registry.py). The manifest is watched: activating
+# another version loads and warms it in the background, then swaps it in
+# without a restart. MODEL_WATCH_SECONDS=0 turns the watcher off.
+MODEL_MANIFEST = os.getenv("MODEL_MANIFEST", "models.json")
+MODEL_WATCH_SECONDS = float(os.getenv("MODEL_WATCH_SECONDS", "5"))
+
+# Compiled (pandas-free) runtimes for the same pipelines. They reproduce
+# predict_proba exactly; set USE_COMPILED_MODELS=0 to force the sklearn path.
+USE_COMPILED_MODELS = os.getenv("USE_COMPILED_MODELS", "1") == "1"
+# Compiled runtimes are saved here (per artifact hash) as .npy files and
+# memory-mapped, so all workers on a host share one copy of the tree arrays.
+# Set MODEL_MMAP_DIR to an empty value to keep them in private memory.
+MODEL_MMAP_DIR = os.getenv("MODEL_MMAP_DIR", "compiled_models")
+
+def compiled_model_dir(name, source_hash):
+    return os.path.join(MODEL_MMAP_DIR, f"{name}-{source_hash[:16]}") if MODEL_MMAP_DIR and source_hash else None
+
+def load_compiled_model(name, source_hash):
+    """The runtime saved earlier for this exact artifact, memory-mapped, or None."""
+    directory = compiled_model_dir(name, source_hash)
+    if not USE_COMPILED_MODELS or not directory:
+        return None
+    saved = load_saved(directory, source_hash)
+    if saved is not None:
+        print(f"✅ Compiled {name} model ({saved.n_trees} trees) memory-mapped from {directory}")
+    return saved
+
+def compile_model(name, pipeline, source_hash=None):
+    if pipeline is None or not USE_COMPILED_MODELS:
+        return None
+    directory = compiled_model_dir(name, source_hash)
+    try:
+        compiled = compile_pipeline(pipeline)
+        if not compiled.self_check(pipeline):
+            print(f"⚠️ Compiled {name} model disagrees with sklearn, using the sklearn pipeline")
+            return None
+        print(f"✅ Compiled {name} model ({compiled.n_trees} trees) ready")
+    except CompileError as e:
+        print(f"⚠️ Could not compile {name} model ({e}), using the sklearn pipeline")
+        return None
+    if directory:
+        try:
+            save_compiled(compiled, directory, source_hash)
+            compiled = load_saved(directory, source_hash) or compiled
+        except OSError as e:
+            print(f"⚠️ Could not save compiled {name} model to {directory} ({e}), keeping it in memory")
+    return compiled
+
+def load_model_version(name, version, path, entry):
+    """Registry loader: load, compile and warm up one version before it is swapped in."""
+    if name not in MODEL_FEATURES:
+        raise ValueError(f'unknown model {name}')
+
+    def load_pipeline():
+        if artifact_sha256(path) != entry['sha256']:
+            raise ValueError(f'{os.path.basename(path)} changed since version {version} was loaded')
+        return joblib.load(path)
+
+    # With a runtime already saved for this artifact, the sklearn pipeline isn't
+    # loaded at all (only if the runtime is ever unavailable), so a worker holds
+    # no private copy of the trees
+    runtime = load_compiled_model(name, entry['sha256'])
+    pipeline = None
+    if runtime is None:
+        pipeline = joblib.load(path)
+        runtime = compile_model(name, pipeline, entry['sha256'])
+    features = entry.get('features') or (
+        runtime.feature_names if pipeline is None else [str(f) for f in pipeline.feature_names_in_])
+    if runtime is not None:
+        pipeline = None  # compiled just now: free it, load_pipeline() can bring it back
+    unknown = [f for f in features if f not in MODEL_FEATURES[name]]
+    if unknown:
+        raise ValueError(f'needs features the app does not provide: {", ".join(unknown)}')
+    model = LoadedModel(name, version, entry['sha256'], pipeline, runtime, features, entry.get('metrics'),
+                        load_pipeline=load_pipeline)
+    # One real prediction so the first request after the swap isn't the slow one
+    if name == 'heart':
+        predict_heart_rows([prepare_heart_record(WARMUP_HEART)], model)
+    else:
+        predict_stress_rows([prepare_stress_record(WARMUP_STRESS)], model)
+    return model
+
+model_registry = ModelRegistry(MODEL_MANIFEST, load_model_version, poll_interval=MODEL_WATCH_SECONDS)
+
+def load_models():
+    readiness.begin('models')
+    model_registry.refresh()
+    sklearn = sys.modules.get('sklearn')  # not imported when every model was memory-mapped
+    if sklearn is not None:
+        print(f"DEBUG: Sklearn Version: {sklearn.__version__}")
+    model_registry.watch()
+    readiness.done('models')
 
-# Model 1: Heart Risk (Optimized 8-Feature)
-try:
-    heart_model = joblib.load('heart_risk_pipeline.joblib')
-    print("✅ OPTIMIZED Heart Model (Top 8 Features) loaded successfully!")
-except Exception as e:
-    print(f"❌ Error loading Heart model: {e}")
-    heart_model = None
-
-# Model 2: Stress Predictor (NEW v2 with NLP)
-try:
-    stress_model = joblib.load('stress_model_v2.joblib')
-    print("✅ NEW Stress Model v2 (with NLP) loaded successfully!")
-except Exception as e:
-    print(f"❌ Error loading Stress model v2: {e}")
-    stress_model = None
 # --- END OF MODEL LOADING ---
 
 # --- 5. Initialize NLP Analyzer ---
-sentiment_analyzer = SentimentIntensityAnalyzer()
+# Shared, memoized VADER scorer. Set SENTIMENT_POOL_WORKERS > 0 to score very
+# long texts (>= SENTIMENT_POOL_MIN_CHARS) in a separate process pool.
+sentiment_service = SentimentService(
+    cache_size=int(os.getenv("SENTIMENT_CACHE_SIZE", "4096")),
+    pool_workers=int(os.getenv("SENTIMENT_POOL_WORKERS", "0")),
+    pool_min_chars=int(os.getenv("SENTIMENT_POOL_MIN_CHARS", "2000"))
+)
 print("✅ VADER Sentiment Analyzer loaded successfully!")
 
 # --- 6. Define Feature Lists ---
@@ -124,6 +338,280 @@ STRESS_CATEGORICAL_FEATURES = [
     'Gender', 'Occupation', 'BMI Category'
 ]
 ALL_STRESS_FEATURES = STRESS_NUMERIC_FEATURES + STRESS_CATEGORICAL_FEATURES
+# Features the request helpers can supply; a registered version may use any subset
+MODEL_FEATURES = {'heart': ALL_HEART_FEATURES, 'stress': ALL_STRESS_FEATURES}
+# Allowed values of the coded categorical fields, as in the training data.
+# Occupation is free text: the encoder ignores occupations it was not trained on.
+HEART_CATEGORY_CODES = {'cp': range(4), 'ca': range(5), 'thal': range(4)}
+STRESS_CATEGORY_VALUES = {
+    'Gender': ('Male', 'Female'),
+    'BMI Category': ('Normal', 'Normal Weight', 'Overweight', 'Obese')
+}
+# VADER reports compound scores to 4 decimals; rounding here keeps the
+# stress cache key stable and identical to what the model sees
+SENTIMENT_KEY_DECIMALS = int(os.getenv("SENTIMENT_KEY_DECIMALS", "4"))
+
+# --- 6.1 Batch Scoring Settings ---
+# Upper bound on records per batch request, and rows per vectorized model call
+PREDICT_BATCH_MAX_RECORDS = int(os.getenv("PREDICT_BATCH_MAX_RECORDS", "5000"))
+PREDICT_BATCH_CHUNK_SIZE = int(os.getenv("PREDICT_BATCH_CHUNK_SIZE", "512"))
+
+# --- 6.2 Input Preparation Helpers ---
+# Shared by the single-record and batch routes. Each returns a row dict with
+# exactly the model's feature columns, or raises ValueError with a message
+# that is safe to send back to the client.
+def prepare_heart_record(data):
+    if not isinstance(data, dict) or not data:
+        raise ValueError('Record must be a non-empty JSON object')
+    missing = [col for col in ALL_HEART_FEATURES if col not in data]
+    if missing:
+        raise ValueError(f'Missing fields: {", ".join(missing)}')
+    row = {}
+    for col in HEART_NUMERIC_FEATURES:
+        try:
+            row[col] = float(data[col])
+        except (TypeError, ValueError):
+            raise ValueError(f'Invalid numeric value for {col}')
+        if not math.isfinite(row[col]):  # float() accepts "nan", "inf" and 1e309
+            raise ValueError(f'Invalid numeric value for {col}')
+    for col in HEART_CATEGORICAL_FEATURES:
+        row[col] = category_code(data[col], col, HEART_CATEGORY_CODES[col])
+    return row
+
+def category_code(value, col, codes):
+    # A JSON number or numeric string ("2") naming one of codes, as an int
+    try:
+        number = float(value) if not isinstance(value, bool) else None
+    except (TypeError, ValueError):
+        number = None
+    if number is None or not number.is_integer() or int(number) not in codes:
+        raise ValueError(f'Invalid value for {col} (expected one of {", ".join(map(str, codes))})')
+    return int(number)
+
+def prepare_stress_record(data, sentiment_score=None):
+    if not isinstance(data, dict) or not data:
+        raise ValueError('Record must be a non-empty JSON object')
+
+    # 1. NLP Sentiment Calculation (batch callers pass a pre-computed score)
+    if sentiment_score is None:
+        sentiment_score = sentiment_service.compound(journal_text_of(data))
+    sentiment_score = round(sentiment_score, SENTIMENT_KEY_DECIMALS)
+
+    row = {'Sentiment_Score': sentiment_score}
+
+    # 2. Handle Blood Pressure string split
+    try:
+        bp_split = data['Blood Pressure'].split('/')
+        row['Systolic BP'] = int(bp_split[0])
+        row['Diastolic BP'] = int(bp_split[1])
+    except Exception:
+        raise ValueError('Invalid Blood Pressure format. Must be "Systolic/Diastolic" (e.g., "120/80")')
+
+    # 3. Cast numeric features to float (React sends them as strings)
+    for col in STRESS_NUMERIC_FEATURES:
+        if col in row:
+            continue
+        if col not in data:
+            raise ValueError(f'Missing field: {col}')
+        try:
+            row[col] = float(data[col])
+        except (TypeError, ValueError):
+            raise ValueError(f'Invalid numeric value for {col}')
+        if not math.isfinite(row[col]):  # float() accepts "nan", "inf" and 1e309
+            raise ValueError(f'Invalid numeric value for {col}')
+    for col in STRESS_CATEGORICAL_FEATURES:
+        if col not in data:
+            raise ValueError(f'Missing field: {col}')
+        value = data[col]
+        allowed = STRESS_CATEGORY_VALUES.get(col)
+        if allowed is not None and value not in allowed:
+            raise ValueError(f'Invalid value for {col} (expected one of {", ".join(allowed)})')
+        if not isinstance(value, str) or not value.strip():
+            raise ValueError(f'Invalid value for {col}')
+        row[col] = value
+    return row
+
+def journal_text_of(data):
+    text = data.get('journal_text', '') if isinstance(data, dict) else ''
+    return str(text) if text else '' # Empty text scores as neutral (0.0)
+
+def get_batch_records(data):
+    # Accept either a bare JSON array or {"records": [...]}
+    if isinstance(data, dict):
+        data = data.get('records')
+    if not isinstance(data, list) or not data:
+        raise ValueError('Expected a non-empty JSON array of records (or {"records": [...]})')
+    return data
+
+def run_batch(records, prepare, predict_chunk):
+    """Score records in chunks; returns one result dict per record, in input order.
+
+    predict_chunk receives a list of prepared rows and returns one result
+    dict per row. If a whole chunk fails, its rows are retried one at a time
+    so a single bad record only costs itself.
+    """
+    results = [None] * len(records)
+    valid = []
+    for index, record in enumerate(records):
+        try:
+            valid.append((index, prepare(record)))
+        except ValueError as e:
+            results[index] = {'index': index, 'error': str(e)}
+
+    for start in range(0, len(valid), PREDICT_BATCH_CHUNK_SIZE):
+        chunk = valid[start:start + PREDICT_BATCH_CHUNK_SIZE]
+        try:
+            outputs = predict_chunk([row for _, row in chunk])
+        except Exception as e:
+            print(f"⚠️ Batch chunk failed ({e}), retrying rows individually")
+            outputs = []
+            for _, row in chunk:
+                try:
+                    outputs.append(predict_chunk([row])[0])
+                except Exception as row_error:
+                    outputs.append({'error': f'Prediction failed: {row_error}'})
+        for (index, _), output in zip(chunk, outputs):
+            results[index] = {'index': index, **output}
+    return results
+
+def batch_response(results):
+    failed = sum(1 for r in results if 'error' in r)
+    return jsonify({
+        'message': 'Batch prediction complete',
+        'count': len(results),
+        'succeeded': len(results) - failed,
+        'failed': failed,
+        'results': results
+    }), 200
+
+# model defaults to the active version; it is read once so a hot swap never
+# mixes two versions within one call
+def predict_heart_rows(rows, model=None):
+    model = model or model_registry.get('heart')
+    if model.runtime is not None:
+        with metrics.stage('heart_inference'):
+            probabilities = model.runtime.predict_proba_records(rows)
+    else:
+        import pandas as pd  # only needed when the compiled runtime is unavailable
+        with metrics.stage('dataframe_build'):
+            input_df = pd.DataFrame(rows, columns=model.features)
+        with metrics.stage('heart_inference'):
+            probabilities = model.pipeline.predict_proba(input_df)
+    return [{'probability_high_risk': float(p[0]), 'model_version': model.version}
+            for p in probabilities] # Class 0 (High Risk)
+
+def predict_stress_rows(rows, model=None):
+    model = model or model_registry.get('stress')
+    if model.runtime is not None:
+        with metrics.stage('stress_inference'):
+            predictions = model.runtime.predict_records(rows)
+    else:
+        import pandas as pd
+        with metrics.stage('dataframe_build'):
+            input_df = pd.DataFrame(rows, columns=model.features)
+        with metrics.stage('stress_inference'):
+            predictions = model.pipeline.predict(input_df)
+    return [
+        {'stress_level': level, 'sentiment_score': row['Sentiment_Score'], 'model_version': model.version}
+        for level, row in zip(predictions.tolist(), rows)
+    ]
+
+# --- 6.3 Micro-Batching (optional) ---
+# Coalesces concurrent single-record predictions (e.g. gunicorn --threads 8)
+# into one vectorized call. Tune the window per deployment: a longer wait
+# gives bigger batches at the cost of added latency.
+MICRO_BATCH_ENABLED = os.getenv("MICRO_BATCH_ENABLED", "0") == "1"
+MICRO_BATCH_MAX_SIZE = int(os.getenv("MICRO_BATCH_MAX_SIZE", "64"))
+MICRO_BATCH_MAX_WAIT_MS = float(os.getenv("MICRO_BATCH_MAX_WAIT_MS", "2"))
+
+if MICRO_BATCH_ENABLED:
+    heart_batcher = MicroBatcher('heart', predict_heart_rows, MICRO_BATCH_MAX_SIZE, MICRO_BATCH_MAX_WAIT_MS)
+    stress_batcher = MicroBatcher('stress', predict_stress_rows, MICRO_BATCH_MAX_SIZE, MICRO_BATCH_MAX_WAIT_MS)
+    print(f"✅ Micro-batching enabled (max {MICRO_BATCH_MAX_SIZE} rows / {MICRO_BATCH_MAX_WAIT_MS} ms)")
+else:
+    heart_batcher = None
+    stress_batcher = None
+
+# --- 6.4 Prediction Result Cache ---
+# Keyed on the canonical feature tuple plus the model file hash, so swapping
+# in a different version never serves stale results (and swapping back finds
+# its old entries still warm). PREDICTION_CACHE_SIZE=0 disables.
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "10000"))
+PREDICTION_CACHE_TTL = float(os.getenv("PREDICTION_CACHE_TTL", "3600"))
+
+if PREDICTION_CACHE_SIZE > 0:
+    heart_cache = TTLCache(PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL)
+    stress_cache = TTLCache(PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL)
+else:
+    heart_cache = None
+    stress_cache = None
+
+def canonical_value(value):
+    # 1, 1.0 and "1.0"-cast floats must share a key; strings are kept verbatim
+    if isinstance(value, (int, float, np.number)) and not isinstance(value, bool):
+        return float(value)
+    return value
+
+def heart_cache_key(row, model):
+    return (model.sha256,) + tuple(canonical_value(row[col]) for col in ALL_HEART_FEATURES)
+
+def stress_cache_key(row, model):
+    return (model.sha256,) + tuple(canonical_value(row[col]) for col in ALL_STRESS_FEATURES)
+
+def cached_predict(cache, key_fn, predict_fn, rows, model):
+    """predict_fn over rows with model, answering repeat inputs from cache."""
+    if cache is None:
+        return predict_fn(rows, model)
+    results = [None] * len(rows)
+    keys = [key_fn(row, model) for row in rows]
+    misses = []
+    for i, key in enumerate(keys):
+        hit = cache.get(key)
+        if hit is MISSING:
+            misses.append(i)
+        else:
+            results[i] = dict(hit)
+    if misses:
+        for i, output in zip(misses, predict_fn([rows[i] for i in misses], model)):
+            cache.set(keys[i], output)
+            results[i] = dict(output)
+    return results
+
+def predict_heart_rows_cached(rows):
+    return cached_predict(heart_cache, heart_cache_key, predict_heart_rows, rows, model_registry.get('heart'))
+
+def predict_stress_rows_cached(rows):
+    return cached_predict(stress_cache, stress_cache_key, predict_stress_rows, rows, model_registry.get('stress'))
+
+def score_heart_row(row):
+    model = model_registry.get('heart')
+    if heart_cache is not None:
+        hit = heart_cache.get(heart_cache_key(row, model))
+        if hit is not MISSING:
+            return dict(hit)
+    if heart_batcher is not None:
+        result = heart_batcher.submit(row)
+    else:
+        result = predict_heart_rows([row], model)[0]
+    # The batcher scores with whatever is active by then, which may be a newer version
+    if heart_cache is not None and result['model_version'] == model.version:
+        heart_cache.set(heart_cache_key(row, model), result)
+    return result
+
+def score_stress_row(row):
+    model = model_registry.get('stress')
+    if stress_cache is not None:
+        hit = stress_cache.get(stress_cache_key(row, model))
+        if hit is not MISSING:
+            return dict(hit)
+    if stress_batcher is not None:
+        result = stress_batcher.submit(row)
+    else:
+        result = predict_stress_rows([row], model)[0]
+    # The batcher scores with whatever is active by then, which may be a newer version
+    if stress_cache is not None and result['model_version'] == model.version:
+        stress_cache.set(stress_cache_key(row, model), result)
+    return result
 
 # --- NEW: CATCH-ALL ROUTE TO SERVE REACT APP ---
 # This must be defined before your /api routes
@@ -136,26 +624,38 @@ def serve(path):
         return send_from_directory(app.static_folder, 'index.html')
 
 
+def model_unavailable(message):
+    # In STARTUP_MODE=background the models may simply not be in yet
+    if readiness.status('models') in ('pending', 'loading'):
+        response = jsonify({'error': 'Models are still loading, please retry shortly'})
+        response.headers['Retry-After'] = '1'
+        return response, 503
+    return jsonify({'error': message}), 500
+
 # --- 7. Heart Prediction Route ---
 @app.route('/api/predict', methods=['POST'])
 def predict():
-    if heart_model is None:
-        return jsonify({'error': 'Optimized heart model is not loaded'}), 500
+    if model_registry.get('heart') is None:
+        return model_unavailable('Optimized heart model is not loaded')
     try:
         data = request.json
         if not data:
             return jsonify({'error': 'No JSON data received'}), 400
 
-        input_df = pd.DataFrame([data])
-        input_df = input_df[ALL_HEART_FEATURES]
-        
-        probabilities = heart_model.predict_proba(input_df)
-        risk_probability = float(probabilities[0][0]) # Class 0 (High Risk)
+        try:
+            row = prepare_heart_record(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        result = score_heart_row(row)
 
         return jsonify({
             'message': 'Prediction successful',
-            'probability_high_risk': risk_probability
+            'probability_high_risk': result['probability_high_risk'],
+            'model_version': result['model_version']
         }), 200
+    except BatcherOverloaded as e:
+        return jsonify({'error': str(e)}), 503
     except Exception as e:
         print(f" Error during heart prediction: {e}")
         return jsonify({'error': f'Internal server error: {e}'}), 500
@@ -163,148 +663,322 @@ def predict():
 # --- 8. NEW: Stress Prediction Route (V2 with NLP) ---
 @app.route('/api/predict-stress', methods=['POST'])
 def predict_stress():
-    if stress_model is None:
-        return jsonify({'error': 'Stress model is not loaded'}), 500
+    if model_registry.get('stress') is None:
+        return model_unavailable('Stress model is not loaded')
     try:
         data = request.json
         if not data:
             return jsonify({'error': 'No JSON data received'}), 400
         
-        # 1. NLP Sentiment Calculation
-        journal_text = data.get('journal_text', '')
-        if journal_text:
-            sentiment_dict = sentiment_analyzer.polarity_scores(journal_text)
-            sentiment_score = sentiment_dict['compound']
-        else:
-            sentiment_score = 0.0 # Default if no text provided
-
-        data['Sentiment_Score'] = sentiment_score
-
-        # 2. Handle Blood Pressure string split
         try:
-            bp_split = data['Blood Pressure'].split('/')
-            data['Systolic BP'] = int(bp_split[0])
-            data['Diastolic BP'] = int(bp_split[1])
-        except Exception as e:
-            print(f"Error splitting BP: {e}")
-            return jsonify({'error': 'Invalid Blood Pressure format. Must be "Systolic/Diastolic" (e.g., "120/80")'}), 400
-        
-        # 3. Cast numeric features to float (React sends them as strings)
-        for col in STRESS_NUMERIC_FEATURES:
-            if col in data and col != 'Sentiment_Score':
-                try:
-                    data[col] = float(data[col])
-                except ValueError:
-                    return jsonify({'error': f'Invalid numeric value for {col}'}), 400
+            row = prepare_stress_record(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        result = score_stress_row(row)
 
-        # 4. Create DataFrame and Predict
-        input_df = pd.DataFrame([data])
-        input_df = input_df[ALL_STRESS_FEATURES]
-        
-        prediction_array = stress_model.predict(input_df)
-        stress_level = prediction_array[0] 
-        
         return jsonify({
             'message': 'Stress prediction successful',
-            'stress_level': stress_level,
-            'sentiment_score': sentiment_score
+            'stress_level': result['stress_level'],
+            'sentiment_score': result['sentiment_score'],
+            'model_version': result['model_version']
         }), 200
         
+    except BatcherOverloaded as e:
+        return jsonify({'error': str(e)}), 503
     except Exception as e:
         print(f"❌ Error during stress prediction: {e}")
         return jsonify({'error': f'Internal server error: {e}'}), 500
 # --- END OF NEW STRESS ROUTE ---
 
+# --- 8.0.1 Batch Prediction Routes ---
+@app.route('/api/predict/batch', methods=['POST'])
+def predict_batch():
+    if model_registry.get('heart') is None:
+        return model_unavailable('Optimized heart model is not loaded')
+    try:
+        records = get_batch_records(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if len(records) > PREDICT_BATCH_MAX_RECORDS:
+        return jsonify({'error': f'Batch too large (max {PREDICT_BATCH_MAX_RECORDS} records)'}), 413
+    try:
+        return batch_response(run_batch(records, prepare_heart_record, predict_heart_rows_cached))
+    except Exception as e:
+        print(f"❌ Error during batch heart prediction: {e}")
+        return jsonify({'error': f'Internal server error: {e}'}), 500
+
+@app.route('/api/predict-stress/batch', methods=['POST'])
+def predict_stress_batch():
+    if model_registry.get('stress') is None:
+        return model_unavailable('Stress model is not loaded')
+    try:
+        records = get_batch_records(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if len(records) > PREDICT_BATCH_MAX_RECORDS:
+        return jsonify({'error': f'Batch too large (max {PREDICT_BATCH_MAX_RECORDS} records)'}), 413
+    try:
+        # Score every journal entry in one pass (duplicates and cached texts are free)
+        scores = sentiment_service.compound_many([journal_text_of(r) for r in records])
+        results = run_batch(
+            list(zip(records, scores)),
+            lambda pair: prepare_stress_record(*pair),
+            predict_stress_rows_cached
+        )
+        return batch_response(results)
+    except Exception as e:
+        print(f"❌ Error during batch stress prediction: {e}")
+        return jsonify({'error': f'Internal server error: {e}'}), 500
+
 # --- 8.0 NEW: rPPG Heart Rate Calculation Route ---
+RPPG_MIN_SAMPLES = rppg_engine.MIN_SAMPLES
+RPPG_BATCH_MAX_SIGNALS = int(os.getenv("RPPG_BATCH_MAX_SIGNALS", "256"))
+RPPG_TRAJECTORY_WINDOW_SECONDS = float(os.getenv("RPPG_TRAJECTORY_WINDOW_SECONDS", "8"))
+RPPG_TRAJECTORY_STEP_SECONDS = float(os.getenv("RPPG_TRAJECTORY_STEP_SECONDS", "1"))
+# Bounds on one /api/rppg request: the STFT's time and memory grow with samples x windows
+RPPG_MAX_SAMPLES = int(os.getenv("RPPG_MAX_SAMPLES", "28800"))  # 2 minutes at 240 fps
+RPPG_TRAJECTORY_MIN_STEP_SECONDS = float(os.getenv("RPPG_TRAJECTORY_MIN_STEP_SECONDS", "0.25"))
+RPPG_TRAJECTORY_MAX_WINDOWS = int(os.getenv("RPPG_TRAJECTORY_MAX_WINDOWS", "600"))
+
+def signal_array(values, name):
+    # A JSON list of finite numbers as a 1-D float array, or ValueError (answered 400)
+    if not isinstance(values, list):
+        raise ValueError(f'{name} must be a list of numbers')
+    try:
+        array = np.asarray(values, dtype=float)
+    except (TypeError, ValueError):
+        raise ValueError(f'{name} must be a list of numbers')
+    if array.ndim != 1 or not np.isfinite(array).all():
+        raise ValueError(f'{name} must be a list of numbers')
+    return array
+
+def rgb_channels(data):
+    """(R, G, B) arrays from a JSON object's "r"/"g"/"b" lists (empty when absent)."""
+    R, G, B = (signal_array(data.get(c, []), c) for c in ('r', 'g', 'b'))
+    if not (len(R) == len(G) == len(B)):
+        raise ValueError('r, g and b must have the same length')
+    return R, G, B
+
+def read_rppg_request():
+    """Returns (json_data, rgb, fps) for the current request.
+
+    rgb is an (n, 3) float32 view for binary bodies and JSON "rgb_b64"
+    payloads (see rppg_payload.py), otherwise None. json_data is None when
+    the request carries neither a binary body nor a JSON object.
+    """
+    if rppg_payload.is_binary_request(request):
+        rgb, fps = rppg_payload.decode_binary(request.get_data())
+        return {}, rgb, fps
+    data = request.get_json(silent=True)
+    if not data or not isinstance(data, dict):
+        return None, None, None
+    rgb = rppg_payload.decode_base64(data['rgb_b64']) if data.get('rgb_b64') else None
+    return data, rgb, data.get('fps')
+
 @app.route('/api/rppg', methods=['POST'])
 def calculate_rppg():
     try:
-        data = request.json
-        if not data:
+        try:
+            data, rgb, fps = read_rppg_request()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if data is None:
             return jsonify({'error': 'No JSON data received'}), 400
-            
-        r_vals = data.get('r', [])
-        g_vals = data.get('g', [])
-        b_vals = data.get('b', [])
-        values = data.get('values', []) # Fallback for old single-channel
-        
-        fps = data.get('fps', 30.0)
+
+        try:
+            fps = check_fps(fps) if fps is not None else 30.0
+            R = G = B = values = np.empty(0)
+            if rgb is None:
+                R, G, B = rgb_channels(data)
+                values = signal_array(data.get('values', []), 'values') # Fallback for old single-channel
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         # 1. Calculate combined Signal using selection
-        if r_vals and g_vals and b_vals and len(g_vals) >= 30:
-            # --- ADVANCED POS (Plane-Orthogonal-to-Skin) ALGORITHM ---
-            R = np.array(r_vals, dtype=float)
-            G = np.array(g_vals, dtype=float)
-            B = np.array(b_vals, dtype=float)
-            
-            # Normalize with mean (avoid zero division)
-            Rn = R / (np.mean(R) + 1e-6)
-            Gn = G / (np.mean(G) + 1e-6)
-            Bn = B / (np.mean(B) + 1e-6)
-            
-            # Create Projection vectors
-            S1 = Rn - Gn
-            S2 = Rn + Gn - 2 * Bn
-            
-            # Combine based on standard deviation ratios (motion cancel)
-            std1 = np.std(S1)
-            std2 = np.std(S2)
-            alpha = std1 / (std2 + 1e-6)
-            
-            y = S1 + alpha * S2
-        elif values and len(values) >= 30:
+        if rgb is not None and len(rgb) >= RPPG_MIN_SAMPLES:
+            y = pos_signal(rgb[:, 0], rgb[:, 1], rgb[:, 2])
+        elif len(G) >= RPPG_MIN_SAMPLES:
+            y = pos_signal(R, G, B)
+        elif len(values) >= RPPG_MIN_SAMPLES:
             # Fallback to single channel Green (backward compatibility)
-            y = np.array(values, dtype=float)
+            y = values
         else:
             return jsonify({'error': 'Insufficient data points (need at least 30)'}), 400
-            
-        from scipy.signal import butter, filtfilt, welch
-            
-        # 2. Detrend (remove slow drift)
-        y = y - np.mean(y)
+        if len(y) > RPPG_MAX_SAMPLES:
+            return jsonify({'error': f'Too many samples (max {RPPG_MAX_SAMPLES})'}), 400
+
+        # Optional BPM time series (binary bodies pass options as query args)
+        options = {**request.args.to_dict(), **data}
+        trajectory = None
+        if str(options.get('trajectory', '')).lower() in ('1', 'true', 'yes'):
+            try:
+                window_seconds = float(options.get('window_seconds', RPPG_TRAJECTORY_WINDOW_SECONDS))
+                step_seconds = float(options.get('step_seconds', RPPG_TRAJECTORY_STEP_SECONDS))
+            except (TypeError, ValueError):
+                return jsonify({'error': 'window_seconds and step_seconds must be numbers'}), 400
+            if not (window_seconds > 0 and step_seconds > 0):
+                return jsonify({'error': 'window_seconds and step_seconds must be positive'}), 400
+            if step_seconds < RPPG_TRAJECTORY_MIN_STEP_SECONDS:
+                return jsonify({'error': f'step_seconds must be at least {RPPG_TRAJECTORY_MIN_STEP_SECONDS:g}'}), 400
+            windows = rppg_engine.trajectory_window_count(len(y), fps, window_seconds, step_seconds)
+            if windows > RPPG_TRAJECTORY_MAX_WINDOWS:
+                return jsonify({'error': f'Trajectory would have {windows} windows (max {RPPG_TRAJECTORY_MAX_WINDOWS}); '
+                                         'use a larger step_seconds or a shorter recording'}), 400
+            trajectory = rppg_engine.bpm_trajectory(y, fps, window_seconds, step_seconds)
+
+        bpm = estimate_bpm(y, fps)
+        if bpm is None:
+            response = {'bpm': 0, 'message': 'No periodic heart rate signal found'}
+        else:
+            response = {
+                'message': 'Advanced rPPG (POS + Butterworth + Welch) calculation successful',
+                'bpm': round(float(bpm), 1)
+            }
+        if trajectory is not None:
+            response['trajectory'] = trajectory
+        return jsonify(response), 200
         
-        # 3. Butterworth Bandpass Filter (0.75 Hz to 3.5 Hz)
+    except Exception as e:
+        print(f"❌ Error during advanced rPPG calculation: {e}")
+        return jsonify({'error': f'Internal server error: {e}'}), 500
+
+# --- END OF rPPG ROUTE ---
+
+# --- 8.0.2 Multi-Signal rPPG Route (clinic wall) ---
+# Body: {"fps": 30, "signals": [{"r": [...], "g": [...], "b": [...], "fps": 30?}, ...]}
+# Signals with the same length and fps bucket are processed as one 2-D array.
+@app.route('/api/rppg/batch', methods=['POST'])
+def calculate_rppg_batch():
+    try:
+        data = request.json
+        if not data or not isinstance(data.get('signals'), list) or not data['signals']:
+            return jsonify({'error': 'Expected {"signals": [{"r": [...], "g": [...], "b": [...]}, ...]}'}), 400
+        signals = data['signals']
+        if len(signals) > RPPG_BATCH_MAX_SIGNALS:
+            return jsonify({'error': f'Too many signals (max {RPPG_BATCH_MAX_SIGNALS})'}), 413
         try:
-            nyquist = fps / 2.0
-            low = 0.75 / nyquist
-            high = 3.5 / nyquist
-            b, a = butter(2, [low, high], btype='bandpass')
-            y_filtered = filtfilt(b, a, y)
-        except Exception as e:
-            print(f"⚠️ Filter error: {e}, falling back to standard signal")
-            y_filtered = y
-            
-        # 4. Welch's Method for Power Spectral Density (PSD) estimation
+            default_fps = check_fps(data.get('fps', 30.0))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        results = [None] * len(signals)
+        groups = {}
+        for index, signal in enumerate(signals):
+            if not isinstance(signal, dict):
+                results[index] = {'index': index, 'error': 'Each signal needs numeric r, g and b arrays'}
+                continue
+            try:
+                channels = rgb_channels(signal)
+                fps = check_fps(signal.get('fps', default_fps))
+            except ValueError as e:
+                results[index] = {'index': index, 'error': str(e)}
+                continue
+            n = len(channels[1])
+            if n < RPPG_MIN_SAMPLES:
+                results[index] = {'index': index, 'error': f'Need at least {RPPG_MIN_SAMPLES} samples with equal-length r, g and b'}
+                continue
+            groups.setdefault((n, rppg_engine.fps_bucket(fps)), []).append((index, channels))
+
+        for (_, fps), members in groups.items():
+            R, G, B = (np.stack([channels[c] for _, channels in members]) for c in range(3))
+            bpms = rppg_engine.estimate_bpm_rgb_batch(R, G, B, fps)
+            for (index, _), bpm in zip(members, bpms):
+                if np.isnan(bpm):
+                    results[index] = {'index': index, 'bpm': 0, 'message': 'No periodic heart rate signal found'}
+                else:
+                    results[index] = {'index': index, 'bpm': round(float(bpm), 1)}
+
+        return jsonify({
+            'message': 'Batch rPPG calculation complete',
+            'count': len(results),
+            'results': results
+        }), 200
+    except Exception as e:
+        print(f"❌ Error during batch rPPG calculation: {e}")
+        return jsonify({'error': f'Internal server error: {e}'}), 500
+
+# --- 8.0.3 Streaming rPPG Sessions ---
+# Open a session, then POST only the new r/g/b samples; BPM is estimated over
+# a sliding window so each update has constant cost.
+rppg_sessions = RPPGSessionStore(
+    window_seconds=float(os.getenv("RPPG_WINDOW_SECONDS", "10")),
+    idle_timeout=float(os.getenv("RPPG_SESSION_IDLE_TIMEOUT", "60")),
+    max_sessions=int(os.getenv("RPPG_MAX_SESSIONS", "1000"))
+)
+
+@app.route('/api/rppg/session', methods=['POST'])
+def open_rppg_session():
+    data = request.get_json(silent=True) or {}
+    try:
+        session = rppg_sessions.open(data.get('fps', 30.0), data.get('window_seconds'))
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    except SessionLimitReached as e:
+        return jsonify({'error': str(e)}), 503
+    return jsonify({
+        'message': 'rPPG session opened',
+        'idle_timeout_seconds': rppg_sessions.idle_timeout,
+        **session.describe()
+    }), 201
+
+@app.route('/api/rppg/session/<session_id>', methods=['POST'])
+def append_rppg_samples(session_id):
+    session = rppg_sessions.get(session_id)
+    if session is None:
+        return jsonify({'error': 'Unknown or expired rPPG session'}), 404
+    try:
         try:
-            n_seg = min(len(y_filtered), 128) # Segment size for averaging
-            f, pxx = welch(y_filtered, fs=fps, nperseg=n_seg, nfft=1024)
-        except Exception as e:
-            print(f"⚠️ Welch error: {e}, falling back to FFT")
-            # Fallback to FFT on filtered signal
-            n = len(y_filtered)
-            f = np.fft.fftfreq(n, 1/fps)
-            pxx = np.abs(np.fft.fft(y_filtered))
-             
-        # Find peak only in allowable heart rate band (45 - 210 BPM)
-        mask = (f >= 0.75) & (f <= 3.5)
-        f_valid = f[mask]
-        pxx_valid = pxx[mask]
-        
-        if len(pxx_valid) == 0:
-             return jsonify({'bpm': 0, 'message': 'No periodic heart rate signal found'}), 200
-             
-        peak_idx = np.argmax(pxx_valid)
-        bpm = f_valid[peak_idx] * 60
-        
+            data, rgb, fps = read_rppg_request()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if data is None:
+            return jsonify({'error': 'No JSON data received'}), 400
+        if rgb is None:
+            try:
+                R, G, B = rgb_channels(data)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            if len(R):
+                rgb = np.column_stack([R, G, B])
+        if fps is not None:
+            # The ring buffer is sized for the session's fps; a new rate needs a new session
+            # (binary bodies always carry fps, as float32, hence the tolerance)
+            try:
+                fps = check_fps(fps)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            if not math.isclose(fps, session.fps, rel_tol=1e-4):
+                return jsonify({'error': f'fps cannot change within a session (opened at {session.fps:g}); '
+                                         'open a new session instead'}), 400
+
+        with session.lock:
+            if rgb is not None and len(rgb):
+                session.append(rgb)
+            window = session.window().copy()
+            fps = session.fps
+            info = session.describe()
+
+        if len(window) < RPPG_MIN_SAMPLES:
+            return jsonify({'bpm': 0, 'message': f'Collecting samples (need at least {RPPG_MIN_SAMPLES})', **info}), 200
+
+        bpm = estimate_bpm(pos_signal(window[:, 0], window[:, 1], window[:, 2]), fps)
+        if bpm is None:
+            return jsonify({'bpm': 0, 'message': 'No periodic heart rate signal found', **info}), 200
         return jsonify({
-            'message': 'Advanced rPPG (POS + Butterworth + Welch) calculation successful',
-            'bpm': round(float(bpm), 1)
+            'message': 'Sliding-window rPPG estimate updated',
+            'bpm': round(float(bpm), 1),
+            **info
         }), 200
-        
     except Exception as e:
-        print(f"❌ Error during advanced rPPG calculation: {e}")
+        print(f"❌ Error during rPPG session update: {e}")
         return jsonify({'error': f'Internal server error: {e}'}), 500
-# --- END OF rPPG ROUTE ---
+
+@app.route('/api/rppg/session/<session_id>', methods=['DELETE'])
+def close_rppg_session(session_id):
+    if not rppg_sessions.close(session_id):
+        return jsonify({'error': 'Unknown or expired rPPG session'}), 404
+    return jsonify({'message': 'rPPG session closed'}), 200
 
 
 # --- 8.1 AUTH ROUTES ---
@@ -329,7 +1003,7 @@ def register():
         if users_collection.find_one({'email': email}):
             return jsonify({'error': 'User with this email already exists'}), 400
             
-        hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+        hashed_password = hashing_pool.hash_password(password)
         
         user_id = users_collection.insert_one({
             'fullname': fullname,
@@ -340,6 +1014,8 @@ def register():
         }).inserted_id
         
         return jsonify({'message': 'User registered successfully', 'user_id': str(user_id)}), 201
+    except HashingPoolSaturated as e:
+        return hashing_busy_response(e)
     except Exception as e:
          return jsonify({'error': f'Internal server error: {e}'}), 500
 
@@ -357,13 +1033,31 @@ def login():
             return jsonify({'error': 'Database is unavailable!'}), 503
 
         user = users_collection.find_one({'email': email})
-        if not user or not bcrypt.checkpw(password.encode('utf-8'), user['password']):
+        if not user or not hashing_pool.check_password(password, user['password']):
             return jsonify({'error': 'Invalid email or password'}), 401
+
+        # Transparently upgrade hashes made with a different BCRYPT_ROUNDS
+        if BCRYPT_REHASH_ON_LOGIN and hashing_pool.needs_rehash(user['password']):
+            try:
+                users_collection.update_one(
+                    {'_id': user['_id']},
+                    {'$set': {'password': hashing_pool.hash_password(password)}}
+                )
+                auth_cache.invalidate_user(str(user['_id']))
+            except Exception as e:
+                print(f"⚠️ Could not rehash password on login: {e}")
             
-        token = jwt.encode({
+        claims = {
             'user_id': str(user['_id']),
             'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=24)
-        }, JWT_SECRET_KEY, algorithm="HS256")
+        }
+        if JWT_EMBED_USER_CLAIMS:
+            claims.update({
+                'fullname': user['fullname'],
+                'email': user['email'],
+                'is_admin': user.get('is_admin', False)
+            })
+        token = jwt.encode(claims, JWT_SECRET_KEY, algorithm="HS256")
         
         return jsonify({
             'message': 'Login successful',
@@ -374,39 +1068,243 @@ def login():
                 'is_admin': user.get('is_admin', False)
             }
         }), 200
+    except HashingPoolSaturated as e:
+        return hashing_busy_response(e)
     except Exception as e:
         return jsonify({'error': f'Internal server error: {e}'}), 500
 
+# Served from a background-refreshed snapshot (see db_stats.py)
+db_stats = DBStatsSnapshot(
+    lambda: db,
+    interval=float(os.getenv("DB_STATS_REFRESH_SECONDS", "30")),
+    exact_counts=os.getenv("DB_STATS_EXACT_COUNTS", "0") == "1"
+)
+
 @app.route('/api/debug/db', methods=['GET'])
 def debug_db():
     try:
         if db is None:
             return jsonify({'error': 'Database is unavailable!'}), 503
-        stats = {
-            'db_name': db.name,
-            'collections': db.list_collection_names(),
-            'user_count': users_collection.count_documents({}),
-            'heart_count': heart_predictions_collection.count_documents({}),
-            'stress_count': stress_predictions_collection.count_documents({})
-        }
-        return jsonify(stats), 200
+        return jsonify(db_stats.get()), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/debug/auth-cache', methods=['GET'])
+def debug_auth_cache():
+    return jsonify({'embed_user_claims': JWT_EMBED_USER_CLAIMS, **auth_cache.stats()}), 200
+
+@app.route('/api/debug/hashing', methods=['GET'])
+def debug_hashing():
+    return jsonify(hashing_pool.stats()), 200
+
+@app.route('/api/debug/write-behind', methods=['GET'])
+def debug_write_behind():
+    return jsonify({
+        'mode': PREDICTION_WRITE_MODE,
+        'heart': heart_write_buffer.stats() if heart_write_buffer is not None else None,
+        'stress': stress_write_buffer.stats() if stress_write_buffer is not None else None
+    }), 200
+
+@app.route('/api/debug/batcher', methods=['GET'])
+def debug_batcher():
+    return jsonify({
+        'enabled': MICRO_BATCH_ENABLED,
+        'heart': heart_batcher.stats() if heart_batcher is not None else None,
+        'stress': stress_batcher.stats() if stress_batcher is not None else None
+    }), 200
+
+@app.route('/api/debug/cache', methods=['GET'])
+def debug_cache():
+    return jsonify({
+        'enabled': PREDICTION_CACHE_SIZE > 0,
+        'heart': heart_cache.stats() if heart_cache is not None else None,
+        'stress': stress_cache.stats() if stress_cache is not None else None,
+        'heart_model_hash': model_registry.get('heart').sha256 if model_registry.get('heart') else None,
+        'stress_model_hash': model_registry.get('stress').sha256 if model_registry.get('stress') else None
+    }), 200
+
+@app.route('/api/debug/sentiment', methods=['GET'])
+def debug_sentiment():
+    return jsonify(sentiment_service.stats()), 200
+
+@app.route('/api/debug/rppg', methods=['GET'])
+def debug_rppg():
+    return jsonify(rppg_sessions.stats()), 200
+
+@app.route('/api/debug/models', methods=['GET'])
+def debug_models():
+    return jsonify(model_registry.stats()), 200
+
+@app.route('/api/debug/memory', methods=['GET'])
+def debug_memory():
+    memory = process_memory()
+    if memory is None:
+        return jsonify({'error': 'Memory stats need /proc/self/smaps_rollup (Linux)'}), 501
+    return jsonify({
+        'pid': os.getpid(),
+        'preloaded': FORKED_FROM_PRELOAD,
+        'model_mmap_dir': MODEL_MMAP_DIR or None,
+        **memory
+    }), 200
+
+# Users are streamed straight from a Mongo cursor so memory stays flat no
+# matter how many there are. Default output keeps the {"users": [...]} shape
+# (sent as a chunked JSON array); ?format=ndjson sends one user per line.
+# Filters: is_admin=true|false, email=<prefix>, created_after/created_before=<ISO date>
+# Sort: sort=created_at|-created_at|email|-email|fullname|-fullname (default: _id)
+ADMIN_USERS_BATCH_SIZE = int(os.getenv("ADMIN_USERS_BATCH_SIZE", "500"))
+ADMIN_USER_SORT_FIELDS = {'created_at', 'email', 'fullname'}
+
+def admin_users_query(args):
+    # is_admin is an exact true/false match (1/true/yes mean true, anything else
+    # false); email is a case-insensitive prefix match, escaped and anchored
+    query = {}
+    if 'is_admin' in args:
+        query['is_admin'] = args['is_admin'].lower() in ('1', 'true', 'yes')
+    if args.get('email'):
+        query['email'] = {'$regex': '^' + re.escape(args['email']), '$options': 'i'}
+    created = {}
+    for param, op in (('created_after', '$gte'), ('created_before', '$lt')):
+        if args.get(param):
+            try:
+                created[op] = datetime.datetime.fromisoformat(args[param])
+            except ValueError:
+                raise ValueError(f'{param} must be an ISO date, e.g. 2024-01-31')
+    if created:
+        query['created_at'] = created
+
+    sort = [('_id', ASCENDING)]
+    if args.get('sort'):
+        field = args['sort'].lstrip('-')
+        if field not in ADMIN_USER_SORT_FIELDS:
+            raise ValueError(f'sort must be one of: {", ".join(sorted(ADMIN_USER_SORT_FIELDS))}')
+        sort = [(field, DESCENDING if args['sort'].startswith('-') else ASCENDING), ('_id', ASCENDING)]
+    return query, sort
+
 @app.route('/api/admin/users', methods=['GET'])
 @token_required
 @admin_required
 def get_all_users(current_user):
     try:
-        users = list(users_collection.find({}, {'password': 0}))
-        for user in users:
-            user['_id'] = str(user['_id'])
-        return jsonify({'users': users}), 200
+        if users_collection is None:
+            return jsonify({'error': 'Database is unavailable!'}), 503
+        query, sort = admin_users_query(request.args)
+        ndjson = request.args.get('format') == 'ndjson'
+        cursor = users_collection.find(query, {'password': 0}).sort(sort).batch_size(ADMIN_USERS_BATCH_SIZE)
+
+        def generate():
+            try:
+                if not ndjson:
+                    yield '{"users": ['
+                first = True
+                for user in cursor:
+                    user['_id'] = str(user['_id'])
+                    line = app.json.dumps(user)
+                    if ndjson:
+                        yield line + '\n'
+                    else:
+                        yield line if first else ',' + line
+                    first = False
+                if not ndjson:
+                    yield ']}'
+            except Exception as e:
+                # Re-raise so the server aborts the connection: the client must see a
+                # truncated body, never a JSON array that looks complete
+                print(f"❌ Error while streaming users: {e}")
+                raise
+            finally:
+                cursor.close()
+
+        mimetype = 'application/x-ndjson' if ndjson else 'application/json'
+        return Response(generate(), mimetype=mimetype), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': f'Internal server error: {e}'}), 500
 
 # --- 8.2 PREDICTION STORAGE ROUTES ---
 
+# Prediction saves are either "durable" (insert_one before answering 201, the
+# default) or "fast": queued for a background bulk insert and answered 202.
+PREDICTION_WRITE_MODE = os.getenv("PREDICTION_WRITE_MODE", "durable")
+if PREDICTION_WRITE_MODE not in ('durable', 'fast'):
+    raise ValueError(f'Unknown PREDICTION_WRITE_MODE {PREDICTION_WRITE_MODE!r} (expected durable or fast)')
+
+def make_write_buffer(name, get_collection):
+    if PREDICTION_WRITE_MODE != 'fast':
+        return None
+    buffer = WriteBehindBuffer(
+        name, get_collection,
+        max_queue=int(os.getenv("WRITE_BEHIND_MAX_QUEUE", "10000")),
+        batch_size=int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "500")),
+        flush_interval=float(os.getenv("WRITE_BEHIND_FLUSH_INTERVAL", "0.5"))
+    )
+    atexit.register(buffer.close)  # flush on graceful shutdown
+    return buffer
+
+heart_write_buffer = make_write_buffer('heart_predictions', lambda: heart_predictions_collection)
+stress_write_buffer = make_write_buffer('stress_predictions', lambda: stress_predictions_collection)
+
+# History is keyset-paginated on (timestamp, _id), newest first:
+#   GET /api/predictions/heart?limit=50&fields=probability,timestamp&cursor=<next_cursor>
+HISTORY_DEFAULT_LIMIT = int(os.getenv("HISTORY_DEFAULT_LIMIT", "50"))
+HISTORY_MAX_LIMIT = int(os.getenv("HISTORY_MAX_LIMIT", "500"))
+HEART_HISTORY_FIELDS = {'user_id', 'probability', 'inputs', 'timestamp'}
+STRESS_HISTORY_FIELDS = {'user_id', 'stress_level', 'inputs', 'timestamp'}
+
+def encode_history_cursor(item):
+    raw = f"{item['timestamp'].isoformat()}|{item['_id']}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+def decode_history_cursor(cursor):
+    try:
+        timestamp, object_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split('|')
+        return datetime.datetime.fromisoformat(timestamp), ObjectId(object_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+def history_page(collection, user_id, allowed_fields):
+    """One page of a user's history, built from the request's query args."""
+    try:
+        limit = int(request.args.get('limit', HISTORY_DEFAULT_LIMIT))
+    except ValueError:
+        raise ValueError('limit must be an integer')
+    limit = max(1, min(limit, HISTORY_MAX_LIMIT))
+
+    projection = None
+    fields = request.args.get('fields')
+    if fields:
+        requested = {f.strip() for f in fields.split(',') if f.strip()}
+        unknown = requested - allowed_fields
+        if unknown:
+            raise ValueError(f'Unknown fields: {", ".join(sorted(unknown))}')
+        # timestamp and _id are always returned: the cursor is built from them
+        projection = {f: 1 for f in requested | {'timestamp'}}
+
+    query = {'user_id': user_id}
+    cursor = request.args.get('cursor')
+    if cursor:
+        timestamp, object_id = decode_history_cursor(cursor)
+        query['$or'] = [
+            {'timestamp': {'$lt': timestamp}},
+            {'timestamp': timestamp, '_id': {'$lt': object_id}}
+        ]
+
+    items = list(
+        collection.find(query, projection)
+        .sort([('timestamp', DESCENDING), ('_id', DESCENDING)])
+        .limit(limit + 1)
+    )
+    next_cursor = encode_history_cursor(items[limit - 1]) if len(items) > limit else None
+    items = items[:limit]
+    for item in items:
+        item['_id'] = str(item['_id'])
+    page = {'history': items, 'next_cursor': next_cursor, 'limit': limit}
+    if not cursor:
+        # First page only: a count on the user_id index prefix, so later pages stay cheap
+        page['total'] = collection.count_documents({'user_id': user_id})
+    return page
+
 @app.route('/api/predictions/heart', methods=['POST'])
 @token_required
 def save_heart_prediction(current_user):
@@ -415,16 +1313,23 @@ def save_heart_prediction(current_user):
         if heart_predictions_collection is None:
             return jsonify({'error': 'Database is unavailable!'}), 503
         data = request.json
-        print(f"DEBUG: Received data: {data}")
         prediction_entry = {
             'user_id': str(current_user['_id']),
             'probability': data.get('probability'),
             'inputs': data.get('inputs'),
             'timestamp': datetime.datetime.utcnow()
         }
+        # Return the stored entry so clients can prepend it instead of refetching history
+        if heart_write_buffer is not None:
+            prediction_entry['_id'] = ObjectId()
+            heart_write_buffer.submit(prediction_entry)
+            return jsonify({'message': 'Heart prediction accepted', 'entry': dict(prediction_entry, _id=str(prediction_entry['_id']))}), 202
         result = heart_predictions_collection.insert_one(prediction_entry)
         print(f"DEBUG: Successfully saved heart prediction: {result.inserted_id}")
-        return jsonify({'message': 'Heart prediction saved successfully'}), 201
+        prediction_entry['_id'] = str(result.inserted_id)
+        return jsonify({'message': 'Heart prediction saved successfully', 'entry': prediction_entry}), 201
+    except WriteBehindFull as e:
+        return jsonify({'error': str(e)}), 503
     except Exception as e:
         print(f"DEBUG: ERROR saving heart prediction: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -435,10 +1340,10 @@ def get_heart_history(current_user):
     try:
         if heart_predictions_collection is None:
             return jsonify({'history': []}), 200 # Return empty history if DB is down
-        history = list(heart_predictions_collection.find({'user_id': str(current_user['_id'])}).sort('timestamp', -1))
-        for item in history:
-            item['_id'] = str(item['_id'])
-        return jsonify({'history': history}), 200
+        page = history_page(heart_predictions_collection, str(current_user['_id']), HEART_HISTORY_FIELDS)
+        return jsonify(page), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -450,16 +1355,23 @@ def save_stress_prediction(current_user):
         if stress_predictions_collection is None:
             return jsonify({'error': 'Database is unavailable!'}), 503
         data = request.json
-        print(f"DEBUG: Received data: {data}")
         prediction_entry = {
             'user_id': str(current_user['_id']),
             'stress_level': data.get('stress_level'),
             'inputs': data.get('inputs'),
             'timestamp': datetime.datetime.utcnow()
         }
+        # Return the stored entry so clients can prepend it instead of refetching history
+        if stress_write_buffer is not None:
+            prediction_entry['_id'] = ObjectId()
+            stress_write_buffer.submit(prediction_entry)
+            return jsonify({'message': 'Stress prediction accepted', 'entry': dict(prediction_entry, _id=str(prediction_entry['_id']))}), 202
         result = stress_predictions_collection.insert_one(prediction_entry)
         print(f"DEBUG: Successfully saved stress prediction: {result.inserted_id}")
-        return jsonify({'message': 'Stress prediction saved successfully'}), 201
+        prediction_entry['_id'] = str(result.inserted_id)
+        return jsonify({'message': 'Stress prediction saved successfully', 'entry': prediction_entry}), 201
+    except WriteBehindFull as e:
+        return jsonify({'error': str(e)}), 503
     except Exception as e:
         print(f"DEBUG: ERROR saving stress prediction: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -470,14 +1382,110 @@ def get_stress_history(current_user):
     try:
         if stress_predictions_collection is None:
             return jsonify({'history': []}), 200 # Return empty history if DB is down
-        history = list(stress_predictions_collection.find({'user_id': str(current_user['_id'])}).sort('timestamp', -1))
-        for item in history:
-            item['_id'] = str(item['_id'])
-        return jsonify({'history': history}), 200
+        page = history_page(stress_predictions_collection, str(current_user['_id']), STRESS_HISTORY_FIELDS)
+        return jsonify(page), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+# --- 8.3 Shared Gemini client (GenAI routes) ---
+# Pooled keep-alive connections, timeouts and retries; see gemini_client.py.
+# GEMINI_BASE_URL can point at a local stub for testing. TLS certificates are
+# verified unless GEMINI_VERIFY_TLS=0 explicitly opts out.
+GEMINI_VERIFY_TLS = os.getenv("GEMINI_VERIFY_TLS", "1") != "0"
+if not GEMINI_VERIFY_TLS:
+    print("⚠️ GEMINI_VERIFY_TLS=0: Gemini's TLS certificate is NOT verified")
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+gemini = GeminiClient(
+    base_url=os.getenv("GEMINI_BASE_URL", "https://generativelanguage.googleapis.com/v1beta"),
+    model=os.getenv("GEMINI_MODEL", "gemini-2.5-flash"),
+    connect_timeout=float(os.getenv("GEMINI_CONNECT_TIMEOUT", "3.05")),
+    read_timeout=float(os.getenv("GEMINI_READ_TIMEOUT", "30")),
+    max_retries=int(os.getenv("GEMINI_MAX_RETRIES", "2")),
+    pool_size=int(os.getenv("GEMINI_POOL_SIZE", "10")),
+    verify_tls=GEMINI_VERIFY_TLS
+)
+
+# Response cache for prompts built only from coarse inputs (nutrition planner,
+# and the stress coach when GENAI_CACHE_STRESS_COACH=1). GENAI_CACHE_SIZE=0
+# disables it; GENAI_CACHE_DIR adds a disk tier shared by all workers.
+GENAI_CACHE_SIZE = int(os.getenv("GENAI_CACHE_SIZE", "1000"))
+GENAI_CACHE_STRESS_COACH = os.getenv("GENAI_CACHE_STRESS_COACH", "0") == "1"
+
+if GENAI_CACHE_SIZE > 0:
+    genai_cache = GenAICache(
+        maxsize=GENAI_CACHE_SIZE,
+        ttl=float(os.getenv("GENAI_CACHE_TTL", "86400")),
+        disk_dir=os.getenv("GENAI_CACHE_DIR") or None,
+        disk_max_bytes=int(float(os.getenv("GENAI_CACHE_DISK_MAX_MB", "256")) * 1024 * 1024)
+    )
+else:
+    genai_cache = None
+
+def cached_generate(key_prompt, prompt, system_prompt):
+    """(text, cache source) for prompt, shared by every request with the same key_prompt."""
+    if genai_cache is None:
+        return gemini.generate(prompt, system_prompt), 'off'
+    key = make_key(gemini.model, system_prompt, key_prompt)
+    return genai_cache.get_or_generate(key, lambda: gemini.generate(prompt, system_prompt))
+
+def genai_response(body, source):
+    response = jsonify(body)
+    response.headers['X-GenAI-Cache'] = source
+    return response
+
+# --- 8.3.1 Streaming GenAI responses (Server-Sent Events) ---
+# With ?stream=1 or "Accept: text/event-stream" the GenAI routes relay
+# Gemini's streamGenerateContent chunks as they arrive:
+#   data: {"text": "..."}          one per chunk
+#   event: done / data: {"source": ...}   when the answer is complete
+#   event: error / data: {"error": ...}   if generation fails
+# Without it they keep answering with the full JSON body.
+def wants_stream():
+    return request.args.get('stream') == '1' or 'text/event-stream' in request.headers.get('Accept', '')
+
+def sse_event(data, event=None):
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+def stream_genai(prompt, system_prompt, key_prompt=None, label='GenAI'):
+    """SSE response for prompt; key_prompt enables the response cache."""
+    key = None
+    if key_prompt is not None and genai_cache is not None:
+        key = make_key(gemini.model, system_prompt, key_prompt)
+
+    def events():
+        if key is not None:
+            cached, source = genai_cache.lookup(key)
+            if cached is not MISSING:
+                yield sse_event({'text': cached})
+                yield sse_event({'source': source}, 'done')
+                return
+        parts = []
+        try:
+            for text in gemini.generate_stream(prompt, system_prompt):
+                parts.append(text)
+                yield sse_event({'text': text})
+        except Exception as e:
+            print(f"❌ Error streaming {label} response: {e}")
+            yield sse_event({'error': 'Sorry, I\'m facing a technical issue.'}, 'error')
+            return
+        if key is not None:
+            genai_cache.store(key, ''.join(parts))
+        yield sse_event({'source': 'generated' if key is not None else 'off'}, 'done')
+
+    # X-Accel-Buffering stops nginx-style proxies from holding the stream back
+    return Response(events(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/debug/genai', methods=['GET'])
+def debug_genai():
+    stats = gemini.stats()
+    stats['cache'] = genai_cache.stats() if genai_cache is not None else None
+    return jsonify(stats), 200
+
 # --- 9. AI CHATBOT ROUTE (GenAI) ---
 @app.route('/api/chatbot', methods=['POST'])
 def chatbot():
@@ -493,28 +1501,10 @@ def chatbot():
     user_message = messages[-1].get('text', '')
     if not user_message: return jsonify({'answer': '...'})
     
+    if wants_stream():
+        return stream_genai(user_message, SYSTEM_PROMPT, label='chatbot')
     try:
-        apiKey = os.getenv("GEMINI_API_KEY")
-        if not apiKey: raise Exception("GEMINI_API_KEY not found")
-        
-        apiUrl = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent"
-        
-        payload = {
-            "contents": [{"parts": [{"text": user_message}]}],
-            "systemInstruction": {"parts": [{"text": SYSTEM_PROMPT}]}
-        }
-        
-        headers = {
-            'Content-Type': 'application/json',
-            'x-goog-api-key': apiKey 
-        }
-        
-        response = requests.post(apiUrl, json=payload, headers=headers, verify=False)
-        response.raise_for_status()
-        result = response.json()
-        
-        text = result.get('candidates', [{}])[0].get('content', {}).get('parts', [{}])[0].get('text', '')
-        if not text: raise Exception("No text found in API response")
+        text = gemini.generate(user_message, SYSTEM_PROMPT)
         
         return jsonify({'answer': text})
         
@@ -531,44 +1521,57 @@ def nutrition_planner():
     data = request.json
     age = data.get('age'); goal = data.get('goal'); restrictions = data.get('restrictions'); risk_score = data.get('riskScore') 
     if not age or not goal: return jsonify({'error': '...'}), 400
-    risk_text = "N/A"
+    risk_text = "N/A"; risk_label = "N/A"
     if risk_score is not None:
         risk_percentage = round(risk_score * 100, 1)
-        if risk_score > 0.7: risk_text = f"{risk_percentage}% (VERY HIGH risk...)"
-        elif risk_score > 0.5: risk_text = f"{risk_percentage}% (HIGH risk...)"
-        elif risk_score > 0.3: risk_text = f"{risk_percentage}% (BORDERLINE...)"
-        else: risk_text = f"{risk_percentage}% (LOW risk...)"
-    USER_PROMPT = f"""
+        if risk_score > 0.7: risk_label = "VERY HIGH risk..."
+        elif risk_score > 0.5: risk_label = "HIGH risk..."
+        elif risk_score > 0.3: risk_label = "BORDERLINE..."
+        else: risk_label = "LOW risk..."
+        risk_text = f"{risk_percentage}% ({risk_label})"
+    USER_PROMPT_TEMPLATE = """
     Please generate a 3-day sample meal plan for me.
     - My Age: {age}
     - My Health Goal: {goal}
     - My Dietary Restrictions: {restrictions}
-    - My LATEST HEART RISK SCORE: {risk_text}
+    - My LATEST HEART RISK SCORE: {risk}
     **IMPORTANT**: You MUST tailor the meal plan to be appropriate for my heart risk score.
     """
+    USER_PROMPT = USER_PROMPT_TEMPLATE.format(age=age, goal=goal, restrictions=restrictions, risk=risk_text)
+    # Cached per risk bucket rather than per exact percentage
+    KEY_PROMPT = USER_PROMPT_TEMPLATE.format(age=age, goal=goal, restrictions=restrictions, risk=risk_label)
+    if wants_stream():
+        return stream_genai(USER_PROMPT, SYSTEM_PROMPT, KEY_PROMPT, label='nutrition plan')
     try:
-        apiKey = os.getenv("GEMINI_API_KEY")
-        if not apiKey: raise Exception("GEMINI_API_KEY not found")
-        apiUrl = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent"
-        payload = {
-            "contents": [{"parts": [{"text": USER_PROMPT}]}],
-            "systemInstruction": {"parts": [{"text": SYSTEM_PROMPT}]}
-        }
-        headers = {
-            'Content-Type': 'application/json',
-            'x-goog-api-key': apiKey 
-        }
-        response = requests.post(apiUrl, json=payload, headers=headers, verify=False)
-        response.raise_for_status()
-        result = response.json()
-        text = result.get('candidates', [{}])[0].get('content', {}).get('parts', [{}])[0].get('text', '')
-        if not text: raise Exception("No text found in API response")
-        return jsonify({'meal_plan': text})
+        text, source = cached_generate(KEY_PROMPT, USER_PROMPT, SYSTEM_PROMPT)
+        return genai_response({'meal_plan': text}, source)
     except Exception as e:
         print(f"❌ Error processing nutrition plan request: {e}")
         return jsonify({'error': 'Sorry, I\'m facing a technical issue.'}), 500
 
 # --- 11. ADVANCED AI STRESS COACH (GenAI + NLP) ---
+# Coarse stressor classes for the cached stress coach: keyword -> topic
+STRESS_TOPIC_KEYWORDS = {
+    'work': ('work', 'job', 'boss', 'deadline', 'deadlines', 'office', 'career', 'meeting', 'meetings', 'coworker', 'coworkers'),
+    'sleep': ('sleep', 'sleeping', 'insomnia', 'tired', 'exhausted', 'fatigue', 'awake'),
+    'relationships': ('partner', 'family', 'friend', 'friends', 'relationship', 'lonely', 'marriage', 'divorce', 'kids', 'parents'),
+    'health': ('health', 'pain', 'sick', 'illness', 'doctor', 'heart', 'diagnosis'),
+    'money': ('money', 'bills', 'debt', 'rent', 'finances', 'financial', 'loan'),
+    'study': ('exam', 'exams', 'school', 'study', 'studying', 'college', 'university', 'grades'),
+}
+STRESS_TOPIC_BY_WORD = {word: topic for topic, words in STRESS_TOPIC_KEYWORDS.items() for word in words}
+STRESS_COACH_BUCKET_TEMPLATE = """
+    Please generate a 2-3 step, simple stress-relief plan for me.
+    - What I'm stressed about: {topics}
+    - My NLP Model's Sentiment Analysis: {sentiment_label} (Score: about {sentiment_score})
+    - My LATEST HEART RISK SCORE: {risk}
+    """
+
+def stress_topics(text):
+    """Sorted stressor topics mentioned in text, or ['general']."""
+    topics = {STRESS_TOPIC_BY_WORD[w] for w in re.findall(r"[a-z]+", text.lower()) if w in STRESS_TOPIC_BY_WORD}
+    return sorted(topics) or ['general']
+
 @app.route('/api/stress-coach', methods=['POST'])
 def stress_coach():
     SYSTEM_PROMPT = (
@@ -577,45 +1580,192 @@ def stress_coach():
     data = request.json
     user_text = data.get('user_text'); risk_score = data.get('riskScore') 
     if not user_text: return jsonify({'error': 'Missing form data.'}), 400
-    sentiment = sentiment_analyzer.polarity_scores(user_text)
+    sentiment = sentiment_service.score(str(user_text))
     sentiment_score = sentiment['compound']
     if sentiment_score < -0.5: sentiment_label = "Very Negative"
     elif sentiment_score < 0: sentiment_label = "Negative"
     elif sentiment_score == 0: sentiment_label = "Neutral"
     else: sentiment_label = "Positive"
-    risk_text = "N/A"
+    risk_text = "N/A"; risk_label = "N/A"
     if risk_score is not None:
         risk_percentage = round(risk_score * 100, 1)
-        if risk_score > 0.5: risk_text = f"{risk_percentage}% (HIGH risk)"
-        else: risk_text = f"{risk_percentage}% (LOW/BORDERLINE risk)"
-    USER_PROMPT = f"""
+        if risk_score > 0.5: risk_label = "HIGH risk"
+        else: risk_label = "LOW/BORDERLINE risk"
+        risk_text = f"{risk_percentage}% ({risk_label})"
+    USER_PROMPT_TEMPLATE = """
     Please generate a 2-3 step, simple stress-relief plan for me.
     - The User's Raw Feeling: "{user_text}"
     - My NLP Model's Sentiment Analysis: {sentiment_label} (Score: {sentiment_score})
-    - My LATEST HEART RISK SCORE: {risk_text}
+    - My LATEST HEART RISK SCORE: {risk}
     """
+    USER_PROMPT = USER_PROMPT_TEMPLATE.format(user_text=user_text, sentiment_label=sentiment_label,
+                                              sentiment_score=sentiment_score, risk=risk_text)
+    KEY_PROMPT = None
+    if GENAI_CACHE_STRESS_COACH:
+        # Opt-in: the prompt is built only from coarse inputs (sentiment bucket, risk
+        # bucket, stressor topics), never the raw text, so the cached plan can be
+        # shared with every user in the same buckets
+        USER_PROMPT = KEY_PROMPT = STRESS_COACH_BUCKET_TEMPLATE.format(
+            topics=', '.join(stress_topics(str(user_text))), sentiment_label=sentiment_label,
+            sentiment_score=round(sentiment_score, 1), risk=risk_label)
+    if wants_stream():
+        return stream_genai(USER_PROMPT, SYSTEM_PROMPT, KEY_PROMPT, label='stress plan')
     try:
-        apiKey = os.getenv("GEMINI_API_KEY")
-        if not apiKey: raise Exception("GEMINI_API_KEY not found")
-        apiUrl = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent"
-        payload = {
-            "contents": [{"parts": [{"text": USER_PROMPT}]}],
-            "systemInstruction": {"parts": [{"text": SYSTEM_PROMPT}]}
-        }
-        headers = {
-            'Content-Type': 'application/json',
-            'x-goog-api-key': apiKey 
-        }
-        response = requests.post(apiUrl, json=payload, headers=headers, verify=False)
-        response.raise_for_status()
-        result = response.json()
-        text = result.get('candidates', [{}])[0].get('content', {}).get('parts', [{}])[0].get('text', '')
-        if not text: raise Exception("No text found in API response")
-        return jsonify({'stress_plan': text})
+        if KEY_PROMPT is not None:
+            text, source = cached_generate(KEY_PROMPT, USER_PROMPT, SYSTEM_PROMPT)
+        else:
+            text, source = gemini.generate(USER_PROMPT, SYSTEM_PROMPT), 'off'
+        return genai_response({'stress_plan': text}, source)
     except Exception as e:
         print(f"❌ Error processing stress plan request: {e}")
         return jsonify({'error': 'Sorry, I\'m facing a technical issue.'}), 500
 
-# --- 12. Run the Application ---
+# --- 11.1 Metrics ---
+# Hot-path stages that live in other modules are timed by wrapping them here.
+# rppg_engine calls its own helpers through module globals, so every rPPG
+# route (single, batch, sessions, trajectories) is covered.
+metrics.instrument(rppg_engine, 'pos_signals', 'rppg_pos')
+metrics.instrument(rppg_engine, 'bandpass', 'rppg_filter')
+metrics.instrument(rppg_engine, 'power_spectrum', 'rppg_welch')
+metrics.instrument(rppg_engine, 'bpm_trajectories', 'rppg_stft')
+# score() also covers compound(), which calls it, so each text is timed once
+metrics.instrument(sentiment_service, 'score', 'sentiment')
+metrics.instrument(sentiment_service, 'compound_many', 'sentiment_batch')
+metrics.instrument(hashing_pool, 'hash_password', 'bcrypt_hash')
+metrics.instrument(hashing_pool, 'check_password', 'bcrypt_check')
+metrics.instrument(gemini, 'generate_content', 'gemini_generate')
+metrics.instrument(gemini, 'generate_stream', 'gemini_stream')
+
+# Prometheus text format; merged across gunicorn workers (see gunicorn.conf.py)
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    body, content_type = metrics.render()
+    return Response(body, content_type=content_type)
+
+# --- 11.2 Request Profiling (opt-in) ---
+# With PROFILING_ENABLED=1, a request is profiled when an admin sends
+# "X-Profile: 1", or at random at PROFILE_SAMPLE_RATE. PROFILE_MODE=sample
+# writes collapsed stacks from a 5 ms stack sampler; cprofile writes .pstats.
+# When disabled no hooks are installed at all.
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0") == "1"
+
+if PROFILING_ENABLED:
+    profiler = RequestProfiler(
+        os.getenv("PROFILE_DIR", "profiles"),
+        max_files=int(os.getenv("PROFILE_MAX_FILES", "200")),
+        mode=os.getenv("PROFILE_MODE", "sample"),
+        interval_ms=float(os.getenv("PROFILE_INTERVAL_MS", "5")),
+        sample_rate=float(os.getenv("PROFILE_SAMPLE_RATE", "0")),
+        authorize=request_is_admin
+    )
+    profiler.install(app)
+    print(f"✅ Request profiling enabled ({profiler.mode}, sample rate {profiler.sample_rate})")
+else:
+    profiler = None
+
+# Slowest kept profiles per route (?route=/api/predict-stress&top=5)
+@app.route('/api/admin/profiles', methods=['GET'])
+@token_required
+@admin_required
+def list_profiles(current_user):
+    if profiler is None:
+        return jsonify({'error': 'Profiling is disabled (set PROFILING_ENABLED=1)'}), 404
+    top = request.args.get('top', default=5, type=int)
+    return jsonify({
+        **profiler.stats(),
+        'profiles': profiler.list_profiles(request.args.get('route'), max(1, min(top, 100)))
+    }), 200
+
+@app.route('/api/admin/profiles/<name>', methods=['GET'])
+@token_required
+@admin_required
+def download_profile(current_user, name):
+    if profiler is None:
+        return jsonify({'error': 'Profiling is disabled (set PROFILING_ENABLED=1)'}), 404
+    if not profiler.has_profile(name):
+        return jsonify({'error': 'Profile not found'}), 404
+    return send_from_directory(os.path.abspath(profiler.directory), name, as_attachment=True)
+
+# --- 12. Startup, Warm-up and Health Probes ---
+# Dummy inputs that exercise the same code as real requests (model runtimes,
+# sentiment scoring, scipy filter design / Welch / STFT) so the first real
+# request doesn't pay for lazy imports and first-call setup. Caches are bypassed.
+WARMUP_HEART = {"age": 45, "trestbps": 120, "chol": 220, "thalach": 150, "oldpeak": 1.5, "cp": 1, "ca": 0, "thal": 2}
+WARMUP_STRESS = {
+    "Age": "30", "Gender": "Male", "Occupation": "Doctor", "Sleep Duration": "7", "Quality of Sleep": "8",
+    "Physical Activity Level": "60", "BMI Category": "Normal", "Blood Pressure": "120/80",
+    "Heart Rate": "70", "Daily Steps": "8000", "journal_text": "Warming up after a calm day."
+}
+
+def warm_up():
+    readiness.begin('warmup')
+    try:
+        if model_registry.get('heart') is not None:
+            predict_heart_rows([prepare_heart_record(WARMUP_HEART)])
+        if model_registry.get('stress') is not None:
+            predict_stress_rows([prepare_stress_record(WARMUP_STRESS)])
+        t = np.arange(300) / 30.0
+        g = 120 + np.sin(2 * np.pi * 1.2 * t)
+        y = pos_signal(g + 30, g, g - 20)
+        estimate_bpm(y, 30.0)
+        rppg_engine.bpm_trajectory(y, 30.0, RPPG_TRAJECTORY_WINDOW_SECONDS, RPPG_TRAJECTORY_STEP_SECONDS)
+    except Exception as e:
+        print(f"❌ Warm-up failed: {e}")
+        readiness.failed('warmup', e)
+        return
+    readiness.done('warmup')
+
+def start_up():
+    """Load the models and warm up, then print the worker's cold-start time."""
+    load_models()
+    warm_up()
+    # In background mode MongoDB connects in parallel and may not be done yet
+    db_seconds = readiness.seconds('database')
+    db = f"{db_seconds:.2f}s" if db_seconds is not None else readiness.status('database')
+    print(f"✅ Worker {os.getpid()} warm in {time.perf_counter() - BOOT_STARTED:.2f}s "
+          f"(imports {IMPORTS_SECONDS:.2f}s, database {db}, models {readiness.seconds('models') or 0:.2f}s, "
+          f"warm-up {readiness.seconds('warmup') or 0:.2f}s, mode {STARTUP_MODE})")
+
+# Liveness: the process is up and serving requests
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    return jsonify({'status': 'ok'}), 200
+
+# Readiness: models loaded, warm-up done and (unless READYZ_REQUIRE_DB=0) MongoDB connected
+@app.route('/readyz', methods=['GET'])
+def readyz():
+    report = readiness.report()
+    return jsonify(report), 200 if report['ready'] else 503
+
+# True in workers forked from a preloading gunicorn master (see gunicorn.conf.py)
+FORKED_FROM_PRELOAD = False
+
+def after_fork():
+    """Called in each worker forked from a preloading master (gunicorn post_fork).
+
+    The models and warm-up state come over from the master as shared
+    copy-on-write pages. MongoClient is not fork-safe, so each worker opens
+    its own; threads don't survive a fork, so the model watcher and any
+    unfinished background start are restarted here.
+    """
+    global FORKED_FROM_PRELOAD
+    FORKED_FROM_PRELOAD = True
+    if STARTUP_MODE == 'background':
+        threading.Thread(target=connect_mongo_until_ready, name='mongo-connect', daemon=True).start()
+        if not (readiness.status('models') == 'ready' and readiness.status('warmup') == 'ready'):
+            threading.Thread(target=start_up, name='startup', daemon=True).start()
+    else:
+        connect_mongo()
+    model_registry.watch()  # the manifest watcher thread stayed behind in the master
+
+IMPORTS_SECONDS = time.perf_counter() - BOOT_STARTED  # before MongoDB, so each stage is reported on its own
+if STARTUP_MODE == 'background':
+    threading.Thread(target=connect_mongo_until_ready, name='mongo-connect', daemon=True).start()
+    threading.Thread(target=start_up, name='startup', daemon=True).start()
+else:
+    connect_mongo()
+    start_up()
+
+# --- 13. Run the Application ---
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
\ No newline at end of file
@@ -0,0 +1,68 @@
+# backend/auth_cache.py
+#
+# Caches for token_required so an authenticated request doesn't have to pay
+# a JWT signature check and a MongoDB user lookup every time.
+#
+# - tokens: sha256(token) -> decoded claims. An entry never outlives the
+#   token's own "exp", so expired tokens still fail.
+# - users:  user id -> user document WITHOUT the password field.
+#
+# Anything that changes a user document must call invalidate_user(user_id).
+
+import hashlib
+import time
+
+from ttl_cache import TTLCache, MISSING
+
+
+class AuthCache:
+    def __init__(self, user_ttl=60.0, user_size=10000, token_ttl=300.0, token_size=10000):
+        self.users = TTLCache(user_size, user_ttl) if user_ttl > 0 else None
+        self.tokens = TTLCache(token_size, token_ttl) if token_ttl > 0 else None
+
+    @staticmethod
+    def token_key(token):
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+    def decode_token(self, token, decode_fn):
+        """Claims for token, verifying with decode_fn only on a cache miss."""
+        if self.tokens is None:
+            return decode_fn(token)
+        key = self.token_key(token)
+        claims = self.tokens.get(key)
+        if claims is not MISSING:
+            return claims
+        claims = decode_fn(token)
+        ttl = self.tokens.ttl
+        if 'exp' in claims:
+            ttl = min(ttl, claims['exp'] - time.time())
+        if ttl > 0:
+            self.tokens.set(key, claims, ttl=ttl)
+        return claims
+
+    def get_user(self, user_id, load_fn):
+        """User document (no password) for user_id; None if it doesn't exist."""
+        if self.users is None:
+            return load_fn(user_id)
+        user = self.users.get(user_id)
+        if user is MISSING:
+            user = load_fn(user_id)
+            if user is None:
+                return None  # Not cached: a user created later must be found
+            user.pop('password', None)
+            self.users.set(user_id, user)
+        return dict(user)
+
+    def invalidate_user(self, user_id):
+        if self.users is not None:
+            self.users.pop(str(user_id))
+
+    def invalidate_token(self, token):
+        if self.tokens is not None:
+            self.tokens.pop(self.token_key(token))
+
+    def stats(self):
+        return {
+            'users': self.users.stats() if self.users is not None else None,
+            'tokens': self.tokens.stats() if self.tokens is not None else None,
+        }
@@ -0,0 +1,36 @@
+# backend/bench_bcrypt.py
+#
+# Measures login throughput (bcrypt checks/sec) through the hashing pool for
+# a few cost factors and pool sizes, and reports it per core. Run from the
+# backend folder:
+#   python bench_bcrypt.py [rounds ...]
+
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from hashing_pool import HashingPool
+
+LOGINS = 64
+PASSWORD = 'correct horse battery staple'
+
+def bench(rounds, workers):
+    pool = HashingPool(workers=workers, max_pending=LOGINS, rounds=rounds)
+    hashed = pool.hash_password(PASSWORD)  # also spins up the worker processes
+    start = time.perf_counter()
+    # Simulate concurrent request threads all logging in at once
+    with ThreadPoolExecutor(max_workers=max(1, workers) * 2) as clients:
+        results = list(clients.map(lambda _: pool.check_password(PASSWORD, hashed), range(LOGINS)))
+    elapsed = time.perf_counter() - start
+    assert all(results)
+    cores = max(1, min(workers, os.cpu_count() or 1))
+    rate = LOGINS / elapsed
+    print(f"  rounds={rounds:<2} workers={workers:<2} {rate:8.1f} logins/s  {rate / cores:8.1f} logins/s/core  "
+          f"{elapsed / LOGINS * 1000 * cores:7.1f} ms CPU/login")
+
+if __name__ == '__main__':
+    rounds_list = [int(r) for r in sys.argv[1:]] or [10, 12]
+    print(f"{os.cpu_count()} CPUs, {LOGINS} logins per run")
+    for rounds in rounds_list:
+        for workers in (1, 2, 4):
+            bench(rounds, workers)
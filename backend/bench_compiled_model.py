@@ -0,0 +1,51 @@
+# backend/bench_compiled_model.py
+#
+# Checks that the compiled runtimes match the sklearn pipelines exactly and
+# compares single-row latency. Run from the backend folder:
+#   python bench_compiled_model.py
+
+import time
+import numpy as np
+import pandas as pd
+from compiled_model import load_compiled
+
+ROUNDS = 500
+
+def percentiles(fn, rounds=ROUNDS):
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return np.percentile(timings, [50, 99])
+
+def heart_records():
+    df = pd.read_csv('../heart_data.csv')
+    return df.to_dict('records')
+
+def stress_records():
+    df = pd.read_csv('../stress_data.csv')
+    bp = df['Blood Pressure'].str.split('/', expand=True).astype(int)
+    df['Systolic BP'] = bp[0]
+    df['Diastolic BP'] = bp[1]
+    df['Sentiment_Score'] = np.random.default_rng(0).uniform(-1, 1, len(df)).round(4)
+    return df.to_dict('records')
+
+def run(name, path, records):
+    pipeline, compiled = load_compiled(path)
+    columns = compiled.feature_names
+    records = [{col: r[col] for col in columns} for r in records]
+
+    expected = pipeline.predict_proba(pd.DataFrame(records, columns=columns))
+    actual = compiled.predict_proba_records(records)
+    print(f"{name}: {len(records)} rows, exact match = {np.array_equal(expected, actual)}")
+
+    row = records[0]
+    sk_p50, sk_p99 = percentiles(lambda: pipeline.predict_proba(pd.DataFrame([row])[columns]))
+    c_p50, c_p99 = percentiles(lambda: compiled.predict_proba_records([row]))
+    print(f"  sklearn  p50={sk_p50:.3f}ms p99={sk_p99:.3f}ms")
+    print(f"  compiled p50={c_p50:.3f}ms p99={c_p99:.3f}ms ({sk_p99 / c_p99:.0f}x faster at p99)")
+
+if __name__ == '__main__':
+    run('heart', 'heart_risk_pipeline.joblib', heart_records())
+    run('stress', 'stress_model_v2.joblib', stress_records())
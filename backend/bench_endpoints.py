@@ -0,0 +1,193 @@
+# backend/bench_endpoints.py
+#
+# Micro-benchmarks every API route (prediction, rPPG, auth, history, admin)
+# through Flask's test client, with the database swapped for the in-memory
+# stand-in in memory_db.py (seeded from mock_db.json plus generated users and
+# history). No server, MongoDB or network is needed. Run from the backend folder:
+#   python bench_endpoints.py --output before.json
+#   python bench_endpoints.py --baseline before.json --threshold 0.25
+# With --baseline the run fails (exit 1) if any route's p50 latency grew, or
+# its ops/sec dropped, by more than the threshold. GenAI routes are covered
+# by bench_genai.py instead.
+
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+# Never touch a real database from a benchmark
+os.environ['MONGO_URI'] = os.environ.get('BENCH_MONGO_URI', 'mongodb://127.0.0.1:1')
+
+import app as app_module
+import rppg_payload
+from memory_db import MemoryDatabase, install
+
+HEART = {"age": 45, "trestbps": 120, "chol": 220, "thalach": 150, "oldpeak": 1.5, "cp": 1, "ca": 0, "thal": 2}
+STRESS = {
+    "Age": "30", "Gender": "Male", "Occupation": "Doctor", "Sleep Duration": "7", "Quality of Sleep": "8",
+    "Physical Activity Level": "60", "BMI Category": "Normal", "Blood Pressure": "120/80",
+    "Heart Rate": "70", "Daily Steps": "8000", "journal_text": "I had a long but fairly good day."
+}
+PASSWORD = 'bench-password-123'
+
+
+def rgb_signal(seconds=10, fps=30.0, bpm=72.0, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * fps)) / fps
+    pulse = 0.5 * np.sin(2 * np.pi * bpm / 60.0 * t)
+    return [(base + pulse * k + rng.normal(0, 0.2, len(t))).round(3).tolist()
+            for base, k in ((150, 0.3), (120, 1.0), (100, 0.2))]
+
+
+def seed_database(path, users, history):
+    db = MemoryDatabase.from_json(path)
+    hashed = app_module.hashing_pool.hash_password(PASSWORD)
+    now = datetime.datetime.utcnow()
+    user_ids = []
+    for i in range(users):
+        result = db.users.insert_one({
+            'fullname': f'Bench User {i}', 'email': f'user{i}@bench.local', 'password': hashed,
+            'is_admin': i == 0, 'created_at': now - datetime.timedelta(days=i)
+        })
+        user_ids.append(str(result.inserted_id))
+    for user_id in user_ids[:2]:
+        for j in range(history):
+            stamp = now - datetime.timedelta(minutes=j)
+            db.heart_predictions.insert_one({'user_id': user_id, 'probability': 0.3, 'inputs': HEART, 'timestamp': stamp})
+            db.stress_predictions.insert_one({'user_id': user_id, 'stress_level': 4, 'inputs': STRESS, 'timestamp': stamp})
+    return db
+
+
+def build_cases(client, token):
+    auth = {'Authorization': f'Bearer {token}'}
+    r, g, b = rgb_signal()
+    binary = rppg_payload.encode_binary(r, g, b, 30.0)
+    session_id = client.post('/api/rppg/session', json={'fps': 30}).get_json()['session_id']
+    chunk = {'r': r[:30], 'g': g[:30], 'b': b[:30]}
+    counter = iter(range(10 ** 9))
+
+    # name -> function(i) returning a test client response
+    return {
+        'predict_heart': lambda i: client.post('/api/predict', json=dict(HEART, age=30 + i % 50)),
+        'predict_stress': lambda i: client.post('/api/predict-stress', json=dict(STRESS, Age=str(20 + i % 40))),
+        'predict_heart_batch_100': lambda i: client.post(
+            '/api/predict/batch', json={'records': [dict(HEART, age=20 + (i + k) % 60) for k in range(100)]}),
+        'rppg_json_300': lambda i: client.post('/api/rppg', json={'r': r, 'g': g, 'b': b, 'fps': 30}),
+        'rppg_binary_300': lambda i: client.post('/api/rppg', data=binary, content_type='application/octet-stream'),
+        'rppg_session_append_30': lambda i: client.post(f'/api/rppg/session/{session_id}', json=chunk),
+        'register': lambda i: client.post('/api/register', json={
+            'fullname': 'New User', 'email': f'new{next(counter)}@bench.local', 'password': PASSWORD}),
+        'login': lambda i: client.post('/api/login', json={'email': 'user1@bench.local', 'password': PASSWORD}),
+        'history_heart_page_50': lambda i: client.get('/api/predictions/heart?limit=50', headers=auth),
+        'history_heart_save': lambda i: client.post(
+            '/api/predictions/heart', json={'probability': 0.3, 'inputs': HEART}, headers=auth),
+        'history_stress_page_50': lambda i: client.get('/api/predictions/stress?limit=50', headers=auth),
+        'history_stress_save': lambda i: client.post(
+            '/api/predictions/stress', json={'stress_level': 4, 'inputs': STRESS}, headers=auth),
+        'admin_users': lambda i: client.get('/api/admin/users', headers=auth),
+    }
+
+
+def run_case(fn, duration, min_iterations, max_iterations, warmup=3):
+    for i in range(warmup):
+        fn(i).get_data()
+    timings, errors = [], 0
+    started = time.perf_counter()
+    i = 0
+    while i < max_iterations and (i < min_iterations or time.perf_counter() - started < duration):
+        t0 = time.perf_counter()
+        response = fn(i)
+        response.get_data()  # drain streamed bodies
+        timings.append((time.perf_counter() - t0) * 1000.0)
+        errors += int(response.status_code >= 400)
+        i += 1
+    elapsed = time.perf_counter() - started
+    p50, p95, p99 = np.percentile(timings, [50, 95, 99])
+    return {'iterations': i, 'errors': errors, 'ops_per_sec': i / elapsed,
+            'p50_ms': float(p50), 'p95_ms': float(p95), 'p99_ms': float(p99)}
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    """Names of cases that regressed by more than threshold, printing a diff table."""
+    regressions = []
+    print(f"\nvs baseline {baseline['meta'].get('git_revision')} (threshold {threshold:.0%}):")
+    for name, now in results.items():
+        before = baseline['results'].get(name)
+        if before is None:
+            print(f"  {name:<26} new")
+            continue
+        latency = now['p50_ms'] / before['p50_ms'] - 1 if before['p50_ms'] else 0.0
+        throughput = now['ops_per_sec'] / before['ops_per_sec'] - 1 if before['ops_per_sec'] else 0.0
+        regressed = latency > threshold or throughput < -threshold
+        if regressed:
+            regressions.append(name)
+        print(f"  {name:<26} p50 {latency:+7.1%}  ops/s {throughput:+7.1%}{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Endpoint micro-benchmarks on an in-memory database')
+    parser.add_argument('--seed', default='mock_db.json', help='mock_db.json-shaped seed file')
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--history', type=int, default=1000, help='predictions per collection for the bench user')
+    parser.add_argument('--duration', type=float, default=2.0, help='seconds per route')
+    parser.add_argument('--min-iterations', type=int, default=5)
+    parser.add_argument('--max-iterations', type=int, default=5000)
+    parser.add_argument('--only', nargs='+', help='run only these cases')
+    parser.add_argument('--output', default='bench_endpoints.json')
+    parser.add_argument('--baseline', help='results file from an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed relative regression')
+    args = parser.parse_args()
+
+    install(app_module, seed_database(args.seed, args.users, args.history))
+    client = app_module.app.test_client()
+    login = client.post('/api/login', json={'email': 'user0@bench.local', 'password': PASSWORD}).get_json()
+    cases = build_cases(client, login['access_token'])
+
+    results = {}
+    print(f"{'route':<26} {'ops/s':>9} {'p50':>9} {'p95':>9} {'p99':>9}  errors")
+    for name, fn in cases.items():
+        if args.only and name not in args.only:
+            continue
+        with contextlib.redirect_stdout(io.StringIO()):  # the routes' DEBUG prints
+            result = run_case(fn, args.duration, args.min_iterations, args.max_iterations)
+        results[name] = result
+        print(f"{name:<26} {result['ops_per_sec']:9.1f} {result['p50_ms']:8.2f}ms {result['p95_ms']:8.2f}ms "
+              f"{result['p99_ms']:8.2f}ms  {result['errors']}")
+
+    report = {
+        'meta': {
+            'git_revision': git_revision(),
+            'timestamp': datetime.datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'cpus': os.cpu_count(),
+            'settings': {k: v for k, v in vars(args).items() if k not in ('output', 'baseline')},
+        },
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"❌ {len(regressions)} route(s) regressed: {', '.join(regressions)}")
+            sys.exit(1)
@@ -0,0 +1,199 @@
+# backend/bench_genai.py
+#
+# Load-tests /api/chatbot, /api/nutrition-planner and /api/stress-coach
+# against the local Gemini stub, fully offline. By default it starts the stub
+# and a gunicorn server itself; run from the backend folder:
+#   python bench_genai.py --workers 4 --concurrency 1 4 16 --duration 10
+#   python bench_genai.py --stream                      # SSE mode, adds TTFT
+#   python bench_genai.py --base-url http://127.0.0.1:5000 --stub-url http://127.0.0.1:8089
+#
+# Per route and concurrency level it reports throughput, latency percentiles,
+# errors and worker saturation. Sync gunicorn workers are held for the whole
+# upstream call, so utilization = upstream calls x upstream latency / (time x
+# workers). Counting the calls the stub actually served keeps this right when
+# --cache answers some requests without an upstream call (or retries make
+# several). Anything above the per-request upstream time is queueing.
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+from gemini_stub import start_stub, add_stub_arguments, stub_config
+
+ROUTES = {
+    'chatbot': ('/api/chatbot', {'messages': [{'text': 'How can I lower my blood pressure?'}]}),
+    'nutrition-planner': ('/api/nutrition-planner',
+                          {'age': '45', 'goal': 'lower cholesterol', 'restrictions': 'none', 'riskScore': 0.42}),
+    'stress-coach': ('/api/stress-coach',
+                     {'user_text': "I'm overwhelmed by work deadlines and not sleeping well", 'riskScore': 0.42}),
+}
+
+
+def start_app(stub_url, workers, port, cache):
+    env = dict(os.environ,
+               GEMINI_BASE_URL=stub_url,
+               GEMINI_API_KEY='offline-bench',
+               GENAI_CACHE_SIZE=os.environ.get('GENAI_CACHE_SIZE', '1000') if cache else '0',
+               MONGO_URI=os.environ.get('BENCH_MONGO_URI', 'mongodb://127.0.0.1:1'))
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', 'app:app', '-w', str(workers), '-b', f'127.0.0.1:{port}',
+         '--timeout', '120', '--log-level', 'warning'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError('gunicorn exited during startup')
+        try:
+            requests.get(f'{base_url}/api/debug/genai', timeout=1)
+            return proc, base_url
+        except requests.RequestException:
+            time.sleep(0.5)
+    proc.terminate()
+    raise RuntimeError('gunicorn did not become ready in time')
+
+
+def one_request(session, url, payload, stream):
+    start = time.perf_counter()
+    ttft = None
+    try:
+        if stream:
+            with session.post(url + '?stream=1', json=payload, stream=True, timeout=120) as r:
+                ok = r.status_code == 200
+                for line in r.iter_lines(chunk_size=None, decode_unicode=True):
+                    if line.startswith('event: error'):
+                        ok = False
+                    elif line.startswith('data:') and ttft is None:
+                        ttft = time.perf_counter() - start
+        else:
+            r = session.post(url, json=payload, timeout=120)
+            ok = r.status_code == 200
+    except requests.RequestException:
+        ok = False
+    return time.perf_counter() - start, ttft, ok
+
+
+def run_level(url, payload, concurrency, duration, stream):
+    stop_at = time.perf_counter() + duration
+    results, lock = [], threading.Lock()
+
+    def client():
+        session = requests.Session()
+        while time.perf_counter() < stop_at:
+            outcome = one_request(session, url, payload, stream)
+            with lock:
+                results.append(outcome)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(client)
+    return results, time.perf_counter() - started
+
+
+def stub_snapshot(stats, stub_url):
+    if stats is not None:
+        return stats.snapshot()
+    if stub_url:
+        return requests.get(stub_url.rstrip('/') + '/_stats', timeout=5).json()
+    return None
+
+
+def summarize(route, concurrency, results, elapsed, workers, upstream):
+    latencies = np.array([r[0] for r in results]) * 1000.0
+    ttfts = np.array([r[1] for r in results if r[1] is not None]) * 1000.0
+    errors = sum(1 for r in results if not r[2])
+    rps = len(results) / elapsed
+    row = {
+        'route': route,
+        'concurrency': concurrency,
+        'requests': len(results),
+        'rps': rps,
+        'error_rate': errors / len(results) if results else 0.0,
+        'p50_ms': float(np.percentile(latencies, 50)) if len(latencies) else None,
+        'p95_ms': float(np.percentile(latencies, 95)) if len(latencies) else None,
+        'p99_ms': float(np.percentile(latencies, 99)) if len(latencies) else None,
+        'ttft_p50_ms': float(np.percentile(ttfts, 50)) if len(ttfts) else None,
+        'ttft_p95_ms': float(np.percentile(ttfts, 95)) if len(ttfts) else None,
+    }
+    if upstream is not None and upstream['requests']:
+        upstream_ms = upstream['avg_latency_ms']
+        busy_ms = upstream['requests'] * upstream_ms
+        row['upstream_ms'] = upstream_ms
+        row['upstream_calls_per_request'] = upstream['requests'] / len(results) if results else None
+        row['worker_utilization'] = busy_ms / 1000.0 / elapsed / workers
+        row['queue_ms'] = max(0.0, float(latencies.mean()) - busy_ms / len(results)) if len(latencies) else None
+    return row
+
+
+def print_row(row):
+    ttft = f" ttft p50={row['ttft_p50_ms']:7.1f}ms" if row['ttft_p50_ms'] is not None else ''
+    saturation = ''
+    if 'worker_utilization' in row:
+        saturation = (f" workers {row['worker_utilization'] * 100:5.1f}% busy, queue {row['queue_ms']:7.1f}ms, "
+                      f"{row['upstream_calls_per_request']:.2f} upstream calls/req")
+    print(f"  {row['route']:<18} c={row['concurrency']:<3} {row['rps']:7.2f} req/s "
+          f"p50={row['p50_ms']:7.1f}ms p95={row['p95_ms']:7.1f}ms p99={row['p99_ms']:7.1f}ms "
+          f"err={row['error_rate'] * 100:4.1f}%{ttft}{saturation}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='GenAI route load benchmark (offline)')
+    parser.add_argument('--base-url', help='benchmark an already running app instead of starting one')
+    parser.add_argument('--stub-url', help='stats URL root of an already running stub (for saturation)')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers (started or existing)')
+    parser.add_argument('--port', type=int, default=5099)
+    parser.add_argument('--routes', nargs='+', choices=sorted(ROUTES), default=sorted(ROUTES))
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds per level')
+    parser.add_argument('--stream', action='store_true', help='use the SSE mode and report time-to-first-token')
+    parser.add_argument('--cache', action='store_true', help='leave the GenAI response cache on')
+    parser.add_argument('--json', help='write the results to this file')
+    parser.add_argument('--max-error-rate', type=float, help='exit 1 if any level exceeds this error rate')
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    stub_stats, app_proc = None, None
+    if args.base_url:
+        base_url = args.base_url.rstrip('/')
+    else:
+        _, stub_url, stub_stats = start_stub(**stub_config(args))
+        app_proc, base_url = start_app(stub_url, args.workers, args.port, args.cache)
+
+    rows = []
+    try:
+        print(f"{base_url}: {args.workers} workers, stub {args.dist} median {args.latency_ms:.0f}ms, "
+              f"error rate {args.error_rate:.0%}, {'streaming' if args.stream else 'JSON'} mode")
+        for route in args.routes:
+            path, payload = ROUTES[route]
+            for concurrency in args.concurrency:
+                before = stub_snapshot(stub_stats, args.stub_url)
+                results, elapsed = run_level(base_url + path, payload, concurrency, args.duration, args.stream)
+                after = stub_snapshot(stub_stats, args.stub_url)
+                upstream = None
+                if before is not None and after is not None:
+                    count = after['requests'] - before['requests']
+                    total = after['avg_latency_ms'] * after['requests'] - before['avg_latency_ms'] * before['requests']
+                    upstream = {'requests': count, 'avg_latency_ms': total / count if count else 0.0}
+                row = summarize(route, concurrency, results, elapsed, args.workers, upstream)
+                rows.append(row)
+                print_row(row)
+    finally:
+        if app_proc is not None:
+            app_proc.terminate()
+            app_proc.wait(timeout=30)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'config': vars(args), 'results': rows}, f, indent=2)
+    if args.max_error_rate is not None and any(row['error_rate'] > args.max_error_rate for row in rows):
+        print(f"❌ Error rate above {args.max_error_rate:.1%}")
+        sys.exit(1)
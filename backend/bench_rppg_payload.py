@@ -0,0 +1,59 @@
+# backend/bench_rppg_payload.py
+#
+# Compares the JSON list format for /api/rppg with the binary float32 and
+# base64-in-JSON formats: payload size and time to get from request bytes to
+# NumPy RGB arrays. Run from the backend folder:
+#   python bench_rppg_payload.py
+
+import json
+import time
+import numpy as np
+import rppg_payload
+
+ROUNDS = 200
+FPS = 30.0
+
+def timed(fn, rounds=ROUNDS):
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return np.percentile(timings, 50)
+
+def parse_json_lists(body):
+    data = json.loads(body)
+    return (np.array(data['r'], dtype=float),
+            np.array(data['g'], dtype=float),
+            np.array(data['b'], dtype=float))
+
+def parse_binary(body):
+    rgb, _ = rppg_payload.decode_binary(body)
+    return rgb[:, 0], rgb[:, 1], rgb[:, 2]
+
+def parse_base64(body):
+    rgb = rppg_payload.decode_base64(json.loads(body)['rgb_b64'])
+    return rgb[:, 0], rgb[:, 1], rgb[:, 2]
+
+def run(seconds):
+    n = int(seconds * FPS)
+    rng = np.random.default_rng(0)
+    # Mean ROI intensities, like RPPGHeartRate.js sends (non-round floats)
+    r, g, b = (rng.uniform(60, 200, n) for _ in range(3))
+
+    bodies = {
+        'json lists': (json.dumps({'r': r.tolist(), 'g': g.tolist(), 'b': b.tolist(), 'fps': FPS}).encode(), parse_json_lists),
+        'binary f32': (rppg_payload.encode_binary(r, g, b, FPS), parse_binary),
+        'base64 json': (json.dumps({'rgb_b64': rppg_payload.encode_base64(r, g, b), 'fps': FPS}).encode(), parse_base64),
+    }
+    print(f"{seconds}s @ {FPS:.0f} fps ({n} samples)")
+    base_size = len(bodies['json lists'][0])
+    base_time = None
+    for name, (body, parse) in bodies.items():
+        ms = timed(lambda: parse(body))
+        base_time = base_time or ms
+        print(f"  {name:<12} {len(body) / 1024:8.1f} KiB ({len(body) / base_size:5.1%})  parse p50 {ms:7.3f} ms ({base_time / ms:5.1f}x)")
+
+if __name__ == '__main__':
+    for seconds in (15, 60):
+        run(seconds)
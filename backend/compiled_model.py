@@ -0,0 +1,300 @@
+# backend/compiled_model.py
+#
+# Pandas-free inference for our RandomForest pipelines.
+#
+# The saved pipelines are all the same shape:
+#   ColumnTransformer(StandardScaler on numeric cols, OneHotEncoder on categorical cols)
+#   -> RandomForestClassifier
+# compile_pipeline() flattens that into plain NumPy arrays (scaler means/scales,
+# a category -> column lookup, and every tree's nodes concatenated together) so a
+# prediction is a handful of vectorized array ops instead of a DataFrame build,
+# a ColumnTransformer pass and 100 sklearn estimator calls.
+#
+# The arithmetic mirrors sklearn step for step (float64 scaling, float32 tree
+# input, trees summed in estimator order) so probabilities match predict_proba
+# exactly, not just approximately.
+#
+# save_compiled() / load_saved() store a compiled runtime as one uncompressed
+# .npy file per array, which load_saved() memory-maps read-only. Every worker
+# that maps the same files shares the same page-cache pages for the tree
+# arrays instead of holding its own copy. (Unpickled sklearn trees can't be
+# shared this way: Tree.__setstate__ copies its node arrays into fresh memory.)
+
+import json
+import os
+import shutil
+import tempfile
+
+import joblib
+import numpy as np
+
+
+class CompileError(ValueError):
+    """Raised when a pipeline uses a feature this runtime does not reproduce."""
+
+
+# Arrays written as .npy files by save_compiled(); mean/scale may be None
+ARRAY_FIELDS = ('mean', 'scale', 'left', 'right', 'feature', 'threshold', 'leaf_proba', 'roots')
+FORMAT_VERSION = 1
+
+
+class CompiledPipeline:
+    def __init__(self, numeric_features, categorical_features, mean, scale,
+                 category_lookup, n_model_features, classes, left, right,
+                 feature, threshold, leaf_proba, roots, max_depth):
+        self.numeric_features = list(numeric_features)
+        self.categorical_features = list(categorical_features)
+        self.feature_names = self.numeric_features + self.categorical_features
+        self.mean = mean
+        self.scale = scale
+        # One dict per categorical feature: category value -> encoded column index
+        self.category_lookup = category_lookup
+        self.n_model_features = n_model_features
+        self.classes = classes
+        # Flat node arrays for all trees; leaves point at themselves
+        self.left = left
+        self.right = right
+        self.feature = feature
+        self.threshold = threshold
+        self.leaf_proba = leaf_proba
+        self.roots = roots
+        self.max_depth = max_depth
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    # --- Encoding ---
+    def encode_numeric(self, values):
+        """Scale a (n, n_numeric) float array the same way StandardScaler does."""
+        X = np.array(values, dtype=np.float64, ndmin=2)
+        if X.shape[1] != len(self.numeric_features):
+            raise ValueError(f'Expected {len(self.numeric_features)} numeric columns, got {X.shape[1]}')
+        if not np.isfinite(X).all():
+            raise ValueError('Numeric features must be finite numbers')
+        if self.mean is not None:
+            X -= self.mean
+        if self.scale is not None:
+            X /= self.scale
+        return X
+
+    def encode_records(self, records):
+        """Turn a list of row dicts into the float32 matrix the trees consume."""
+        n = len(records)
+        numeric = [[row[col] for col in self.numeric_features] for row in records]
+        X = np.zeros((n, self.n_model_features), dtype=np.float64)
+        X[:, :len(self.numeric_features)] = self.encode_numeric(numeric).reshape(n, -1)
+        for i, row in enumerate(records):
+            for col, lookup in zip(self.categorical_features, self.category_lookup):
+                # Unknown categories are ignored (all zeros), like handle_unknown='ignore'
+                index = lookup.get(_category_key(row[col]))
+                if index is not None:
+                    X[i, index] = 1.0
+        return X.astype(np.float32)
+
+    # --- Inference ---
+    def predict_proba(self, X):
+        """Class probabilities for an already-encoded (n, n_model_features) array."""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        rows = np.arange(X.shape[0])[:, np.newaxis]
+        nodes = np.broadcast_to(self.roots, (X.shape[0], self.n_trees))
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        # (n_trees, n, n_classes); summing over axis 0 adds trees one after
+        # another in estimator order, which is what sklearn's forest does
+        per_tree = np.ascontiguousarray(self.leaf_proba[nodes].transpose(1, 0, 2))
+        proba = np.add.reduce(per_tree, axis=0)
+        proba /= self.n_trees
+        return proba
+
+    def predict_proba_records(self, records):
+        return self.predict_proba(self.encode_records(records))
+
+    def predict_records(self, records):
+        return self.classes[np.argmax(self.predict_proba_records(records), axis=1)]
+
+    # --- Verification ---
+    def self_check(self, pipeline, n_rows=32, seed=0):
+        """Compare against the source pipeline on synthetic rows; True when identical."""
+        import pandas as pd
+
+        rng = np.random.default_rng(seed)
+        records = []
+        for _ in range(n_rows):
+            row = {}
+            for i, col in enumerate(self.numeric_features):
+                mean = self.mean[i] if self.mean is not None else 0.0
+                scale = self.scale[i] if self.scale is not None else 1.0
+                row[col] = float(mean + scale * rng.standard_normal())
+            for col, lookup in zip(self.categorical_features, self.category_lookup):
+                row[col] = list(lookup)[rng.integers(len(lookup))]
+            records.append(row)
+        expected = pipeline.predict_proba(pd.DataFrame(records, columns=self.feature_names))
+        return bool(np.array_equal(expected, self.predict_proba_records(records)))
+
+
+def _category_key(value):
+    # JSON numbers for numeric categories arrive as int or float; both hash alike
+    try:
+        hash(value)
+    except TypeError:
+        return None
+    return value
+
+
+def compile_pipeline(pipeline):
+    """Flatten a fitted preprocessor + RandomForestClassifier pipeline."""
+    try:
+        preprocessor = pipeline.named_steps['preprocessor']
+        forest = pipeline.named_steps['classifier']
+    except (AttributeError, KeyError):
+        raise CompileError('Expected a Pipeline with "preprocessor" and "classifier" steps')
+
+    transformers = {name: (trans, cols) for name, trans, cols in preprocessor.transformers_}
+    if set(transformers) - {'num', 'cat', 'remainder'}:
+        raise CompileError(f'Unsupported transformers: {sorted(transformers)}')
+    remainder = transformers.get('remainder')
+    if remainder is not None and len(remainder[1]) > 0:
+        raise CompileError('Remainder columns are not supported')
+
+    scaler, numeric_features = transformers['num']
+    encoder, categorical_features = transformers['cat']
+    if getattr(encoder, 'drop_idx_', None) is not None:
+        raise CompileError('OneHotEncoder(drop=...) is not supported')
+    if getattr(encoder, 'infrequent_categories_', None) is not None and \
+            any(c is not None for c in encoder.infrequent_categories_):
+        raise CompileError('Infrequent category grouping is not supported')
+    if encoder.handle_unknown != 'ignore':
+        raise CompileError('Only OneHotEncoder(handle_unknown="ignore") is supported')
+
+    mean = np.array(scaler.mean_, dtype=np.float64) if scaler.with_mean else None
+    scale = np.array(scaler.scale_, dtype=np.float64) if scaler.with_std else None
+
+    offset = preprocessor.output_indices_['cat'].start
+    category_lookup = []
+    for categories in encoder.categories_:
+        lookup = {}
+        for value in categories.tolist():
+            lookup[value] = offset
+            offset += 1
+        category_lookup.append(lookup)
+    if offset != forest.n_features_in_:
+        raise CompileError('Encoded width does not match the classifier input')
+
+    if getattr(forest, 'n_outputs_', 1) != 1:
+        raise CompileError('Multi-output forests are not supported')
+
+    left, right, feature, threshold, leaf_proba, roots = [], [], [], [], [], []
+    max_depth = 0
+    base = 0
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        n_nodes = tree.node_count
+        node_ids = np.arange(n_nodes)
+        is_leaf = tree.children_left == -1
+        left.append(np.where(is_leaf, node_ids, tree.children_left) + base)
+        right.append(np.where(is_leaf, node_ids, tree.children_right) + base)
+        feature.append(np.where(is_leaf, 0, tree.feature))
+        threshold.append(np.where(is_leaf, np.inf, tree.threshold))
+        values = tree.value[:, 0, :forest.n_classes_].astype(np.float64)
+        sums = values.sum(axis=1, keepdims=True)
+        if not np.allclose(sums, 1.0):
+            # Older sklearn stores raw counts and normalizes in predict_proba
+            sums[sums == 0.0] = 1.0
+            values = values / sums
+        leaf_proba.append(values)
+        roots.append(base)
+        max_depth = max(max_depth, tree.max_depth)
+        base += n_nodes
+
+    return CompiledPipeline(
+        numeric_features=numeric_features,
+        categorical_features=categorical_features,
+        mean=mean,
+        scale=scale,
+        category_lookup=category_lookup,
+        n_model_features=forest.n_features_in_,
+        classes=np.asarray(forest.classes_),
+        left=np.concatenate(left).astype(np.intp),
+        right=np.concatenate(right).astype(np.intp),
+        feature=np.concatenate(feature).astype(np.intp),
+        threshold=np.concatenate(threshold).astype(np.float64),
+        leaf_proba=np.concatenate(leaf_proba),
+        roots=np.array(roots, dtype=np.intp),
+        max_depth=max_depth,
+    )
+
+
+def load_compiled(path):
+    """Load a joblib pipeline and compile it. Returns (pipeline, compiled)."""
+    pipeline = joblib.load(path)
+    return pipeline, compile_pipeline(pipeline)
+
+
+def save_compiled(compiled, directory, source_hash=None):
+    """Write compiled to directory as .npy arrays plus meta.json, replacing it atomically."""
+    parent = os.path.dirname(os.path.abspath(directory))
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix='.tmp-', dir=parent)
+    try:
+        arrays = []
+        for name in ARRAY_FIELDS:
+            value = getattr(compiled, name)
+            if value is not None:
+                np.save(os.path.join(tmp, f'{name}.npy'), np.ascontiguousarray(value), allow_pickle=False)
+                arrays.append(name)
+        meta = {
+            'format': FORMAT_VERSION,
+            'source_hash': source_hash,
+            'numeric_features': compiled.numeric_features,
+            'categorical_features': compiled.categorical_features,
+            # Pairs, not a dict: categories may be numbers and JSON keys are strings
+            'category_lookup': [[[value, index] for value, index in lookup.items()]
+                                for lookup in compiled.category_lookup],
+            'n_model_features': int(compiled.n_model_features),
+            'classes': compiled.classes.tolist(),
+            'classes_dtype': compiled.classes.dtype.str if compiled.classes.dtype != object else 'object',
+            'max_depth': int(compiled.max_depth),
+            'arrays': arrays,
+        }
+        with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+        if os.path.isdir(directory):
+            shutil.rmtree(directory, ignore_errors=True)
+        try:
+            os.replace(tmp, directory)
+        except OSError:
+            # Another worker saved the same runtime first; keep theirs
+            if not os.path.isdir(directory):
+                raise
+            shutil.rmtree(tmp, ignore_errors=True)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+
+def load_saved(directory, source_hash=None, mmap_mode='r'):
+    """CompiledPipeline saved by save_compiled(), or None if missing or for another source_hash."""
+    try:
+        with open(os.path.join(directory, 'meta.json')) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get('format') != FORMAT_VERSION or (source_hash is not None and meta.get('source_hash') != source_hash):
+        return None
+    arrays = dict.fromkeys(ARRAY_FIELDS)
+    for name in meta['arrays']:
+        # np.asarray drops the memmap subclass (cheaper indexing) but keeps the mapped buffer
+        arrays[name] = np.asarray(np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mmap_mode))
+    return CompiledPipeline(
+        numeric_features=meta['numeric_features'],
+        categorical_features=meta['categorical_features'],
+        category_lookup=[{value: index for value, index in pairs} for pairs in meta['category_lookup']],
+        n_model_features=meta['n_model_features'],
+        classes=np.array(meta['classes'], dtype=meta['classes_dtype']),
+        max_depth=meta['max_depth'],
+        **arrays,
+    )
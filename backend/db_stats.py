@@ -0,0 +1,120 @@
+# backend/db_stats.py
+#
+# Database statistics for /api/debug/db, served from a snapshot.
+#
+# Counting documents is a collection scan, and monitoring polls this endpoint
+# constantly. A background thread refreshes the snapshot every `interval`
+# seconds instead, using estimated_document_count() (collection metadata)
+# unless exact counts are asked for. Each snapshot also carries collStats
+# sizes and $indexStats usage for capacity planning.
+
+import os
+import threading
+import time
+
+TRACKED_COLLECTIONS = ('users', 'heart_predictions', 'stress_predictions')
+COUNT_KEYS = {'users': 'user_count', 'heart_predictions': 'heart_count', 'stress_predictions': 'stress_count'}
+
+
+class DBStatsSnapshot:
+    def __init__(self, get_db, interval=30.0, exact_counts=False):
+        # get_db is called on every refresh so a reconnect is picked up
+        self.get_db = get_db
+        self.interval = interval
+        self.exact_counts = exact_counts
+        self._snapshot = None
+        self._taken_at = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self.refreshes = 0
+        self.last_error = None
+
+    def get(self):
+        """Latest snapshot plus its age; refreshes synchronously the first time."""
+        self._ensure_started()
+        with self._lock:
+            snapshot, taken_at = self._snapshot, self._taken_at
+        if snapshot is None:
+            self.refresh()
+            with self._lock:
+                snapshot, taken_at = self._snapshot, self._taken_at
+        if snapshot is None:
+            raise RuntimeError(self.last_error or 'No database statistics available yet')
+        return {
+            **snapshot,
+            'snapshot_age_seconds': round(time.time() - taken_at, 3),
+            'refresh_interval_seconds': self.interval,
+        }
+
+    def refresh(self):
+        db = self.get_db()
+        if db is None:
+            return
+        try:
+            snapshot = collect_stats(db, self.exact_counts)
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"⚠️ DB stats refresh failed: {e}")
+            return
+        with self._lock:
+            self._snapshot = snapshot
+            self._taken_at = time.time()
+            self.refreshes += 1
+            self.last_error = None
+
+    def _ensure_started(self):
+        pid = os.getpid()
+        if self._thread is not None and self._pid == pid:
+            return
+        with self._lock:
+            if self._thread is None or self._pid != pid:
+                self._pid = pid
+                self._thread = threading.Thread(target=self._run, name='db-stats', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.refresh()
+
+
+def collect_stats(db, exact_counts=False):
+    stats = {
+        'db_name': db.name,
+        'collections': db.list_collection_names(),
+        'counts': 'exact' if exact_counts else 'estimated',
+        'collection_stats': {},
+    }
+    for name in TRACKED_COLLECTIONS:
+        collection = db[name]
+        count = collection.count_documents({}) if exact_counts else collection.estimated_document_count()
+        stats[COUNT_KEYS[name]] = count
+        stats['collection_stats'][name] = collection_details(db, collection)
+    return stats
+
+
+def collection_details(db, collection):
+    details = {}
+    try:
+        raw = db.command('collStats', collection.name)
+        details.update({
+            'size_bytes': raw.get('size'),
+            'storage_size_bytes': raw.get('storageSize'),
+            'avg_document_bytes': raw.get('avgObjSize'),
+            'total_index_size_bytes': raw.get('totalIndexSize'),
+            'index_sizes_bytes': raw.get('indexSizes', {}),
+        })
+    except Exception as e:
+        details['size_error'] = str(e)
+    try:
+        details['index_usage'] = {
+            index['name']: {
+                'ops': index.get('accesses', {}).get('ops'),
+                'since': index.get('accesses', {}).get('since'),
+            }
+            for index in collection.aggregate([{'$indexStats': {}}])
+        }
+    except Exception as e:
+        details['index_usage_error'] = str(e)
+    return details
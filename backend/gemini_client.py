@@ -0,0 +1,225 @@
+# backend/gemini_client.py
+#
+# One shared Gemini client for the GenAI routes (chatbot, nutrition planner,
+# stress coach).
+#
+# - A pooled keep-alive requests.Session, so calls reuse TCP+TLS connections
+#   instead of paying a fresh handshake each time. One session per process
+#   (sessions are not carried across a gunicorn fork).
+# - Connect/read timeouts, so a hung upstream can't hold a worker forever.
+# - Retries with jittered exponential backoff on 429/5xx and connection
+#   errors, honouring Retry-After when the upstream sends it.
+# - Per-call latency and token usage (usageMetadata) counters.
+# - generate_stream() relays streamGenerateContent (SSE) chunks as they
+#   arrive; time-to-first-token is tracked separately.
+#
+# base_url is configurable so the client can be pointed at a local stub.
+
+import json
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class GeminiError(RuntimeError):
+    """The upstream call failed (after retries) or returned no text."""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+def response_text(result):
+    """First candidate's text from a generateContent response ('' if none)."""
+    return result.get('candidates', [{}])[0].get('content', {}).get('parts', [{}])[0].get('text', '')
+
+
+class GeminiClient:
+    def __init__(self, api_key=None, base_url='https://generativelanguage.googleapis.com/v1beta',
+                 model='gemini-2.5-flash', connect_timeout=3.05, read_timeout=30.0,
+                 max_retries=2, backoff_base=0.25, backoff_max=4.0, pool_size=10, verify_tls=True):
+        # api_key=None reads GEMINI_API_KEY at call time, like the routes used to
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.model = model
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.pool_size = pool_size
+        self.verify_tls = verify_tls
+
+        self._lock = threading.Lock()
+        self._session = None
+        self._pid = None
+
+        # Metrics
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_ms = 0.0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self.total_tokens = 0
+        self.streams = 0
+        self.total_ttft_ms = 0.0
+        self.max_ttft_ms = 0.0
+
+    # --- Public API ---
+    def generate(self, prompt, system_prompt=None):
+        """Text of the model's answer to prompt. Raises GeminiError."""
+        text = response_text(self.generate_content(self.build_payload(prompt, system_prompt)))
+        if not text:
+            raise GeminiError("No text found in API response")
+        return text
+
+    def generate_content(self, payload):
+        """POST payload to :generateContent and return the decoded JSON."""
+        started = time.perf_counter()
+        try:
+            response = self._post('generateContent', payload)
+            result = response.json()
+        except Exception:
+            self._record(started, error=True)
+            raise
+        self._record(started, usage=result.get('usageMetadata'))
+        return result
+
+    def generate_stream(self, prompt, system_prompt=None):
+        """Yield text chunks of the answer as Gemini produces them. Raises GeminiError.
+
+        Retries only happen before the stream starts; a failure mid-stream is
+        raised to the caller, who has already relayed part of the answer.
+        """
+        started = time.perf_counter()
+        ttft_ms, usage, completed = None, None, False
+        try:
+            response = self._post('streamGenerateContent', self.build_payload(prompt, system_prompt),
+                                  params={'alt': 'sse'}, stream=True)
+            with response:
+                response.encoding = 'utf-8'
+                # chunk_size=None hands over each chunk as soon as it arrives
+                for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+                    if not line.startswith('data:'):
+                        continue
+                    chunk = json.loads(line[5:])
+                    usage = chunk.get('usageMetadata') or usage
+                    text = response_text(chunk)
+                    if not text:
+                        continue
+                    if ttft_ms is None:
+                        ttft_ms = (time.perf_counter() - started) * 1000.0
+                    yield text
+            if ttft_ms is None:
+                raise GeminiError("No text found in API response")
+            completed = True
+        except GeneratorExit:
+            completed = True  # The caller stopped reading (client went away)
+            raise
+        finally:
+            self._record(started, usage=usage, error=not completed, ttft_ms=ttft_ms)
+
+    @staticmethod
+    def build_payload(prompt, system_prompt=None):
+        payload = {"contents": [{"parts": [{"text": prompt}]}]}
+        if system_prompt:
+            payload["systemInstruction"] = {"parts": [{"text": system_prompt}]}
+        return payload
+
+    def stats(self):
+        with self._lock:
+            return {
+                'base_url': self.base_url,
+                'model': self.model,
+                'calls': self.calls,
+                'errors': self.errors,
+                'retries': self.retries,
+                'avg_ms': (self.total_ms / self.calls) if self.calls else 0.0,
+                'max_ms': self.max_ms,
+                'last_ms': self.last_ms,
+                'prompt_tokens': self.prompt_tokens,
+                'output_tokens': self.output_tokens,
+                'total_tokens': self.total_tokens,
+                'streams': self.streams,
+                'avg_ttft_ms': (self.total_ttft_ms / self.streams) if self.streams else 0.0,
+                'max_ttft_ms': self.max_ttft_ms,
+            }
+
+    # --- Internals ---
+    def _url(self, method):
+        return f"{self.base_url}/models/{self.model}:{method}"
+
+    def _headers(self):
+        api_key = self.api_key or os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            raise GeminiError("GEMINI_API_KEY not found")
+        return {'Content-Type': 'application/json', 'x-goog-api-key': api_key}
+
+    def _post(self, method, payload, **kwargs):
+        headers = self._headers()
+        session = self._get_session()
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = session.post(self._url(method), json=payload, headers=headers,
+                                        timeout=self.timeout, verify=self.verify_tls, **kwargs)
+            except requests.ConnectionError as e:
+                # Includes connect timeouts; read timeouts are not retried, since
+                # the upstream may still be generating and a retry doubles the wait
+                if attempt == self.max_retries:
+                    raise GeminiError(f"Gemini unreachable: {e}") from e
+                self._backoff(attempt)
+                continue
+            if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                self._backoff(attempt, response.headers.get('Retry-After'))
+                response.close()
+                continue
+            if response.status_code >= 400:
+                raise GeminiError(f"Gemini returned HTTP {response.status_code}", status=response.status_code)
+            return response
+
+    def _backoff(self, attempt, retry_after=None):
+        with self._lock:
+            self.retries += 1
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))  # full jitter
+        try:
+            delay = max(delay, min(self.backoff_max, float(retry_after)))
+        except (TypeError, ValueError):
+            pass
+        time.sleep(delay)
+
+    def _get_session(self):
+        pid = os.getpid()
+        with self._lock:
+            if self._session is None or self._pid != pid:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self._session = session
+                self._pid = pid
+            return self._session
+
+    def _record(self, started, usage=None, error=False, ttft_ms=None):
+        elapsed = (time.perf_counter() - started) * 1000.0
+        usage = usage or {}
+        with self._lock:
+            self.calls += 1
+            self.errors += int(error)
+            self.total_ms += elapsed
+            self.last_ms = elapsed
+            self.max_ms = max(self.max_ms, elapsed)
+            self.prompt_tokens += usage.get('promptTokenCount', 0)
+            self.output_tokens += usage.get('candidatesTokenCount', 0)
+            self.total_tokens += usage.get('totalTokenCount', 0)
+            if ttft_ms is not None:
+                self.streams += 1
+                self.total_ttft_ms += ttft_ms
+                self.max_ttft_ms = max(self.max_ttft_ms, ttft_ms)
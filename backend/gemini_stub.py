@@ -0,0 +1,232 @@
+# backend/gemini_stub.py
+#
+# A local stand-in for the Gemini API, so the GenAI routes can be run and
+# load-tested offline (no API key, no network). It answers the same
+# generateContent / streamGenerateContent?alt=sse shapes app.py uses, with a
+# configurable latency distribution and error rate. Run from the backend folder:
+#   python gemini_stub.py --port 8089 --latency-ms 800 --dist lognormal
+# then start the app with GEMINI_BASE_URL=http://127.0.0.1:8089/v1beta.
+#
+# GET /_stats returns request counts and served latencies; POST /_reset clears them.
+
+import argparse
+import json
+import math
+import random
+import re
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+ROUTE = re.compile(r'^/v1beta/models/([^/:]+):(generateContent|streamGenerateContent)(\?.*)?$')
+WORDS = ('eat', 'more', 'leafy', 'greens', 'and', 'take', 'a', 'short', 'walk', 'after', 'meals',
+         'breathe', 'slowly', 'for', 'two', 'minutes', 'drink', 'water', 'rest', 'well')
+
+
+class StubConfig:
+    def __init__(self, latency_ms=800.0, dist='lognormal', spread=0.5, error_rate=0.0,
+                 error_status=503, chunks=8, ttft_fraction=0.15, words=120, seed=None):
+        self.latency_ms = latency_ms
+        self.dist = dist
+        self.spread = spread
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.chunks = max(1, chunks)
+        self.ttft_fraction = ttft_fraction
+        self.words = words
+        self.random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample_latency(self):
+        """Seconds for one generation; latency_ms is the median for every dist."""
+        with self._lock:
+            r = self.random
+            if self.dist == 'fixed':
+                ms = self.latency_ms
+            elif self.dist == 'uniform':
+                ms = r.uniform(self.latency_ms * (1 - self.spread), self.latency_ms * (1 + self.spread))
+            elif self.dist == 'normal':
+                ms = r.gauss(self.latency_ms, self.latency_ms * self.spread)
+            else:  # lognormal: a long right tail, like real LLM calls
+                ms = r.lognormvariate(math.log(self.latency_ms), self.spread)
+            return max(0.0, ms) / 1000.0
+
+    def should_fail(self):
+        with self._lock:
+            return self.random.random() < self.error_rate
+
+
+class StubStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.streams = 0
+            self.errors = 0
+            self.served_s = 0.0
+
+    def record(self, seconds, stream=False, error=False):
+        with self._lock:
+            self.requests += 1
+            self.streams += int(stream)
+            self.errors += int(error)
+            self.served_s += seconds
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'streams': self.streams,
+                'errors': self.errors,
+                'avg_latency_ms': (self.served_s / self.requests * 1000.0) if self.requests else 0.0,
+            }
+
+
+def answer_text(config):
+    return ' '.join(WORDS[i % len(WORDS)] for i in range(config.words))
+
+
+def chunk_body(text, prompt_tokens, output_tokens, final):
+    body = {'candidates': [{'content': {'parts': [{'text': text}], 'role': 'model'}}]}
+    if final:
+        body['candidates'][0]['finishReason'] = 'STOP'
+        body['usageMetadata'] = {'promptTokenCount': prompt_tokens, 'candidatesTokenCount': output_tokens,
+                                 'totalTokenCount': prompt_tokens + output_tokens}
+    return body
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real API
+    config = None
+    stats = None
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == '/_stats':
+            return self._json(200, self.stats.snapshot())
+        self._json(404, {'error': {'code': 404, 'message': 'Not found'}})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b''
+        if self.path == '/_reset':
+            self.stats.reset()
+            return self._json(200, {'ok': True})
+        match = ROUTE.match(self.path)
+        if not match:
+            return self._json(404, {'error': {'code': 404, 'message': 'Not found'}})
+        if not self.headers.get('x-goog-api-key'):
+            return self._json(403, {'error': {'code': 403, 'message': 'Missing API key'}})
+        try:
+            payload = json.loads(raw or b'{}')
+            prompt = ' '.join(p.get('text', '') for c in payload['contents'] for p in c['parts'])
+        except (ValueError, KeyError, TypeError):
+            return self._json(400, {'error': {'code': 400, 'message': 'Invalid JSON payload'}})
+
+        stream = match.group(2) == 'streamGenerateContent'
+        latency = self.config.sample_latency()
+        if self.config.should_fail():
+            # Errors come back quickly, as a rate-limited/overloaded upstream would
+            time.sleep(min(latency, 0.05))
+            self.stats.record(min(latency, 0.05), stream=stream, error=True)
+            return self._json(self.config.error_status,
+                              {'error': {'code': self.config.error_status, 'message': 'Stub error'}},
+                              {'Retry-After': '0'})
+
+        text = answer_text(self.config)
+        prompt_tokens, output_tokens = len(prompt.split()), self.config.words
+        started = time.perf_counter()
+        if stream:
+            self._stream(text, latency, prompt_tokens, output_tokens)
+        else:
+            time.sleep(latency)
+            self._json(200, chunk_body(text, prompt_tokens, output_tokens, final=True))
+        self.stats.record(time.perf_counter() - started, stream=stream)
+
+    def _stream(self, text, latency, prompt_tokens, output_tokens):
+        words = text.split(' ')
+        n = self.config.chunks
+        pieces = [' '.join(words[i * len(words) // n:(i + 1) * len(words) // n]) + ' ' for i in range(n)]
+        first_delay = latency * self.config.ttft_fraction
+        rest_delay = (latency - first_delay) / max(1, n - 1)
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        try:
+            for i, piece in enumerate(pieces):
+                time.sleep(first_delay if i == 0 else rest_delay)
+                event = f"data: {json.dumps(chunk_body(piece, prompt_tokens, output_tokens, i == n - 1))}\r\n\r\n"
+                data = event.encode('utf-8')
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+                self.wfile.flush()
+            self.wfile.write(b'0\r\n\r\n')
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client went away mid-stream
+
+    def _json(self, status, body, headers=None):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients dropping idle keep-alive connections (e.g. a worker exiting) is normal
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def start_stub(port=0, host='127.0.0.1', **config):
+    """Start the stub in a background thread; returns (server, base_url, stats)."""
+    handler = type('ConfiguredStubHandler', (StubHandler,), {'config': StubConfig(**config), 'stats': StubStats()})
+    server = StubServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, name='gemini-stub', daemon=True).start()
+    return server, f"http://{host}:{server.server_port}/v1beta", handler.stats
+
+
+def add_stub_arguments(parser):
+    parser.add_argument('--latency-ms', type=float, default=800.0, help='median generation time')
+    parser.add_argument('--dist', choices=('fixed', 'uniform', 'normal', 'lognormal'), default='lognormal')
+    parser.add_argument('--spread', type=float, default=0.5,
+                        help='uniform: +/- fraction, normal: stddev fraction, lognormal: sigma')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of calls that fail')
+    parser.add_argument('--error-status', type=int, default=503)
+    parser.add_argument('--chunks', type=int, default=8, help='SSE chunks per streamed answer')
+    parser.add_argument('--ttft-fraction', type=float, default=0.15,
+                        help='share of the latency spent before the first streamed chunk')
+    parser.add_argument('--words', type=int, default=120, help='words per answer')
+    parser.add_argument('--seed', type=int, default=None)
+
+
+def stub_config(args):
+    return dict(latency_ms=args.latency_ms, dist=args.dist, spread=args.spread, error_rate=args.error_rate,
+                error_status=args.error_status, chunks=args.chunks, ttft_fraction=args.ttft_fraction,
+                words=args.words, seed=args.seed)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Local Gemini API stand-in')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+    server, url, _ = start_stub(args.port, args.host, **stub_config(args))
+    print(f"✅ Gemini stub listening; set GEMINI_BASE_URL={url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
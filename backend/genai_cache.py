@@ -0,0 +1,202 @@
+# backend/genai_cache.py
+#
+# Response cache for GenAI routes whose prompt is fully determined by a few
+# coarse inputs (the nutrition planner, and optionally the stress coach), so
+# many users asking the same thing share one multi-second Gemini generation.
+#
+# - Keys are a hash of model name + normalized system prompt + normalized
+#   prompt (whitespace collapsed, case-folded).
+# - Memory tier: a TTLCache per process.
+# - Disk tier (optional): one JSON file per key in disk_dir, shared by every
+#   worker on the host. Reads touch the file; when the directory grows past
+#   disk_max_bytes the least recently used files are removed.
+# - Singleflight: concurrent misses for the same key wait for one upstream
+#   call instead of each making their own (per process). Streamed answers
+#   use lookup()/store() directly and are not coalesced.
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+from ttl_cache import TTLCache, MISSING
+
+
+def normalize(text):
+    return ' '.join(str(text or '').split()).casefold()
+
+
+def make_key(model, system_prompt, prompt):
+    raw = '\x1f'.join((model, normalize(system_prompt), normalize(prompt)))
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class GenAICache:
+    def __init__(self, maxsize=1000, ttl=86400.0, disk_dir=None, disk_max_bytes=256 * 1024 * 1024,
+                 wait_timeout=120.0):
+        self.memory = TTLCache(maxsize, ttl)
+        self.ttl = ttl
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self.wait_timeout = wait_timeout
+        self._lock = threading.Lock()
+        self._flights = {}
+        self._disk_bytes = None
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+        # Metrics
+        self.disk_hits = 0
+        self.disk_evictions = 0
+        self.coalesced = 0
+        self.generated = 0
+
+    # --- Public API ---
+    def lookup(self, key):
+        """(value, 'memory' | 'disk') for a cached key, or (MISSING, None)."""
+        value = self.memory.get(key)
+        if value is not MISSING:
+            return value, 'memory'
+        value = self._disk_get(key)
+        if value is not MISSING:
+            self.memory.set(key, value)
+            return value, 'disk'
+        return MISSING, None
+
+    def store(self, key, value):
+        self.memory.set(key, value)
+        self._disk_set(key, value)
+
+    def get_or_generate(self, key, generate):
+        """(value, source) for key; source is 'memory', 'disk', 'coalesced' or 'generated'.
+
+        generate() is called at most once per key at a time in this process.
+        Its exceptions reach every caller waiting on it and are not cached.
+        """
+        value, source = self.lookup(key)
+        if value is not MISSING:
+            return value, source
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.coalesced += 1
+        if not leader:
+            if not flight.done.wait(self.wait_timeout):
+                raise TimeoutError('Timed out waiting for an identical GenAI request')
+            if flight.error is not None:
+                raise flight.error
+            return flight.value, 'coalesced'
+
+        try:
+            flight.value = generate()
+            self.store(key, flight.value)
+            with self._lock:
+                self.generated += 1
+            return flight.value, 'generated'
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'memory': self.memory.stats(),
+                'disk_dir': self.disk_dir,
+                'disk_bytes': self._disk_bytes,
+                'disk_max_bytes': self.disk_max_bytes if self.disk_dir else None,
+                'disk_hits': self.disk_hits,
+                'disk_evictions': self.disk_evictions,
+                'in_flight': len(self._flights),
+                'coalesced': self.coalesced,
+                'generated': self.generated,
+            }
+
+    # --- Disk tier ---
+    def _path(self, key):
+        return os.path.join(self.disk_dir, key + '.json')
+
+    def _disk_get(self, key):
+        if not self.disk_dir:
+            return MISSING
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return MISSING
+        if self.ttl is not None and time.time() - entry.get('created', 0) > self.ttl:
+            return MISSING
+        try:
+            os.utime(path)  # mtime is the LRU clock for eviction
+        except OSError:
+            pass
+        with self._lock:
+            self.disk_hits += 1
+        return entry['value']
+
+    def _disk_set(self, key, value):
+        if not self.disk_dir:
+            return
+        data = json.dumps({'created': time.time(), 'value': value}).encode('utf-8')
+        path = self._path(key)
+        tmp = f'{path}.{os.getpid()}.tmp'
+        try:
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)  # readers never see a half-written file
+        except OSError as e:
+            print(f"⚠️ GenAI cache: could not write {path}: {e}")
+            return
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = self._scan()[1]
+            else:
+                self._disk_bytes += len(data)
+            over = self._disk_bytes > self.disk_max_bytes
+        if over:
+            self._evict()
+
+    def _scan(self):
+        files = []
+        for entry in os.scandir(self.disk_dir):
+            if entry.name.endswith('.json'):
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                files.append((st.st_mtime, st.st_size, entry.path))
+        return files, sum(size for _, size, _ in files)
+
+    def _evict(self):
+        # Other workers share the directory, so re-scan rather than trust our count
+        files, total = self._scan()
+        target = self.disk_max_bytes * 0.9
+        evicted = 0
+        for _, size, path in sorted(files):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            evicted += 1
+        with self._lock:
+            self._disk_bytes = total
+            self.disk_evictions += evicted
@@ -0,0 +1,45 @@
+# backend/gunicorn.conf.py
+#
+# Read by gunicorn when started from the backend folder (see Procfile).
+# Workers (WEB_CONCURRENCY) and the bind address (PORT) still come from
+# gunicorn's usual environment variables or the command line.
+#
+# GUNICORN_PRELOAD=1 imports app.py once in the master, so the models are
+# loaded and warmed up before forking and every worker starts out sharing
+# those pages copy-on-write. post_fork then gives each worker its own
+# MongoDB connection (see app.after_fork). Code changes then need a full
+# restart, not a HUP. Best paired with the default STARTUP_MODE=blocking.
+#
+# Prometheus metrics (metrics.py) are written per worker to
+# PROMETHEUS_MULTIPROC_DIR and merged on every /metrics scrape. Unless set
+# explicitly, a fresh temporary directory is used for each server.
+
+import os
+import shutil
+import tempfile
+
+preload_app = os.getenv("GUNICORN_PRELOAD", "0") == "1"
+
+# Must be in the environment before app.py (and prometheus_client) is imported.
+# A directory we pick is new for each server and removed when it exits; one set
+# by hand is the operator's to clear between runs.
+OWN_METRICS_DIR = "PROMETHEUS_MULTIPROC_DIR" not in os.environ
+if OWN_METRICS_DIR:
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="healthprism-metrics-")
+os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+
+def post_fork(server, worker):
+    if server.cfg.preload_app:
+        import app
+        app.after_fork()
+
+
+def child_exit(server, worker):
+    import metrics
+    metrics.mark_process_dead(worker.pid)
+
+
+def on_exit(server):
+    if OWN_METRICS_DIR:
+        shutil.rmtree(os.environ["PROMETHEUS_MULTIPROC_DIR"], ignore_errors=True)
@@ -0,0 +1,126 @@
+# backend/hashing_pool.py
+#
+# Runs bcrypt in a small dedicated process pool so password hashing never
+# burns CPU on the gunicorn worker that also serves predictions.
+#
+# The pool is bounded: at most max_pending hash/check calls may be queued or
+# running at once. Beyond that, calls fail fast with HashingPoolSaturated and
+# the route answers 503 instead of letting a login storm stall the worker.
+# A call that waits longer than timeout also raises HashingPoolSaturated; its
+# job keeps its slot until it actually finishes in the pool.
+# workers=0 runs bcrypt inline (still bounded), which is handy for debugging.
+
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+
+import bcrypt
+
+
+class HashingPoolSaturated(RuntimeError):
+    """Raised when max_pending hashing calls are already in flight."""
+
+
+def _hash(password, rounds):
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+
+
+def _check(password, hashed):
+    return bcrypt.checkpw(password, hashed)
+
+
+def hash_cost(hashed):
+    """Cost factor of a bcrypt hash ("$2b$12$..." -> 12), or None if unparseable."""
+    try:
+        return int(bytes(hashed).split(b'$')[2])
+    except (IndexError, ValueError, TypeError):
+        return None
+
+
+class HashingPool:
+    def __init__(self, workers=2, max_pending=32, rounds=12, timeout=30.0):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.rounds = rounds
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pool_pid = None
+
+        # Metrics
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.in_flight = 0
+        self.total_ms = 0.0
+
+    # --- Public API ---
+    def hash_password(self, password):
+        return self._run(_hash, password.encode('utf-8'), self.rounds)
+
+    def check_password(self, password, hashed):
+        return self._run(_check, password.encode('utf-8'), bytes(hashed))
+
+    def needs_rehash(self, hashed):
+        return hash_cost(hashed) != self.rounds
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'max_pending': self.max_pending,
+                'rounds': self.rounds,
+                'in_flight': self.in_flight,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'timed_out': self.timed_out,
+                'avg_ms': (self.total_ms / self.completed) if self.completed else 0.0,
+            }
+
+    # --- Internals ---
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HashingPoolSaturated('Password hashing is busy, please retry shortly')
+        started = time.perf_counter()
+        with self._lock:
+            self.in_flight += 1
+        if self.workers <= 0:
+            try:
+                return fn(*args)
+            finally:
+                self._finish(started)
+        try:
+            future = self._get_pool().submit(fn, *args)
+        except BaseException:
+            self._finish(started)
+            raise
+        # The slot is freed when the job really ends, not when the caller stops
+        # waiting, so timed-out jobs still count against max_pending
+        future.add_done_callback(lambda _: self._finish(started))
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            with self._lock:
+                self.timed_out += 1
+            raise HashingPoolSaturated('Password hashing is taking too long, please retry shortly')
+
+    def _finish(self, started):
+        elapsed = (time.perf_counter() - started) * 1000.0
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+            self.total_ms += elapsed
+        self._slots.release()
+
+    def _get_pool(self):
+        # One pool per process; never reuse a pool inherited across a fork
+        pid = os.getpid()
+        with self._lock:
+            if self._pool is None or self._pool_pid != pid:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+                self._pool_pid = pid
+            return self._pool
@@ -0,0 +1,312 @@
+# backend/memory_db.py
+#
+# An in-memory stand-in for the MongoDB database, covering the subset of the
+# pymongo API that app.py uses (find/find_one with projections, sort, limit,
+# insert_one/insert_many, update_one with $set, counts, create_index). It is
+# meant for benchmarks and offline runs, not as a general Mongo emulator.
+#
+# Seed it from a file shaped like mock_db.json:
+#   {"users": [...], "heart_predictions": [...], "stress_predictions": [...]}
+# and swap it into the app with install(app_module, db).
+
+import copy
+import re
+import threading
+
+import bson
+from bson.objectid import ObjectId
+from pymongo.errors import DuplicateKeyError, BulkWriteError
+from pymongo.results import InsertOneResult, InsertManyResult, UpdateResult
+
+COLLECTIONS = ('users', 'heart_predictions', 'stress_predictions')
+
+
+# --- Query matching ---
+def _compare(op, value, target):
+    try:
+        if op == '$lt':
+            return value < target
+        if op == '$lte':
+            return value <= target
+        if op == '$gt':
+            return value > target
+        if op == '$gte':
+            return value >= target
+    except TypeError:
+        return False  # Mongo never matches across incomparable types here
+    raise NotImplementedError(f'memory_db does not support {op}')
+
+
+def _match_condition(value, condition):
+    if not isinstance(condition, dict) or not any(k.startswith('$') for k in condition):
+        return value == condition
+    for op, target in condition.items():
+        if op in ('$lt', '$lte', '$gt', '$gte'):
+            if value is None or not _compare(op, value, target):
+                return False
+        elif op == '$ne':
+            if value == target:
+                return False
+        elif op == '$in':
+            if value not in target:
+                return False
+        elif op == '$exists':
+            if (value is not None) != bool(target):
+                return False
+        elif op == '$regex':
+            flags = re.IGNORECASE if 'i' in condition.get('$options', '') else 0
+            if not isinstance(value, str) or not re.search(target, value, flags):
+                return False
+        elif op == '$options':
+            continue
+        else:
+            raise NotImplementedError(f'memory_db does not support {op}')
+    return True
+
+
+def matches(document, query):
+    for key, condition in query.items():
+        if key == '$or':
+            if not any(matches(document, sub) for sub in condition):
+                return False
+        elif key == '$and':
+            if not all(matches(document, sub) for sub in condition):
+                return False
+        elif not _match_condition(document.get(key), condition):
+            return False
+    return True
+
+
+def project(document, projection):
+    if not projection:
+        return copy.deepcopy(document)
+    include = {k for k, v in projection.items() if v and k != '_id'}
+    if include:
+        out = {k: copy.deepcopy(document[k]) for k in include if k in document}
+        if projection.get('_id', 1) and '_id' in document:
+            out['_id'] = document['_id']
+        return out
+    excluded = {k for k, v in projection.items() if not v}
+    return {k: copy.deepcopy(v) for k, v in document.items() if k not in excluded}
+
+
+def _sort_key(document, field):
+    value = document.get(field)
+    return (value is not None, value)  # missing fields sort first, as in Mongo
+
+
+# --- Cursor ---
+class MemoryCursor:
+    def __init__(self, collection, query, projection):
+        self._collection = collection
+        self._query = query
+        self._projection = projection
+        self._sort = []
+        self._limit = 0
+        self._results = None
+
+    def sort(self, key_or_list, direction=None):
+        self._sort = [(key_or_list, direction or 1)] if isinstance(key_or_list, str) else list(key_or_list)
+        return self
+
+    def limit(self, limit):
+        self._limit = limit
+        return self
+
+    def batch_size(self, size):
+        return self
+
+    def close(self):
+        self._results = iter(())
+
+    def __iter__(self):
+        if self._results is None:
+            self._results = iter(self._execute())
+        return self._results
+
+    def __next__(self):
+        return next(iter(self))
+
+    def _execute(self):
+        docs = self._collection._scan(self._query)
+        for field, direction in reversed(self._sort):
+            docs.sort(key=lambda d: _sort_key(d, field), reverse=direction < 0)
+        if self._limit:
+            docs = docs[:self._limit]
+        return [project(d, self._projection) for d in docs]
+
+
+# --- Collection ---
+class MemoryCollection:
+    def __init__(self, database, name):
+        self.database = database
+        self.name = name
+        self._docs = {}      # _id -> document, in insertion order
+        self._indexes = {}   # index name -> key list
+        self._by_field = {}  # field -> {value: [_id, ...]} for each index's leading field
+        self._lock = threading.RLock()
+
+    # Writes
+    def insert_one(self, document):
+        with self._lock:
+            self._insert(document)
+        return InsertOneResult(document['_id'], True)
+
+    def insert_many(self, documents, ordered=True):
+        inserted, errors = [], []
+        with self._lock:
+            for i, document in enumerate(documents):
+                try:
+                    self._insert(document)
+                    inserted.append(document['_id'])
+                except DuplicateKeyError as e:
+                    errors.append({'index': i, 'code': 11000, 'errmsg': str(e)})
+                    if ordered:
+                        break
+        if errors:
+            raise BulkWriteError({'writeErrors': errors, 'nInserted': len(inserted)})
+        return InsertManyResult(inserted, True)
+
+    def update_one(self, query, update):
+        with self._lock:
+            for document in self._scan(query):
+                old = {field: document.get(field) for field in self._by_field}
+                for op, fields in update.items():
+                    if op != '$set':
+                        raise NotImplementedError(f'memory_db does not support {op}')
+                    document.update(copy.deepcopy(fields))
+                self._reindex(document, old)
+                return UpdateResult({'n': 1, 'nModified': 1}, True)
+        return UpdateResult({'n': 0, 'nModified': 0}, True)
+
+    # Reads
+    def find(self, query=None, projection=None):
+        return MemoryCursor(self, query or {}, projection)
+
+    def find_one(self, query=None, projection=None):
+        for document in self.find(query, projection).limit(1):
+            return document
+        return None
+
+    def count_documents(self, query):
+        return len(self._scan(query))
+
+    def estimated_document_count(self):
+        return len(self._docs)
+
+    def create_index(self, keys, name=None, **kwargs):
+        keys = [(keys, 1)] if isinstance(keys, str) else list(keys)
+        name = name or '_'.join(f'{field}_{direction}' for field, direction in keys)
+        with self._lock:
+            self._indexes[name] = keys
+            field = keys[0][0]
+            if field not in self._by_field:
+                self._by_field[field] = {}
+                for document in self._docs.values():
+                    self._by_field[field].setdefault(self._index_value(document.get(field)), []).append(document['_id'])
+        return name
+
+    def index_information(self):
+        return {'_id_': {'key': [('_id', 1)]}, **{n: {'key': k} for n, k in self._indexes.items()}}
+
+    def aggregate(self, pipeline):
+        raise NotImplementedError('memory_db does not support aggregation')
+
+    def byte_size(self):
+        return sum(len(bson.encode(d)) for d in self._docs.values())
+
+    # Internals
+    @staticmethod
+    def _index_value(value):
+        return value if isinstance(value, (str, int, float, bool, ObjectId, type(None))) else repr(value)
+
+    def _insert(self, document):
+        document.setdefault('_id', ObjectId())
+        if document['_id'] in self._docs:
+            raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} _id: {document['_id']}")
+        stored = copy.deepcopy(document)
+        self._docs[stored['_id']] = stored
+        for field, index in self._by_field.items():
+            index.setdefault(self._index_value(stored.get(field)), []).append(stored['_id'])
+
+    def _reindex(self, document, old):
+        for field, index in self._by_field.items():
+            if old[field] != document.get(field):
+                index[self._index_value(old[field])].remove(document['_id'])
+                index.setdefault(self._index_value(document.get(field)), []).append(document['_id'])
+
+    def _scan(self, query):
+        with self._lock:
+            if isinstance(query.get('_id'), ObjectId):
+                candidates = [self._docs[query['_id']]] if query['_id'] in self._docs else []
+            else:
+                candidates = None
+                for field, index in self._by_field.items():
+                    value = query.get(field)
+                    if value is not None and not isinstance(value, dict):
+                        candidates = [self._docs[i] for i in index.get(self._index_value(value), [])]
+                        break
+                if candidates is None:
+                    candidates = list(self._docs.values())
+            return [d for d in candidates if matches(d, query)]
+
+
+# --- Database ---
+class MemoryDatabase:
+    def __init__(self, name='HealthPrism'):
+        self.name = name
+        self._collections = {}
+        for collection in COLLECTIONS:
+            self[collection].create_index('email' if collection == 'users' else 'user_id')
+
+    def __getitem__(self, name):
+        if name not in self._collections:
+            self._collections[name] = MemoryCollection(self, name)
+        return self._collections[name]
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return self[name]
+
+    def list_collection_names(self):
+        return [name for name, c in self._collections.items() if c.estimated_document_count()]
+
+    def command(self, name, *args):
+        if name in ('ismaster', 'ping'):
+            return {'ok': 1.0}
+        if name == 'collStats':
+            collection = self[args[0]]
+            size = collection.byte_size()
+            count = collection.estimated_document_count()
+            return {'ok': 1.0, 'size': size, 'storageSize': size, 'count': count,
+                    'avgObjSize': size // count if count else 0, 'totalIndexSize': 0, 'indexSizes': {}}
+        raise NotImplementedError(f'memory_db does not support the {name} command')
+
+    @classmethod
+    def from_json(cls, path, name='HealthPrism'):
+        """Database seeded from a mock_db.json-shaped file (extended JSON is understood)."""
+        from bson import json_util
+        with open(path) as f:
+            data = json_util.loads(f.read())
+        db = cls(name)
+        for collection, documents in data.items():
+            if documents:
+                db[collection].insert_many(documents)
+        return db
+
+    def to_json(self, path):
+        from bson import json_util
+        with open(path, 'w') as f:
+            f.write(json_util.dumps({n: list(c._docs.values()) for n, c in self._collections.items()}, indent=2))
+
+
+def install(app_module, db):
+    """Point app.py's database globals at db (a MemoryDatabase)."""
+    app_module.db = db
+    app_module.users_collection = db.users
+    app_module.heart_predictions_collection = db.heart_predictions
+    app_module.stress_predictions_collection = db.stress_predictions
+    for collection in (db.heart_predictions, db.stress_predictions):
+        collection.create_index([('user_id', 1), ('timestamp', -1), ('_id', -1)], name='user_id_timestamp_id')
+    return db
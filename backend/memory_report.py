@@ -0,0 +1,143 @@
+# backend/memory_report.py
+#
+# Per-process memory split into unique (private) and shared pages, read from
+# /proc/<pid>/smaps_rollup (Linux only). app.py serves the current worker's
+# numbers at GET /api/debug/memory. Run from the backend folder to compare
+# gunicorn with and without preloading:
+#   python memory_report.py --workers 4             # starts gunicorn both ways
+#   python memory_report.py --pid <gunicorn master>  # inspect a running server
+#
+# Unique = Private_Clean + Private_Dirty: what killing that worker would free.
+# Shared = Shared_Clean + Shared_Dirty: pages also mapped by other processes
+# (preloaded copy-on-write memory, memory-mapped model arrays, libraries).
+# Pss charges each shared page proportionally, so the Pss values add up to the
+# server's real footprint.
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+FIELDS = ('Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty', 'Private_Clean', 'Private_Dirty', 'Swap')
+
+
+def process_memory(pid='self'):
+    """{'rss_kb', 'pss_kb', 'unique_kb', 'shared_kb', 'swap_kb'} for pid, or None if unavailable."""
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            lines = f.readlines()
+    except OSError:
+        return None
+    values = dict.fromkeys(FIELDS, 0)
+    for line in lines:
+        name, _, rest = line.partition(':')
+        if name in values:
+            values[name] = int(rest.split()[0])
+    return {
+        'rss_kb': values['Rss'],
+        'pss_kb': values['Pss'],
+        'unique_kb': values['Private_Clean'] + values['Private_Dirty'],
+        'shared_kb': values['Shared_Clean'] + values['Shared_Dirty'],
+        'swap_kb': values['Swap'],
+    }
+
+
+def child_pids(pid):
+    children = []
+    for task in os.listdir(f'/proc/{pid}/task'):
+        try:
+            with open(f'/proc/{pid}/task/{task}/children') as f:
+                children.extend(int(c) for c in f.read().split())
+        except OSError:
+            pass
+    return sorted(children)
+
+
+def server_report(master_pid):
+    """Memory of a gunicorn master and its workers: (rows, totals)."""
+    rows = [('master', master_pid, process_memory(master_pid))]
+    rows += [('worker', pid, process_memory(pid)) for pid in child_pids(master_pid)]
+    rows = [row for row in rows if row[2] is not None]
+    workers = [m for role, _, m in rows if role == 'worker']
+    totals = {
+        'workers': len(workers),
+        'pss_total_kb': sum(m['pss_kb'] for _, _, m in rows),
+        'unique_per_worker_kb': sum(m['unique_kb'] for m in workers) / len(workers) if workers else 0,
+        'shared_per_worker_kb': sum(m['shared_kb'] for m in workers) / len(workers) if workers else 0,
+    }
+    return rows, totals
+
+
+def print_report(title, rows, totals):
+    print(f"\n{title}")
+    print(f"  {'process':<8} {'pid':>7} {'rss':>9} {'pss':>9} {'unique':>9} {'shared':>9}  (MiB)")
+    for role, pid, m in rows:
+        print(f"  {role:<8} {pid:>7} {m['rss_kb'] / 1024:9.1f} {m['pss_kb'] / 1024:9.1f} "
+              f"{m['unique_kb'] / 1024:9.1f} {m['shared_kb'] / 1024:9.1f}")
+    print(f"  {totals['workers']} workers: {totals['unique_per_worker_kb'] / 1024:.1f} MiB unique and "
+          f"{totals['shared_per_worker_kb'] / 1024:.1f} MiB shared each, "
+          f"{totals['pss_total_kb'] / 1024:.1f} MiB total (Pss)")
+
+
+def start_server(workers, port, preload):
+    import requests
+
+    env = dict(os.environ,
+               GUNICORN_PRELOAD='1' if preload else '0',
+               READYZ_REQUIRE_DB='0',
+               MONGO_URI=os.environ.get('BENCH_MONGO_URI', 'mongodb://127.0.0.1:1'))
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app', '-w', str(workers),
+         '-b', f'127.0.0.1:{port}', '--log-level', 'warning'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.time() + 180
+    ready = set()
+    while time.time() < deadline and len(ready) < workers:
+        if proc.poll() is not None:
+            raise RuntimeError('gunicorn exited during startup')
+        try:
+            r = requests.get(f'{base_url}/readyz', timeout=2)
+            if r.status_code == 200:
+                ready.add(r.json()['pid'])
+        except requests.RequestException:
+            time.sleep(0.5)
+    if len(ready) < workers:
+        proc.terminate()
+        raise RuntimeError('gunicorn workers did not become ready in time')
+    return proc, base_url
+
+
+def exercise(base_url, requests_per_worker, workers):
+    """Touch the prediction paths so the report reflects a worker that has served traffic."""
+    import requests
+
+    heart = {"age": 45, "trestbps": 120, "chol": 220, "thalach": 150, "oldpeak": 1.5, "cp": 1, "ca": 0, "thal": 2}
+    for i in range(requests_per_worker * workers):
+        requests.post(f'{base_url}/api/predict', json=dict(heart, age=20 + i % 60), timeout=10)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Unique vs shared memory per gunicorn worker')
+    parser.add_argument('--pid', type=int, help='report on an already running gunicorn master')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--port', type=int, default=5098)
+    parser.add_argument('--requests', type=int, default=25, help='predictions per worker before measuring')
+    args = parser.parse_args()
+
+    if not os.path.exists('/proc/self/smaps_rollup'):
+        sys.exit('❌ /proc/<pid>/smaps_rollup is not available on this system')
+    if args.pid:
+        print_report(f'gunicorn master {args.pid}', *server_report(args.pid))
+        sys.exit(0)
+
+    for preload in (False, True):
+        proc, base_url = start_server(args.workers, args.port, preload)
+        try:
+            exercise(base_url, args.requests, args.workers)
+            time.sleep(1)
+            print_report(f"GUNICORN_PRELOAD={int(preload)}", *server_report(proc.pid))
+        finally:
+            proc.terminate()
+            proc.wait(timeout=30)
@@ -0,0 +1,173 @@
+# backend/metrics.py
+#
+# Prometheus instrumentation: per-route latency histograms, in-flight gauges
+# and error counters (instrument_app), plus a stage histogram for the hot
+# paths inside a request (model inference, sentiment, rPPG filter/Welch,
+# MongoDB commands, Gemini calls, bcrypt, JSON encoding). app.py serves them
+# at GET /metrics.
+#
+# Under gunicorn every worker has its own registry, so a scrape would only
+# see whichever worker answered. When PROMETHEUS_MULTIPROC_DIR is set (our
+# gunicorn.conf.py sets it) each worker writes its samples to files in that
+# directory and /metrics merges all of them. The variable must be set before
+# prometheus_client is first imported.
+
+import inspect
+import os
+import time
+from contextlib import contextmanager
+
+from flask import request, g
+from flask.json.provider import DefaultJSONProvider
+from prometheus_client import (CollectorRegistry, Counter, Gauge, Histogram, CONTENT_TYPE_LATEST,
+                               generate_latest, multiprocess)
+from pymongo import monitoring
+
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+# Requests range from sub-millisecond predictions to multi-second GenAI calls
+REQUEST_BUCKETS = (.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30, 60)
+STAGE_BUCKETS = (.0001, .00025, .0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30)
+
+REQUEST_LATENCY = Histogram(
+    'healthprism_http_request_duration_seconds', 'Request latency, including streamed bodies',
+    ['method', 'route', 'status'], buckets=REQUEST_BUCKETS)
+REQUESTS_IN_FLIGHT = Gauge(
+    'healthprism_http_requests_in_flight', 'Requests currently being served',
+    ['route'], multiprocess_mode='livesum')
+REQUEST_ERRORS = Counter(
+    'healthprism_http_request_errors_total', 'Requests answered with a 4xx/5xx status',
+    ['method', 'route', 'status'])
+STAGE_LATENCY = Histogram(
+    'healthprism_stage_duration_seconds', 'Time spent in a named stage of request handling',
+    ['stage'], buckets=STAGE_BUCKETS)
+STAGE_ERRORS = Counter(
+    'healthprism_stage_errors_total', 'Stages that raised', ['stage'])
+
+_stage_children = {}
+
+
+def _stage_child(name):
+    # labels() does a lock and a dict lookup per call; stage names are a small fixed set
+    child = _stage_children.get(name)
+    if child is None:
+        child = _stage_children[name] = STAGE_LATENCY.labels(name)
+    return child
+
+
+def observe_stage(name, seconds, error=False):
+    _stage_child(name).observe(seconds)
+    if error:
+        STAGE_ERRORS.labels(name).inc()
+
+
+@contextmanager
+def stage(name):
+    """Time the enclosed block as stage name."""
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        observe_stage(name, time.perf_counter() - started, error=True)
+        raise
+    observe_stage(name, time.perf_counter() - started)
+
+
+def timed(name):
+    """Decorator form of stage(); generator functions are timed until exhausted."""
+    def decorator(fn):
+        if inspect.isgeneratorfunction(fn):
+            def wrapper(*args, **kwargs):
+                with stage(name):
+                    yield from fn(*args, **kwargs)
+        else:
+            def wrapper(*args, **kwargs):
+                with stage(name):
+                    return fn(*args, **kwargs)
+        wrapper.__name__ = fn.__name__
+        wrapper.__doc__ = fn.__doc__
+        wrapper.__wrapped__ = fn
+        return wrapper
+    return decorator
+
+
+def instrument(target, attr, name):
+    """Replace target.attr (a module function or bound method) with a timed version."""
+    setattr(target, attr, timed(name)(getattr(target, attr)))
+
+
+# --- Flask ---
+def _route_label():
+    # The URL rule, not the path, so /api/rppg/session/<id> is one series
+    rule = request.url_rule
+    return rule.rule if rule is not None else 'unmatched'
+
+
+def instrument_app(app, skip=('/metrics',)):
+    @app.before_request
+    def _start_timer():
+        route = _route_label()
+        if route in skip:
+            return
+        g._metrics_route = route
+        g._metrics_started = time.perf_counter()
+        REQUESTS_IN_FLIGHT.labels(route).inc()
+
+    @app.after_request
+    def _record(response):
+        route = g.pop('_metrics_route', None)
+        if route is None:
+            return response
+        started = g.pop('_metrics_started')
+        method, status = request.method, str(response.status_code)
+
+        def finished():
+            # Runs once the body has been sent, so streamed (SSE, NDJSON) responses count in full
+            REQUEST_LATENCY.labels(method, route, status).observe(time.perf_counter() - started)
+            REQUESTS_IN_FLIGHT.labels(route).dec()
+            if response.status_code >= 400:
+                REQUEST_ERRORS.labels(method, route, status).inc()
+
+        response.call_on_close(finished)
+        return response
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """jsonify() with its encoding time recorded as the json_encode stage."""
+
+    def dumps(self, obj, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            observe_stage('json_encode', time.perf_counter() - started)
+
+
+# --- MongoDB ---
+class MongoCommandTimer(monitoring.CommandListener):
+    """Pass to MongoClient(event_listeners=[...]); times each command as stage mongo_<command>."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        observe_stage(f'mongo_{event.command_name}', event.duration_micros / 1e6)
+
+    def failed(self, event):
+        observe_stage(f'mongo_{event.command_name}', event.duration_micros / 1e6, error=True)
+
+
+# --- Exposition ---
+def render():
+    """(body, content_type) for a scrape, merged across workers in multiprocess mode."""
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid):
+    """gunicorn child_exit hook: drop a dead worker's live gauges."""
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid)
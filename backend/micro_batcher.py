@@ -0,0 +1,159 @@
+# backend/micro_batcher.py
+#
+# In-process micro-batching for model calls.
+#
+# Request threads call submit(row) and block; a single background thread
+# gathers whatever arrives within max_wait_ms (or until max_batch_size rows
+# are waiting), runs ONE vectorized predict over the whole batch, and hands
+# each caller its own result. With gunicorn --threads this turns many tiny
+# one-row predictions into a few larger ones.
+
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class BatcherOverloaded(RuntimeError):
+    """Raised by submit() when the pending queue is full."""
+
+
+class MicroBatcher:
+    def __init__(self, name, predict_fn, max_batch_size=64, max_wait_ms=2.0,
+                 max_queue=4096, timeout_s=10.0):
+        # predict_fn takes a list of rows and returns one result per row
+        self.name = name
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_s = max(0.0, float(max_wait_ms)) / 1000.0
+        self.max_queue = max_queue
+        self.timeout_s = timeout_s
+
+        self._lock = threading.Lock()
+        self._queue = None
+        self._thread = None
+        self._pid = None
+
+        # Metrics
+        self._batches = 0
+        self._rows = 0
+        self._failed_batches = 0
+        self._max_batch_seen = 0
+        self._batch_sizes = deque(maxlen=1024)
+        self._waits_ms = deque(maxlen=1024)
+        self._run_ms = deque(maxlen=1024)
+
+    # --- Public API ---
+    def submit(self, row):
+        """Queue one row and block until its batch has been scored."""
+        pending = self._ensure_started()
+        future = Future()
+        try:
+            pending.put_nowait((row, future, time.perf_counter()))
+        except queue.Full:
+            raise BatcherOverloaded(f'{self.name} batcher queue is full')
+        return future.result(timeout=self.timeout_s)
+
+    def stats(self):
+        with self._lock:
+            sizes = list(self._batch_sizes)
+            waits = list(self._waits_ms)
+            runs = list(self._run_ms)
+            return {
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait_s * 1000.0,
+                'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+                'batches': self._batches,
+                'rows': self._rows,
+                'failed_batches': self._failed_batches,
+                'avg_batch_size': (self._rows / self._batches) if self._batches else 0.0,
+                'max_batch_size_seen': self._max_batch_seen,
+                'recent_batch_size_p50': _percentile(sizes, 50),
+                'recent_wait_ms_p50': _percentile(waits, 50),
+                'recent_wait_ms_p99': _percentile(waits, 99),
+                'recent_predict_ms_p50': _percentile(runs, 50),
+                'recent_predict_ms_p99': _percentile(runs, 99),
+            }
+
+    # --- Worker ---
+    def _ensure_started(self):
+        # Started lazily, and restarted after a fork: threads don't survive
+        # into gunicorn workers when the app is preloaded in the master.
+        pid = os.getpid()
+        if self._thread is not None and self._pid == pid:
+            return self._queue
+        with self._lock:
+            if self._thread is None or self._pid != pid:
+                self._queue = queue.Queue(maxsize=self.max_queue)
+                self._pid = pid
+                self._thread = threading.Thread(
+                    target=self._run, args=(self._queue,),
+                    name=f'micro-batcher-{self.name}', daemon=True)
+                self._thread.start()
+        return self._queue
+
+    def _run(self, pending):
+        while True:
+            batch = [pending.get()]
+            deadline = batch[0][2] + self.max_wait_s
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    if remaining <= 0:
+                        batch.append(pending.get_nowait())
+                    else:
+                        batch.append(pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._process(batch)
+
+    def _predict(self, rows):
+        results = self.predict_fn(rows)
+        if len(results) != len(rows):
+            raise ValueError(f'{self.name} predict_fn returned {len(results)} results for {len(rows)} rows')
+        return results
+
+    def _process(self, batch):
+        started = time.perf_counter()
+        rows = [row for row, _, _ in batch]
+        failed = False
+        try:
+            results = self._predict(rows)
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
+        except Exception:
+            # Retry one by one so a single bad row only fails its own caller
+            failed = True
+            for row, future, _ in batch:
+                if future.done():
+                    continue
+                try:
+                    future.set_result(self._predict([row])[0])
+                except Exception as e:
+                    future.set_exception(e)
+        finally:
+            # Never leave a caller waiting on a future nobody will resolve
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(RuntimeError(f'{self.name} batch ended without a result'))
+        finished = time.perf_counter()
+
+        with self._lock:
+            self._batches += 1
+            self._rows += len(batch)
+            self._failed_batches += int(failed)
+            self._max_batch_seen = max(self._max_batch_seen, len(batch))
+            self._batch_sizes.append(len(batch))
+            self._run_ms.append((finished - started) * 1000.0)
+            for _, _, enqueued in batch:
+                self._waits_ms.append((started - enqueued) * 1000.0)
+
+
+def _percentile(values, q):
+    if not values:
+        return 0.0
+    return float(np.percentile(values, q))
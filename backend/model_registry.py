@@ -0,0 +1,290 @@
+# backend/model_registry.py
+#
+# A small local model registry. models.json lists every model version with
+# its artifact path, sha256, feature list and training metrics, and which
+# version of each model is active:
+#   {"models": {"heart": {"active": "2.0", "versions": {"2.0": {"path": ..., "sha256": ...,
+#                                                               "features": [...], "metrics": {...}}}}}}
+# Paths are relative to the manifest.
+#
+# ModelRegistry loads the active versions through a caller-supplied loader
+# (which compiles and warms the model up), then watches the manifest. When the
+# active version changes, the new one is loaded and warmed in the background
+# while requests keep using the old one, and is then swapped in with a single
+# reference assignment. If a load fails, the old version stays active.
+#
+# Command line, from the backend folder:
+#   python model_registry.py list
+#   python model_registry.py register stress 2.1 stress_model_v2-2.1.joblib --metric accuracy=0.93 --activate
+#   python model_registry.py activate stress 1.0
+
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+DEFAULT_MANIFEST = 'models.json'
+
+
+def artifact_sha256(path):
+    # Identifies the exact model file; used to version cached predictions
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# --- Manifest ---
+def read_manifest(path):
+    with open(path) as f:
+        manifest = json.load(f)
+    if not isinstance(manifest.get('models'), dict):
+        raise ValueError(f'{path} has no "models" section')
+    return manifest
+
+
+def write_manifest(path, manifest):
+    # Written to a temp file and renamed, so watchers never see half a manifest
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix='.models-', suffix='.json', dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(manifest, f, indent=2)
+            f.write('\n')
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def register_version(manifest_path, name, version, artifact, metrics=None, activate=False):
+    """Add (or replace) a version in the manifest; the artifact is hashed and its features read."""
+    import joblib
+
+    try:
+        manifest = read_manifest(manifest_path)
+    except FileNotFoundError:
+        manifest = {'models': {}}
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    artifact_path = artifact if os.path.isabs(artifact) else os.path.join(base, artifact)
+    pipeline = joblib.load(artifact_path)
+    model = manifest['models'].setdefault(name, {'active': None, 'versions': {}})
+    model['versions'][version] = {
+        'path': os.path.relpath(artifact_path, base),
+        'sha256': artifact_sha256(artifact_path),
+        'features': [str(f) for f in getattr(pipeline, 'feature_names_in_', [])],
+        'metrics': metrics or {},
+        'registered_at': datetime.datetime.utcnow().replace(microsecond=0).isoformat() + 'Z',
+    }
+    if activate or model['active'] is None:
+        model['active'] = version
+    write_manifest(manifest_path, manifest)
+    return manifest
+
+
+def activate_version(manifest_path, name, version):
+    manifest = read_manifest(manifest_path)
+    model = manifest['models'].get(name)
+    if model is None or version not in model['versions']:
+        raise KeyError(f'{name} has no version {version}')
+    model['active'] = version
+    write_manifest(manifest_path, manifest)
+    return manifest
+
+
+# --- Loaded models ---
+class LoadedModel:
+    """Everything a prediction needs from one model version, swapped as a unit."""
+
+    def __init__(self, name, version, sha256, pipeline, runtime, features, metrics=None,
+                 load_pipeline=None):
+        # pipeline may be None when the runtime is enough; load_pipeline() then
+        # loads it on first use (each worker's copy of it is private memory)
+        self.name = name
+        self.version = version
+        self.sha256 = sha256
+        self._pipeline = pipeline
+        self._load_pipeline = load_pipeline
+        self._pipeline_lock = threading.Lock()
+        self.runtime = runtime  # compiled runtime, or None to use the sklearn pipeline
+        self.features = list(features)
+        self.metrics = metrics or {}
+        self.loaded_at = time.time()
+
+    @property
+    def pipeline(self):
+        if self._pipeline is None and self._load_pipeline is not None:
+            with self._pipeline_lock:
+                if self._pipeline is None:
+                    self._pipeline = self._load_pipeline()
+        return self._pipeline
+
+    def describe(self):
+        return {
+            'version': self.version,
+            'sha256': self.sha256,
+            'features': self.features,
+            'metrics': self.metrics,
+            'compiled': self.runtime is not None,
+            'pipeline_loaded': self._pipeline is not None,
+            'loaded_at': self.loaded_at,
+        }
+
+
+class ModelRegistry:
+    def __init__(self, manifest_path, loader, poll_interval=5.0):
+        # loader(name, version, path, entry) -> LoadedModel; it should warm the
+        # model up and raise if the version can't be served
+        self.manifest_path = manifest_path
+        self.loader = loader
+        self.poll_interval = poll_interval
+        self._active = {}
+        self._errors = {}
+        self._load_lock = threading.Lock()
+        self._signature = None
+        self._thread = None
+        self._thread_pid = None
+        self._start_lock = threading.Lock()
+        self.loads = 0
+        self.swaps = 0
+        self.failures = 0
+        self.last_check = None
+
+    def get(self, name):
+        """The active LoadedModel for name, or None."""
+        return self._active.get(name)
+
+    # --- Loading ---
+    def refresh(self):
+        """Load every active version that isn't loaded yet; True if all are being served."""
+        with self._load_lock:
+            self.last_check = time.time()
+            try:
+                self._signature = self._manifest_signature()
+                manifest = read_manifest(self.manifest_path)
+            except (OSError, ValueError) as e:
+                print(f"❌ Could not read model manifest {self.manifest_path}: {e}")
+                self._errors['manifest'] = str(e)
+                return False
+            self._errors.pop('manifest', None)
+            base = os.path.dirname(os.path.abspath(self.manifest_path))
+            ok = True
+            for name, model in manifest['models'].items():
+                version = model.get('active')
+                entry = model.get('versions', {}).get(version)
+                current = self._active.get(name)
+                if entry is None:
+                    print(f"❌ Model manifest: {name} has no active version {version!r}")
+                    self._errors[name] = f'no version {version!r}'
+                    ok = False
+                    continue
+                if current is not None and current.version == version and current.sha256 == entry.get('sha256'):
+                    continue
+                ok = self._load(name, version, os.path.join(base, entry['path']), entry) and ok
+            return ok
+
+    def _load(self, name, version, path, entry):
+        started = time.perf_counter()
+        try:
+            sha256 = artifact_sha256(path)
+            if entry.get('sha256') and sha256 != entry['sha256']:
+                raise ValueError(f'{os.path.basename(path)} does not match the manifest sha256')
+            model = self.loader(name, version, path, dict(entry, sha256=sha256))
+        except Exception as e:
+            self.failures += 1
+            self._errors[name] = f'{version}: {e}'
+            kept = self._active.get(name)
+            print(f"❌ Could not load {name} model {version} ({e})"
+                  + (f", still serving {kept.version}" if kept is not None else ""))
+            return False
+        previous = self._active.get(name)
+        self._active[name] = model  # the swap: requests already running keep their reference
+        self._errors.pop(name, None)
+        self.loads += 1
+        if previous is not None:
+            self.swaps += 1
+            print(f"✅ Swapped {name} model {previous.version} -> {version} "
+                  f"({time.perf_counter() - started:.2f}s load and warm-up)")
+        else:
+            print(f"✅ Loaded {name} model {version} ({time.perf_counter() - started:.2f}s)")
+        return True
+
+    # --- Watching ---
+    def _manifest_signature(self):
+        st = os.stat(self.manifest_path)
+        return st.st_mtime_ns, st.st_size
+
+    def watch(self):
+        """Start the watcher thread (once per process; restarted after a fork)."""
+        if self.poll_interval <= 0:
+            return
+        with self._start_lock:
+            if self._thread is not None and self._thread_pid == os.getpid() and self._thread.is_alive():
+                return
+            self._thread_pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='model-registry', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                signature = self._manifest_signature()
+            except OSError:
+                continue
+            if signature != self._signature:
+                self.refresh()
+
+    def stats(self):
+        return {
+            'manifest': self.manifest_path,
+            'watching': self._thread is not None and self._thread_pid == os.getpid() and self._thread.is_alive(),
+            'poll_interval_seconds': self.poll_interval,
+            'active': {name: model.describe() for name, model in self._active.items()},
+            'errors': dict(self._errors),
+            'loads': self.loads,
+            'swaps': self.swaps,
+            'failures': self.failures,
+            'last_check': self.last_check,
+        }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Local model registry')
+    parser.add_argument('--manifest', default=DEFAULT_MANIFEST)
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list', help='show every model version')
+    register = commands.add_parser('register', help='add a model version')
+    register.add_argument('name')
+    register.add_argument('version')
+    register.add_argument('artifact', help='joblib file, relative to the manifest')
+    register.add_argument('--metric', action='append', default=[], help='name=value, repeatable')
+    register.add_argument('--activate', action='store_true')
+    activate = commands.add_parser('activate', help='make a registered version active')
+    activate.add_argument('name')
+    activate.add_argument('version')
+    args = parser.parse_args()
+
+    if args.command == 'register':
+        metrics = {}
+        for metric in args.metric:
+            key, _, value = metric.partition('=')
+            try:
+                metrics[key] = float(value)
+            except ValueError:
+                metrics[key] = value
+        register_version(args.manifest, args.name, args.version, args.artifact, metrics, args.activate)
+    elif args.command == 'activate':
+        activate_version(args.manifest, args.name, args.version)
+
+    for name, model in read_manifest(args.manifest)['models'].items():
+        print(name)
+        for version, entry in model['versions'].items():
+            marker = '*' if version == model['active'] else ' '
+            metrics = ', '.join(f'{k}={v}' for k, v in entry.get('metrics', {}).items())
+            print(f"  {marker} {version:<12} {entry['path']:<36} {entry['sha256'][:12]}  {metrics}")
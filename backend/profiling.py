@@ -0,0 +1,221 @@
+# backend/profiling.py
+#
+# Opt-in profiling of live requests. A request is profiled when it carries
+# the trigger header (X-Profile: 1 by default) and the authorize callback
+# accepts it (app.py requires an admin token), or when it is picked at random
+# at sample_rate. Nothing is installed unless profiling is enabled, so when
+# it is off the only cost is the config check at import.
+#
+# Modes:
+#   sample   - a helper thread records the request thread's stack every
+#              interval_ms; written as collapsed stacks ("a;b;c <count>" per
+#              line), which flamegraph.pl, speedscope and similar tools read.
+#   cprofile - cProfile for the request's thread, written as a .pstats file
+#              (exact call counts, but much more overhead while it runs).
+#
+# Each profile is one file plus a .json sidecar (route, method, status,
+# duration, samples) in directory. Workers share the directory, and only the
+# newest max_files profiles are kept.
+
+import cProfile
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+from flask import request, g
+
+EXTENSIONS = {'sample': 'collapsed', 'cprofile': 'pstats'}
+SAFE_NAME = re.compile(r'^[\w.-]+$')
+
+
+def _frame_label(code):
+    # Function identity (def line, not current line) so samples in one function merge
+    parts = code.co_filename.replace('\\', '/').split('/')
+    return f"{code.co_name} ({'/'.join(parts[-2:])}:{code.co_firstlineno})"
+
+
+def collapse(frame):
+    """Root-to-leaf stack of frame as one collapsed-stack line (without the count)."""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+class StackSampler:
+    """Samples one thread's stack every interval seconds until stop()."""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse(frame)] += 1
+
+
+class RequestProfiler:
+    def __init__(self, directory, max_files=200, mode='sample', interval_ms=5.0, sample_rate=0.0,
+                 header='X-Profile', authorize=None):
+        # authorize() is called (inside the request) only when the header is present
+        if mode not in EXTENSIONS:
+            raise ValueError(f'Unknown profiling mode {mode!r}')
+        self.directory = directory
+        self.max_files = max_files
+        self.mode = mode
+        self.interval = interval_ms / 1000.0
+        self.sample_rate = sample_rate
+        self.header = header
+        self.authorize = authorize
+        self._lock = threading.Lock()
+        self.profiled = 0
+        self.rejected = 0
+        self.write_errors = 0
+        os.makedirs(directory, exist_ok=True)
+
+    # --- Flask hooks ---
+    def install(self, app, skip_prefixes=('/api/admin/profiles',)):
+        @app.before_request
+        def _maybe_start():
+            if request.path.startswith(skip_prefixes):
+                return
+            reason = self._trigger()
+            if reason is None:
+                return
+            if self.mode == 'cprofile':
+                session = cProfile.Profile()
+                try:
+                    session.enable()
+                except ValueError:
+                    return  # Python 3.12+: another request on this worker is already being profiled
+            else:
+                session = StackSampler(threading.get_ident(), self.interval).start()
+            g._profile = (session, reason, time.perf_counter())
+
+        @app.after_request
+        def _finish(response):
+            state = g.pop('_profile', None)
+            if state is None:
+                return response
+            session, reason, started = state
+            rule = request.url_rule
+            meta = {
+                'route': rule.rule if rule is not None else 'unmatched',
+                'method': request.method,
+                'status': response.status_code,
+                'reason': reason,
+                'pid': os.getpid(),
+                'mode': self.mode,
+            }
+            # Stop once the body is sent, so streamed responses are profiled in full
+            response.call_on_close(lambda: self._save(session, meta, started))
+            return response
+
+    def _trigger(self):
+        if request.headers.get(self.header) == '1':
+            if self.authorize is not None and self.authorize():
+                return 'header'
+            with self._lock:
+                self.rejected += 1
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return 'sampled'
+        return None
+
+    # --- Output ---
+    def _save(self, session, meta, started):
+        duration_ms = (time.perf_counter() - started) * 1000.0
+        if self.mode == 'cprofile':
+            session.disable()
+            samples = None
+        else:
+            stacks = session.stop()
+            samples = sum(stacks.values())
+        now = time.time()
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', meta['route']).strip('_') or 'root'
+        stem = (f"{time.strftime('%Y%m%dT%H%M%S', time.localtime(now))}.{int(now * 1000) % 1000:03d}-"
+                f"{meta['pid']}-{meta['method']}-{slug}-{int(duration_ms)}ms")
+        name = f"{stem}.{EXTENSIONS[self.mode]}"
+        meta.update(name=name, duration_ms=round(duration_ms, 3), samples=samples, created=now)
+        try:
+            path = os.path.join(self.directory, name)
+            if self.mode == 'cprofile':
+                session.dump_stats(path)
+            else:
+                with open(path, 'w') as f:
+                    for stack, count in stacks.most_common():
+                        f.write(f"{stack} {count}\n")
+            with open(os.path.join(self.directory, f"{stem}.json"), 'w') as f:
+                json.dump(meta, f)
+            with self._lock:
+                self.profiled += 1
+            self._rotate()
+        except OSError as e:
+            with self._lock:
+                self.write_errors += 1
+            print(f"⚠️ Could not write profile {name}: {e}")
+
+    def _rotate(self):
+        # Names start with a timestamp, so sorting puts the oldest first
+        metas = sorted(n for n in os.listdir(self.directory) if n.endswith('.json'))
+        for meta_name in metas[:max(0, len(metas) - self.max_files)]:
+            stem = meta_name[:-len('.json')]
+            for ext in ('json',) + tuple(EXTENSIONS.values()):
+                try:
+                    os.remove(os.path.join(self.directory, f"{stem}.{ext}"))
+                except FileNotFoundError:
+                    pass  # another worker rotated it first
+
+    # --- Browsing ---
+    def list_profiles(self, route=None, top=5):
+        """The top slowest profiles per route among those kept: {route: [meta, ...]}."""
+        by_route = {}
+        for meta_name in os.listdir(self.directory):
+            if not meta_name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.directory, meta_name)) as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                continue  # rotated away or still being written
+            if route is None or meta.get('route') == route:
+                by_route.setdefault(meta.get('route'), []).append(meta)
+        return {r: sorted(metas, key=lambda m: m['duration_ms'], reverse=True)[:top]
+                for r, metas in sorted(by_route.items())}
+
+    def has_profile(self, name):
+        return (bool(SAFE_NAME.match(name)) and name.rsplit('.', 1)[-1] in EXTENSIONS.values()
+                and os.path.isfile(os.path.join(self.directory, name)))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'mode': self.mode,
+                'directory': self.directory,
+                'sample_rate': self.sample_rate,
+                'interval_ms': self.interval * 1000.0,
+                'header': self.header,
+                'max_files': self.max_files,
+                'profiled': self.profiled,
+                'rejected_headers': self.rejected,
+                'write_errors': self.write_errors,
+            }
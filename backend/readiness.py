@@ -0,0 +1,61 @@
+# backend/readiness.py
+#
+# Tracks startup components (database, models, warm-up) for the /readyz probe
+# and the cold-start report printed at boot. Each component goes
+# pending -> loading -> ready | failed, with how long it took.
+
+import os
+import threading
+import time
+
+
+class Readiness:
+    def __init__(self, components, required=None, started=None):
+        # required: the components /readyz waits for (default: all of them)
+        self.started = time.perf_counter() if started is None else started
+        self.required = list(components if required is None else required)
+        self._lock = threading.Lock()
+        self._components = {name: {'status': 'pending'} for name in components}
+
+    def begin(self, name):
+        with self._lock:
+            self._components[name] = {'status': 'loading', '_t0': time.perf_counter()}
+
+    def done(self, name):
+        self._finish(name, 'ready')
+
+    def failed(self, name, error):
+        self._finish(name, 'failed', error=str(error))
+
+    def is_ready(self):
+        with self._lock:
+            return all(self._components[name]['status'] == 'ready' for name in self.required)
+
+    def status(self, name):
+        with self._lock:
+            return self._components[name]['status']
+
+    def seconds(self, name):
+        with self._lock:
+            return self._components[name].get('seconds')
+
+    def report(self):
+        with self._lock:
+            components = {name: {k: v for k, v in state.items() if not k.startswith('_')}
+                          for name, state in self._components.items()}
+            ready = all(components[name]['status'] == 'ready' for name in self.required)
+        return {
+            'ready': ready,
+            'pid': os.getpid(),
+            'uptime_seconds': round(time.perf_counter() - self.started, 3),
+            'required': self.required,
+            'components': components,
+        }
+
+    def _finish(self, name, status, error=None):
+        with self._lock:
+            state = self._components[name]
+            t0 = state.get('_t0', time.perf_counter())
+            self._components[name] = {'status': status, 'seconds': round(time.perf_counter() - t0, 3)}
+            if error is not None:
+                self._components[name]['error'] = error
@@ -116,8 +116,17 @@ print(f"\n✅ --- Optimized NLP Stress Model Accuracy: {accuracy * 100:.2f}% ---
 print("\nClassification Report:")
 print(classification_report(y_test, y_pred))
 
-# --- 7. SAVE THE FINAL MODEL ---
-FINAL_MODEL_FILE = 'stress_model_v2.joblib'
+# --- 7. SAVE AND REGISTER THE FINAL MODEL ---
+# Saved under a versioned name and activated in models.json; running servers
+# swap it in without a restart.
+from datetime import datetime
+from model_registry import register_version
+
+MODEL_VERSION = datetime.now().strftime('%Y%m%d-%H%M%S')
+FINAL_MODEL_FILE = f'stress_model_v2-{MODEL_VERSION}.joblib'
 joblib.dump(pipeline_final, FINAL_MODEL_FILE)
+register_version('models.json', 'stress', MODEL_VERSION, FINAL_MODEL_FILE,
+                 metrics={'accuracy': round(accuracy, 4)}, activate=True)
 
 print(f"\n✅ --- SUCCESS! Optimized NLP STRESS model saved to '{FINAL_MODEL_FILE}' --- ✅")
+print(f"✅ --- Registered as stress model {MODEL_VERSION} (now active) --- ✅")
@@ -0,0 +1,168 @@
+# backend/rppg_engine.py
+#
+# rPPG signal processing: POS projection, Butterworth bandpass and Welch PSD.
+#
+# Everything works on 2-D arrays of shape (n_signals, n_samples) along the
+# last axis, so N equal-length signals (e.g. a wall of clinic cameras) are
+# filtered and transformed in one call. Single-signal helpers are thin
+# wrappers over the batch versions.
+#
+# Filter design is cached per fps bucket: fps is rounded to FPS_BUCKET before
+# butter() runs, so a stream of 29.97 / 30.02 / 30.0 fps requests reuses one
+# set of coefficients instead of redesigning the filter every call.
+#
+# scipy.signal takes about a second to import, so it is imported on first use
+# (normally by the startup warm-up) rather than when app.py is loaded.
+
+from functools import lru_cache
+
+import numpy as np
+
+MIN_SAMPLES = 30
+BAND_LOW_HZ = 0.75   # 45 BPM
+BAND_HIGH_HZ = 3.5   # 210 BPM
+FPS_BUCKET = 0.1
+WELCH_SEGMENT = 128
+WELCH_NFFT = 1024
+SNR_HALF_WIDTH_HZ = 0.1  # "signal" = power within this of the peak and its first harmonic
+
+
+# --- Filter design ---
+def fps_bucket(fps):
+    return round(round(float(fps) / FPS_BUCKET) * FPS_BUCKET, 6)
+
+@lru_cache(maxsize=64)
+def bandpass_coefficients(bucket):
+    from scipy.signal import butter
+    nyquist = bucket / 2.0
+    return butter(2, [BAND_LOW_HZ / nyquist, BAND_HIGH_HZ / nyquist], btype='bandpass')
+
+
+# --- Batch API ---
+def pos_signals(R, G, B):
+    """POS (Plane-Orthogonal-to-Skin) pulse signal for each row of R, G, B."""
+    R = np.atleast_2d(np.asarray(R, dtype=float))
+    G = np.atleast_2d(np.asarray(G, dtype=float))
+    B = np.atleast_2d(np.asarray(B, dtype=float))
+
+    # Normalize with mean (avoid zero division)
+    Rn = R / (R.mean(axis=1, keepdims=True) + 1e-6)
+    Gn = G / (G.mean(axis=1, keepdims=True) + 1e-6)
+    Bn = B / (B.mean(axis=1, keepdims=True) + 1e-6)
+
+    # Create Projection vectors
+    S1 = Rn - Gn
+    S2 = Rn + Gn - 2 * Bn
+
+    # Combine based on standard deviation ratios (motion cancel)
+    alpha = S1.std(axis=1, keepdims=True) / (S2.std(axis=1, keepdims=True) + 1e-6)
+    return S1 + alpha * S2
+
+def bandpass(Y, fps):
+    """Detrend and bandpass each row; falls back to the detrended signal on error."""
+    from scipy.signal import filtfilt
+    Y = np.atleast_2d(np.asarray(Y, dtype=float))
+    Y = Y - Y.mean(axis=1, keepdims=True)
+    try:
+        b, a = bandpass_coefficients(fps_bucket(fps))
+        return filtfilt(b, a, Y, axis=-1)
+    except Exception as e:
+        print(f"⚠️ Filter error: {e}, falling back to standard signal")
+        return Y
+
+def power_spectrum(Y, fps):
+    """Welch PSD of each row -> (freqs, pxx[n_signals, n_freqs])."""
+    from scipy.signal import welch
+    try:
+        n_seg = min(Y.shape[-1], WELCH_SEGMENT) # Segment size for averaging
+        return welch(Y, fs=fps, nperseg=n_seg, nfft=WELCH_NFFT, axis=-1)
+    except Exception as e:
+        print(f"⚠️ Welch error: {e}, falling back to FFT")
+        n = Y.shape[-1]
+        return np.fft.fftfreq(n, 1 / fps), np.abs(np.fft.fft(Y, axis=-1))
+
+def peak_bpm(f, pxx):
+    """Peak frequency inside the heart-rate band, in BPM (NaN if the band is empty)."""
+    mask = (f >= BAND_LOW_HZ) & (f <= BAND_HIGH_HZ)
+    if not mask.any():
+        return np.full(pxx.shape[0], np.nan)
+    f_valid = f[mask]
+    return f_valid[np.argmax(pxx[:, mask], axis=1)] * 60
+
+def estimate_bpm_batch(Y, fps):
+    """BPM for each row of an (n_signals, n_samples) pulse-signal array."""
+    f, pxx = power_spectrum(bandpass(Y, fps), fps)
+    return peak_bpm(f, pxx)
+
+def estimate_bpm_rgb_batch(R, G, B, fps):
+    return estimate_bpm_batch(pos_signals(R, G, B), fps)
+
+
+def _stft_geometry(n_samples, fps, window_seconds, step_seconds):
+    # (samples per window, samples per hop) as used by bpm_trajectories()
+    nperseg = min(n_samples, max(MIN_SAMPLES, int(round(window_seconds * fps))))
+    step = max(1, int(round(step_seconds * fps)))
+    return nperseg, step
+
+
+def trajectory_window_count(n_samples, fps, window_seconds, step_seconds):
+    """How many windows bpm_trajectories() computes, so callers can bound the cost first."""
+    nperseg, step = _stft_geometry(n_samples, fps, window_seconds, step_seconds)
+    return 1 + (n_samples - nperseg) // step
+
+
+def bpm_trajectories(Y, fps, window_seconds=8.0, step_seconds=1.0):
+    """BPM over time for each row of Y, from one STFT over overlapping windows.
+
+    Returns (times, bpm, snr_db, confidence): times has shape (n_windows,)
+    (window centres in seconds), the others (n_signals, n_windows).
+    snr_db compares power near the peak (and its first harmonic) with the rest
+    of the band; confidence is the same ratio as a 0-1 share of that power.
+    """
+    from scipy.signal import stft
+    Y = bandpass(Y, fps)
+    n_samples = Y.shape[-1]
+    nperseg, step = _stft_geometry(n_samples, fps, window_seconds, step_seconds)
+    noverlap = max(0, nperseg - step)
+    f, times, Z = stft(Y, fs=fps, window='hann', nperseg=nperseg, noverlap=noverlap,
+                       nfft=max(WELCH_NFFT, nperseg), detrend='constant',
+                       boundary=None, padded=False, axis=-1)
+    power = np.abs(Z) ** 2  # (n_signals, n_freqs, n_windows)
+
+    band = (f >= BAND_LOW_HZ) & (f <= BAND_HIGH_HZ)
+    f_band = f[band]
+    p_band = power[:, band, :]
+    peak_hz = f_band[np.argmax(p_band, axis=1)]  # (n_signals, n_windows)
+
+    # Power near the fundamental and first harmonic vs. everything else in band
+    near = (np.abs(f[np.newaxis, :, np.newaxis] - peak_hz[:, np.newaxis, :]) <= SNR_HALF_WIDTH_HZ) | \
+           (np.abs(f[np.newaxis, :, np.newaxis] - 2 * peak_hz[:, np.newaxis, :]) <= SNR_HALF_WIDTH_HZ)
+    in_band = (f >= BAND_LOW_HZ) & (f <= 2 * BAND_HIGH_HZ)
+    signal_power = np.where(near & in_band[np.newaxis, :, np.newaxis], power, 0.0).sum(axis=1)
+    noise_power = np.where(~near & in_band[np.newaxis, :, np.newaxis], power, 0.0).sum(axis=1)
+    snr_db = 10 * np.log10((signal_power + 1e-12) / (noise_power + 1e-12))
+    confidence = signal_power / (signal_power + noise_power + 1e-12)
+    return times, peak_hz * 60, snr_db, confidence
+
+
+# --- Single-signal API ---
+def pos_signal(R, G, B):
+    return pos_signals(R, G, B)[0]
+
+def estimate_bpm(y, fps):
+    """Dominant pulse rate of signal y in BPM, or None if no peak in band."""
+    bpm = estimate_bpm_batch(y, fps)[0]
+    return None if np.isnan(bpm) else float(bpm)
+
+def bpm_trajectory(y, fps, window_seconds=8.0, step_seconds=1.0):
+    """Per-window BPM points for one signal: [{'t', 'bpm', 'snr_db', 'confidence'}, ...]."""
+    times, bpm, snr_db, confidence = bpm_trajectories(y, fps, window_seconds, step_seconds)
+    return [
+        {
+            't': round(float(t), 2),
+            'bpm': round(float(b), 1),
+            'snr_db': round(float(s), 2),
+            'confidence': round(float(c), 3)
+        }
+        for t, b, s, c in zip(times, bpm[0], snr_db[0], confidence[0])
+    ]
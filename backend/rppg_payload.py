@@ -0,0 +1,65 @@
+# backend/rppg_payload.py
+#
+# Compact binary encoding for rPPG samples.
+#
+# Binary body (Content-Type: application/octet-stream):
+#   bytes 0-3   magic b"RPG1"
+#   bytes 4-7   fps as little-endian float32
+#   bytes 8-    interleaved little-endian float32 samples: r0 g0 b0 r1 g1 b1 ...
+#
+# The same interleaved float32 samples (without the header) can also be sent
+# base64-encoded inside JSON as {"rgb_b64": "...", "fps": 30} for clients that
+# can only post JSON. Either way the samples are decoded with np.frombuffer,
+# i.e. a zero-copy view on the request bytes instead of a list of Python floats.
+
+import base64
+import binascii
+import struct
+
+import numpy as np
+
+MAGIC = b'RPG1'
+HEADER = struct.Struct('<4sf')
+SAMPLE_DTYPE = np.dtype('<f4')
+BINARY_MIMETYPES = ('application/octet-stream', 'application/x-rppg-f32')
+
+
+def is_binary_request(request):
+    return request.mimetype in BINARY_MIMETYPES
+
+
+def _as_rgb(buffer, offset=0):
+    n_bytes = len(buffer) - offset
+    if n_bytes % (3 * SAMPLE_DTYPE.itemsize):
+        raise ValueError('Sample data must be a whole number of float32 RGB triples')
+    return np.frombuffer(buffer, dtype=SAMPLE_DTYPE, offset=offset).reshape(-1, 3)
+
+
+def decode_binary(body):
+    """Binary body -> (rgb view of shape (n, 3), fps)."""
+    if len(body) < HEADER.size:
+        raise ValueError('Binary rPPG payload is too short')
+    magic, fps = HEADER.unpack_from(body)
+    if magic != MAGIC:
+        raise ValueError('Binary rPPG payload must start with b"RPG1"')
+    return _as_rgb(body, HEADER.size), float(fps)
+
+
+def decode_base64(text):
+    """base64 of interleaved float32 samples -> rgb view of shape (n, 3)."""
+    try:
+        raw = base64.b64decode(text, validate=True)
+    except (binascii.Error, TypeError, ValueError):
+        raise ValueError('rgb_b64 is not valid base64')
+    return _as_rgb(raw)
+
+
+def encode_binary(r, g, b, fps):
+    """Client-side helper (also used by the benchmark)."""
+    rgb = np.column_stack([r, g, b]).astype(SAMPLE_DTYPE)
+    return HEADER.pack(MAGIC, fps) + rgb.tobytes()
+
+
+def encode_base64(r, g, b):
+    rgb = np.column_stack([r, g, b]).astype(SAMPLE_DTYPE)
+    return base64.b64encode(rgb.tobytes()).decode('ascii')
@@ -0,0 +1,144 @@
+# backend/rppg_sessions.py
+#
+# Streaming rPPG sessions.
+#
+# Instead of re-sending the whole growing r/g/b history on every poll, a
+# client opens a session, appends only the new samples, and gets a BPM
+# estimated over a fixed sliding window. Each session keeps a ring buffer of
+# the last window_seconds of samples, so an update costs the same whether the
+# measurement has run for 5 seconds or 5 minutes.
+#
+# Sessions live in the memory of the worker process that created them, so
+# multi-worker deployments need sticky routing for /api/rppg/session/<id>.
+# Sessions idle for longer than idle_timeout are evicted. The frame rate is
+# fixed when a session is opened, because the ring buffer is sized from it.
+
+import threading
+import time
+import uuid
+
+import numpy as np
+
+MAX_FPS = 240.0
+
+
+def check_fps(fps):
+    """fps as a float, or ValueError if it is not a usable frame rate."""
+    try:
+        fps = float(fps)
+    except (TypeError, ValueError):
+        raise ValueError('fps must be a number')
+    if not (0 < fps <= MAX_FPS):  # also rejects NaN
+        raise ValueError(f'fps must be between 0 and {MAX_FPS:g}')
+    return fps
+
+
+class SessionLimitReached(RuntimeError):
+    """Raised when opening a session would exceed max_sessions."""
+
+
+class RPPGSession:
+    def __init__(self, session_id, fps, window_seconds):
+        self.id = session_id
+        self.fps = float(fps)
+        self.window_seconds = float(window_seconds)
+        self.capacity = max(1, int(round(self.window_seconds * self.fps)))
+        self.buffer = np.zeros((self.capacity, 3), dtype=np.float64)
+        self.write_pos = 0
+        self.total_samples = 0
+        self.created_at = time.monotonic()
+        self.last_access = self.created_at
+        self.lock = threading.Lock()
+
+    def append(self, rgb):
+        """Append an (n, 3) block of samples, overwriting the oldest ones."""
+        rgb = np.asarray(rgb, dtype=np.float64).reshape(-1, 3)
+        n = len(rgb)
+        if n >= self.capacity:
+            # Only the newest `capacity` samples can survive anyway
+            self.buffer[:] = rgb[-self.capacity:]
+            self.write_pos = 0
+        else:
+            end = self.write_pos + n
+            if end <= self.capacity:
+                self.buffer[self.write_pos:end] = rgb
+            else:
+                split = self.capacity - self.write_pos
+                self.buffer[self.write_pos:] = rgb[:split]
+                self.buffer[:n - split] = rgb[split:]
+            self.write_pos = end % self.capacity
+        self.total_samples += n
+        self.last_access = time.monotonic()
+
+    def window(self):
+        """The buffered samples in chronological order, shape (k, 3)."""
+        if self.total_samples < self.capacity:
+            return self.buffer[:self.total_samples]
+        return np.roll(self.buffer, -self.write_pos, axis=0)
+
+    def describe(self):
+        return {
+            'session_id': self.id,
+            'fps': self.fps,
+            'window_seconds': self.window_seconds,
+            'samples': self.total_samples,
+            'window_samples': min(self.total_samples, self.capacity),
+        }
+
+
+class RPPGSessionStore:
+    def __init__(self, window_seconds=10.0, idle_timeout=60.0, max_sessions=1000,
+                 max_window_seconds=60.0):
+        self.window_seconds = window_seconds
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.max_window_seconds = max_window_seconds
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.evicted = 0
+
+    def open(self, fps, window_seconds=None):
+        window_seconds = self.window_seconds if window_seconds is None else float(window_seconds)
+        fps = check_fps(fps)
+        if not (0 < window_seconds <= self.max_window_seconds):
+            raise ValueError(f'window_seconds must be between 0 and {self.max_window_seconds}')
+        session = RPPGSession(uuid.uuid4().hex, fps, window_seconds)
+        with self._lock:
+            self._evict_idle()
+            if len(self._sessions) >= self.max_sessions:
+                raise SessionLimitReached('Too many active rPPG sessions')
+            self._sessions[session.id] = session
+            self.opened += 1
+        return session
+
+    def get(self, session_id):
+        with self._lock:
+            self._evict_idle()
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.last_access = time.monotonic()
+            return session
+
+    def close(self, session_id):
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def stats(self):
+        with self._lock:
+            self._evict_idle()
+            return {
+                'active_sessions': len(self._sessions),
+                'opened': self.opened,
+                'evicted_idle': self.evicted,
+                'idle_timeout_seconds': self.idle_timeout,
+                'default_window_seconds': self.window_seconds,
+            }
+
+    def _evict_idle(self):
+        # Caller holds self._lock
+        cutoff = time.monotonic() - self.idle_timeout
+        expired = [sid for sid, s in self._sessions.items() if s.last_access < cutoff]
+        for sid in expired:
+            del self._sessions[sid]
+        self.evicted += len(expired)
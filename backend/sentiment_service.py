@@ -0,0 +1,150 @@
+# backend/sentiment_service.py
+#
+# One VADER sentiment component shared by every route that scores text.
+#
+# - Results are memoized by a hash of the text in a bounded LRU cache.
+# - score_many() scores a list of texts at once (duplicates scored once),
+#   which is what the batch prediction path uses.
+# - Optionally, texts longer than pool_min_chars are scored in a process pool
+#   so their pure-Python lexicon work doesn't hold the GIL on request threads.
+# - Every call is timed; stats() reports the numbers.
+
+import hashlib
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+from ttl_cache import TTLCache, MISSING
+
+NEUTRAL_SCORES = {'neg': 0.0, 'neu': 0.0, 'pos': 0.0, 'compound': 0.0}
+
+_worker_analyzer = None
+
+
+def _init_worker():
+    global _worker_analyzer
+    _worker_analyzer = SentimentIntensityAnalyzer()
+
+
+def _score_in_worker(text):
+    return _worker_analyzer.polarity_scores(text)
+
+
+def text_key(text):
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+
+class SentimentService:
+    def __init__(self, cache_size=4096, pool_workers=0, pool_min_chars=2000):
+        self.analyzer = SentimentIntensityAnalyzer()
+        self.cache = TTLCache(cache_size) if cache_size > 0 else None
+        self.pool_workers = pool_workers
+        self.pool_min_chars = pool_min_chars
+        self._pool = None
+        self._pool_pid = None
+        self._lock = threading.Lock()
+
+        # Metrics
+        self._calls = 0
+        self._texts = 0
+        self._pool_texts = 0
+        self._total_ms = 0.0
+        self._max_ms = 0.0
+        self._recent_ms = deque(maxlen=1024)
+
+    # --- Public API ---
+    def score(self, text):
+        """VADER polarity scores for one text (neutral for empty text)."""
+        return self.score_many([text])[0]
+
+    def compound(self, text):
+        return self.score(text)['compound']
+
+    def score_many(self, texts):
+        """Polarity scores for each text, in order."""
+        started = time.perf_counter()
+        results = [None] * len(texts)
+        pending = {}  # key -> (text, [indexes])
+        for i, text in enumerate(texts):
+            if not text:
+                results[i] = dict(NEUTRAL_SCORES)
+                continue
+            key = text_key(text)
+            if key in pending:
+                pending[key][1].append(i)
+                continue
+            hit = self.cache.get(key) if self.cache is not None else MISSING
+            if hit is not MISSING:
+                results[i] = dict(hit)
+            else:
+                pending[key] = (text, [i])
+
+        pooled = 0
+        if pending:
+            long_texts = {k: v for k, v in pending.items() if self._use_pool(v[0])}
+            futures = {}
+            if long_texts:
+                pool = self._get_pool()
+                futures = {k: pool.submit(_score_in_worker, text) for k, (text, _) in long_texts.items()}
+                pooled = len(futures)
+            scored = {}
+            for key, (text, _) in pending.items():
+                if key not in futures:
+                    scored[key] = self.analyzer.polarity_scores(text)
+            for key, future in futures.items():
+                scored[key] = future.result()
+            for key, (_, indexes) in pending.items():
+                if self.cache is not None:
+                    self.cache.set(key, scored[key])
+                for i in indexes:
+                    results[i] = dict(scored[key])
+
+        self._record(len(texts), pooled, (time.perf_counter() - started) * 1000.0)
+        return results
+
+    def compound_many(self, texts):
+        return [scores['compound'] for scores in self.score_many(texts)]
+
+    def stats(self):
+        with self._lock:
+            recent = list(self._recent_ms)
+            return {
+                'calls': self._calls,
+                'texts': self._texts,
+                'pool_texts': self._pool_texts,
+                'pool_workers': self.pool_workers,
+                'pool_min_chars': self.pool_min_chars,
+                'total_ms': self._total_ms,
+                'avg_ms': (self._total_ms / self._calls) if self._calls else 0.0,
+                'max_ms': self._max_ms,
+                'recent_ms_p50': float(np.percentile(recent, 50)) if recent else 0.0,
+                'recent_ms_p99': float(np.percentile(recent, 99)) if recent else 0.0,
+                'cache': self.cache.stats() if self.cache is not None else None,
+            }
+
+    # --- Internals ---
+    def _use_pool(self, text):
+        return self.pool_workers > 0 and len(text) >= self.pool_min_chars
+
+    def _get_pool(self):
+        # Created on first use in each process (never inherited across a fork)
+        pid = os.getpid()
+        with self._lock:
+            if self._pool is None or self._pool_pid != pid:
+                self._pool = ProcessPoolExecutor(max_workers=self.pool_workers, initializer=_init_worker)
+                self._pool_pid = pid
+            return self._pool
+
+    def _record(self, n_texts, pooled, elapsed_ms):
+        with self._lock:
+            self._calls += 1
+            self._texts += n_texts
+            self._pool_texts += pooled
+            self._total_ms += elapsed_ms
+            self._max_ms = max(self._max_ms, elapsed_ms)
+            self._recent_ms.append(elapsed_ms)
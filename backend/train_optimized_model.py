@@ -125,17 +125,20 @@ y_pred_opt = pipeline_final.predict(X_test_opt)
 accuracy_opt = accuracy_score(y_test_opt, y_pred_opt)
 print(f"✅ Optimized Model (Top 8 Features) Accuracy: {accuracy_opt * 100:.2f}%")
 
-# --- 5. SAVE THE FINAL MODEL ---
-# We overwrite the old, 13-feature model with our new, 8-feature optimized one
-FINAL_MODEL_FILE = 'heart_risk_pipeline.joblib'
+# --- 5. SAVE AND REGISTER THE FINAL MODEL ---
+# Every run gets its own versioned file. Registering it in models.json makes it
+# the active heart model, and running servers swap it in without a restart
+# (roll back with: python model_registry.py activate heart <version>).
+from datetime import datetime
+from model_registry import register_version
+
+MODEL_VERSION = datetime.now().strftime('%Y%m%d-%H%M%S')
+FINAL_MODEL_FILE = f'heart_risk_pipeline-{MODEL_VERSION}.joblib'
 joblib.dump(pipeline_final, FINAL_MODEL_FILE)
-
-# We will ALSO save the simple model under its own name
-# so our app.py can use both for the demo.
-SIMPLE_MODEL_FILE = 'heart_risk_pipeline_SIMPLE.joblib'
-joblib.dump(pipeline_final, SIMPLE_MODEL_FILE)
+register_version('models.json', 'heart', MODEL_VERSION, FINAL_MODEL_FILE,
+                 metrics={'accuracy': round(accuracy_opt, 4)}, activate=True)
 
 
 print(f"\n✅ --- SUCCESS! Optimized model saved to '{FINAL_MODEL_FILE}' --- ✅")
-print(f"✅ --- (Also saved copy to '{SIMPLE_MODEL_FILE}') --- ✅")
+print(f"✅ --- Registered as heart model {MODEL_VERSION} (now active) --- ✅")
 print(f"Comparison: Full Model (13 features) @ {accuracy_full*100:.2f}% vs. Optimized (8 features) @ {accuracy_opt*100:.2f}%")
\ No newline at end of file
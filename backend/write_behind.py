@@ -0,0 +1,190 @@
+# backend/write_behind.py
+#
+# Write-behind buffering for prediction saves.
+#
+# Instead of one synchronous insert_one per request, documents go into a
+# bounded in-process queue and a background flusher writes them with
+# insert_many(ordered=False) whenever batch_size documents are waiting or
+# flush_interval seconds have passed since the first one arrived.
+#
+# - Backpressure: when the queue is full, submit() waits up to put_timeout
+#   and then raises WriteBehindFull so the route can answer 503.
+# - Shutdown: close() (registered with atexit) drains the queue, flushing
+#   inline if the flusher is too far behind to take the stop sentinel.
+# - Failed batches are retried a few times before being dropped and counted.
+#
+# Documents accepted here are NOT yet durable; use this only where the
+# deployment has chosen "fast" acknowledgements over "durable" ones.
+
+import os
+import queue
+import threading
+import time
+
+from pymongo.errors import BulkWriteError
+
+
+class WriteBehindFull(RuntimeError):
+    """Raised when the write-behind queue stays full for put_timeout seconds."""
+
+
+class WriteBehindBuffer:
+    def __init__(self, name, get_collection, max_queue=10000, batch_size=500,
+                 flush_interval=0.5, put_timeout=0.1, max_retries=3):
+        # get_collection is called at flush time, so a reconnect is picked up
+        self.name = name
+        self.get_collection = get_collection
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.max_retries = max_retries
+
+        self._lock = threading.Lock()
+        self._queue = None
+        self._thread = None
+        self._pid = None
+
+        # Metrics
+        self.enqueued = 0
+        self.written = 0
+        self.failed = 0
+        self.rejected = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+
+    # --- Public API ---
+    def submit(self, document):
+        pending = self._ensure_started()
+        try:
+            pending.put(document, timeout=self.put_timeout)
+        except queue.Full:
+            with self._lock:
+                self.rejected += 1
+            raise WriteBehindFull(f'{self.name} write queue is full, please retry shortly')
+        with self._lock:
+            self.enqueued += 1
+
+    def close(self, timeout=10.0):
+        """Flush everything still queued and stop the flusher."""
+        if self._thread is None or self._pid != os.getpid():
+            return
+        pending = self._queue
+        try:
+            pending.put(None, timeout=timeout)  # sentinel: flush and stop
+        except queue.Full:
+            # The flusher is too far behind (e.g. MongoDB is slow): flush from
+            # this thread until the sentinel fits, rather than losing the queue
+            while True:
+                self._drain(pending)
+                try:
+                    pending.put_nowait(None)
+                    break
+                except queue.Full:
+                    continue
+        self._thread.join(timeout)
+        self._thread = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+                'max_queue': self.max_queue,
+                'batch_size': self.batch_size,
+                'flush_interval_seconds': self.flush_interval,
+                'enqueued': self.enqueued,
+                'written': self.written,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'flushes': self.flushes,
+                'last_flush_ms': self.last_flush_ms,
+                'avg_flush_ms': (self.total_flush_ms / self.flushes) if self.flushes else 0.0,
+                'max_flush_ms': self.max_flush_ms,
+            }
+
+    # --- Flusher ---
+    def _ensure_started(self):
+        # Lazily started, and restarted after a fork (threads don't survive it)
+        pid = os.getpid()
+        if self._thread is not None and self._pid == pid:
+            return self._queue
+        with self._lock:
+            if self._thread is None or self._pid != pid:
+                self._queue = queue.Queue(maxsize=self.max_queue)
+                self._pid = pid
+                self._thread = threading.Thread(
+                    target=self._run, args=(self._queue,),
+                    name=f'write-behind-{self.name}', daemon=True)
+                self._thread.start()
+        return self._queue
+
+    def _run(self, pending):
+        while True:
+            item = pending.get()
+            if item is None:
+                return  # close(): everything queued before it has been flushed
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = pending.get(timeout=remaining) if remaining > 0 else pending.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._flush(batch)
+                    return
+                batch.append(item)
+            self._flush(batch)
+
+    def _drain(self, pending):
+        # Flush whatever is queued right now, in batch_size batches, from the calling thread
+        batch = []
+        while True:
+            try:
+                item = pending.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                continue
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                self._flush(batch)
+                batch = []
+        if batch:
+            self._flush(batch)
+
+    def _flush(self, batch):
+        started = time.perf_counter()
+        written, failed = 0, 0
+        for attempt in range(self.max_retries + 1):
+            try:
+                result = self.get_collection().insert_many(batch, ordered=False)
+                written = len(result.inserted_ids)
+                break
+            except BulkWriteError as e:
+                # ordered=False: everything except the reported errors was written
+                errors = e.details.get('writeErrors', [])
+                if attempt > 0:
+                    # Duplicate _id on a retry means an earlier attempt already wrote it
+                    errors = [err for err in errors if err.get('code') != 11000]
+                written = len(batch) - len(errors)
+                failed = len(errors)
+                print(f"⚠️ {self.name} write-behind: {failed} documents rejected by MongoDB")
+                break
+            except Exception as e:
+                if attempt == self.max_retries:
+                    failed = len(batch)
+                    print(f"❌ {self.name} write-behind: dropping {failed} documents after retries: {e}")
+                else:
+                    time.sleep(min(2.0, 0.1 * 2 ** attempt))
+        elapsed = (time.perf_counter() - started) * 1000.0
+        with self._lock:
+            self.written += written
+            self.failed += failed
+            self.flushes += 1
+            self.last_flush_ms = elapsed
+            self.total_flush_ms += elapsed
+            self.max_flush_ms = max(self.max_flush_ms, elapsed)
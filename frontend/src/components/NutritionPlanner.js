@@ -1,11 +1,11 @@
 // frontend/src/components/NutritionPlanner.js
 
 import React, { useState } from 'react';
-import axios from 'axios';
 import ReactMarkdown from 'react-markdown'; // Make sure you've run: npm install react-markdown
 import './NutritionPlanner.css';
 import { FaPaperPlane } from 'react-icons/fa';
 import { usePrediction } from '../context/PredictionContext'; // <-- 1. IMPORT THE GLOBAL BRAIN
+import { streamGenAI } from '../streamGenAI';
 
 function NutritionPlanner() {
   const [formData, setFormData] = useState({
@@ -41,11 +41,13 @@ function NutritionPlanner() {
     try {
       // Use environment variable for API URL
       const API_URL = process.env.REACT_APP_API_URL || 'http://localhost:5000';
-      const response = await axios.post(
+      // Stream the plan in as it is generated
+      await streamGenAI(
         `${API_URL}/api/nutrition-planner`,
-        payload // Send the new, combined payload
+        payload, // Send the new, combined payload
+        (text) => setMealPlan(prev => prev + text),
+        'meal_plan'
       );
-      setMealPlan(response.data.meal_plan);
 
     } catch (err) {
       console.error("Error generating meal plan:", err);
@@ -2,6 +2,24 @@ import React, { useState, useEffect, useRef } from 'react';
 import axios from 'axios';
 import './RPPGHeartRate.css'; // We will create this next
 
+// Binary body for /api/rppg: "RPG1" magic, float32 fps, then interleaved
+// float32 r,g,b samples (all little-endian). ~5x smaller than JSON lists and
+// decoded server-side without parsing thousands of numbers.
+function encodeRgbPayload({ r, g, b }, fps) {
+  const n = g.length;
+  const buffer = new ArrayBuffer(8 + n * 3 * 4);
+  const view = new DataView(buffer);
+  'RPG1'.split('').forEach((ch, i) => view.setUint8(i, ch.charCodeAt(0)));
+  view.setFloat32(4, fps, true);
+  for (let i = 0; i < n; i++) {
+    const offset = 8 + i * 12;
+    view.setFloat32(offset, r[i], true);
+    view.setFloat32(offset + 4, g[i], true);
+    view.setFloat32(offset + 8, b[i], true);
+  }
+  return buffer;
+}
+
 function RPPGHeartRate({ onApply, onClose }) {
   const [isRecording, setIsRecording] = useState(false);
   const [countdown, setCountdown] = useState(15); // 15 seconds measurement
@@ -181,11 +199,8 @@ function RPPGHeartRate({ onApply, onClose }) {
 
     try {
        const API_URL = process.env.REACT_APP_API_URL || 'http://localhost:5000';
-       const response = await axios.post(`${API_URL}/api/rppg`, {
-           r: values.r,
-           g: values.g,
-           b: values.b,
-           fps: Number(estimatedFps.toFixed(2))
+       const response = await axios.post(`${API_URL}/api/rppg`, encodeRgbPayload(values, estimatedFps), {
+           headers: { 'Content-Type': 'application/octet-stream' }
        });
        
        if (response.data.bpm > 0) {
@@ -1,11 +1,11 @@
 // frontend/src/components/StressCoach.js
 
 import React, { useState } from 'react';
-import axios from 'axios';
 import ReactMarkdown from 'react-markdown';
 import './StressCoach.css'; // We will update this
 import { FaPaperPlane } from 'react-icons/fa';
 import { usePrediction } from '../context/PredictionContext'; // Get the global brain
+import { streamGenAI } from '../streamGenAI';
 
 function StressCoach() {
   // --- 1. THIS IS THE NEW STATE ---
@@ -36,11 +36,13 @@ function StressCoach() {
     try {
       // Use environment variable for API URL
       const API_URL = process.env.REACT_APP_API_URL || 'http://localhost:5000';
-      const response = await axios.post(
+      // Stream the plan in as it is generated
+      await streamGenAI(
         `${API_URL}/api/stress-coach`,
-        payload
+        payload,
+        (text) => setPlan(prev => prev + text),
+        'stress_plan'
       );
-      setPlan(response.data.stress_plan);
     } catch (err) {
       console.error("Error generating stress plan:", err);
       setError("Sorry, I couldn't generate a plan. Please try again.");
@@ -8,27 +8,52 @@ export function PredictionProvider({ children }) {
   const { token, user } = useAuth();
   const [predictionHistory, setPredictionHistory] = useState([]);
   const [stressHistory, setStressHistory] = useState([]);
+  // Server-side totals and the cursor for the next page of each history
+  const [predictionTotal, setPredictionTotal] = useState(0);
+  const [stressTotal, setStressTotal] = useState(0);
+  const [predictionCursor, setPredictionCursor] = useState(null);
+  const [stressCursor, setStressCursor] = useState(null);
   const [loading, setLoading] = useState(false);
+  const [loadingMore, setLoadingMore] = useState(false);
   const API_URL = 'http://127.0.0.1:5000/api';
+  // History is paginated server-side; fetch only the fields the UI renders
+  const HISTORY_PAGE_SIZE = 50;
+  const HEART_FIELDS = 'probability,timestamp';
+  const STRESS_FIELDS = 'stress_level,timestamp';
   console.log("DEBUG: PredictionContext initialized with API_URL:", API_URL);
 
-  // Fetch history when token changes (user logs in/out)
+  const fetchPage = async (url, fields, cursor) => {
+    const params = { limit: HISTORY_PAGE_SIZE, fields };
+    if (cursor) params.cursor = cursor;
+    const res = await axios.get(url, { params });
+    return res.data;
+  };
+
+  // Fetch the first page of history when token changes (user logs in/out)
   useEffect(() => {
     const fetchHistory = async () => {
       if (!token) {
         setPredictionHistory([]);
         setStressHistory([]);
+        setPredictionTotal(0);
+        setStressTotal(0);
+        setPredictionCursor(null);
+        setStressCursor(null);
         return;
       }
 
       setLoading(true);
       try {
-        const [heartRes, stressRes] = await Promise.all([
-          axios.get(`${API_URL}/predictions/heart`),
-          axios.get(`${API_URL}/predictions/stress`)
+        const [heartPage, stressPage] = await Promise.all([
+          fetchPage(`${API_URL}/predictions/heart`, HEART_FIELDS, null),
+          fetchPage(`${API_URL}/predictions/stress`, STRESS_FIELDS, null)
         ]);
-        setPredictionHistory(heartRes.data.history || []);
-        setStressHistory(stressRes.data.history || []);
+        setPredictionHistory(heartPage.history || []);
+        setPredictionTotal(heartPage.total ?? (heartPage.history || []).length);
+        setPredictionCursor(heartPage.next_cursor || null);
+        setStressHistory(stressPage.history || []);
+        setStressTotal(stressPage.total ?? (stressPage.history || []).length);
+        setStressCursor(stressPage.next_cursor || null);
       } catch (error) {
         console.error("Failed to fetch prediction history", error);
       } finally {
@@ -39,6 +64,35 @@ export function PredictionProvider({ children }) {
     fetchHistory();
   }, [token, API_URL]);
 
+  // Append the next page on demand ("Load more"), following next_cursor
+  const loadMorePredictions = async () => {
+    if (!predictionCursor || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      const page = await fetchPage(`${API_URL}/predictions/heart`, HEART_FIELDS, predictionCursor);
+      setPredictionHistory((prev) => [...prev, ...(page.history || [])]);
+      setPredictionCursor(page.next_cursor || null);
+    } catch (error) {
+      console.error("Failed to load more heart predictions", error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  const loadMoreStress = async () => {
+    if (!stressCursor || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      const page = await fetchPage(`${API_URL}/predictions/stress`, STRESS_FIELDS, stressCursor);
+      setStressHistory((prev) => [...prev, ...(page.history || [])]);
+      setStressCursor(page.next_cursor || null);
+    } catch (error) {
+      console.error("Failed to load more stress predictions", error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const latestPrediction = predictionHistory.length > 0 ? predictionHistory[0].probability : null;
   const latestStress = stressHistory.length > 0 ? stressHistory[0].stress_level : null;
 
@@ -55,9 +109,11 @@ export function PredictionProvider({ children }) {
       });
       console.log("DEBUG: addPrediction response:", resp.data);
       
-      // Refresh history
-      const res = await axios.get(`${API_URL}/predictions/heart`);
-      setPredictionHistory(res.data.history || []);
+      // Prepend the saved entry instead of refetching the whole history
+      if (resp.data.entry) {
+        setPredictionHistory((prev) => [resp.data.entry, ...prev]);
+        setPredictionTotal((prev) => prev + 1);
+      }
     } catch (error) {
       console.error("DEBUG: Failed to save heart prediction", error);
     }
@@ -76,9 +132,11 @@ export function PredictionProvider({ children }) {
       });
       console.log("DEBUG: addStressPrediction response:", resp.data);
       
-      // Refresh history
-      const res = await axios.get(`${API_URL}/predictions/stress`);
-      setStressHistory(res.data.history || []);
+      // Prepend the saved entry instead of refetching the whole history
+      if (resp.data.entry) {
+        setStressHistory((prev) => [resp.data.entry, ...prev]);
+        setStressTotal((prev) => prev + 1);
+      }
     } catch (error) {
       console.error("DEBUG: Failed to save stress prediction", error);
     }
@@ -87,6 +145,13 @@ export function PredictionProvider({ children }) {
   const value = {
     predictionHistory,
     stressHistory,
+    predictionTotal,
+    stressTotal,
+    hasMorePredictions: predictionCursor !== null,
+    hasMoreStress: stressCursor !== null,
+    loadMorePredictions,
+    loadMoreStress,
+    loadingMore,
     latestPrediction,
     latestStress,
     addPrediction,
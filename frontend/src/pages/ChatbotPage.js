@@ -4,8 +4,8 @@ import React, { useState, useEffect, useRef } from 'react';
 // import { Link } from 'react-router-dom';
 import './ChatbotPage.css';
 import { FaCommentDots, FaPaperPlane } from 'react-icons/fa';
-import axios from 'axios';
 import { usePrediction } from '../context/PredictionContext'; // <-- 1. IMPORT THE "GLOBAL BRAIN"
+import { streamGenAI } from '../streamGenAI';
 
 function ChatbotPage() {
 
@@ -53,15 +53,25 @@ function ChatbotPage() {
 
       // Use environment variable for API URL
       const API_URL = process.env.REACT_APP_API_URL || 'http://localhost:5000';
-      const response = await axios.post(
+      // Stream the answer into a new bot bubble as it is generated
+      let started = false;
+      await streamGenAI(
         `${API_URL}/api/chatbot`,
-        payload // Send the new payload
+        payload, // Send the new payload
+        (text) => {
+          if (!started) {
+            started = true;
+            setMessages(prevMessages => [...prevMessages, { from: 'bot', text }]);
+          } else {
+            setMessages(prevMessages => {
+              const last = prevMessages[prevMessages.length - 1];
+              return [...prevMessages.slice(0, -1), { ...last, text: last.text + text }];
+            });
+          }
+        },
+        'answer'
       );
 
-
-      const botMessage = { from: 'bot', text: response.data.answer };
-      setMessages(prevMessages => [...prevMessages, botMessage]);
-
     } catch (err) {
       console.error("Error calling chatbot API:", err);
       const errorMessage = { from: 'bot', text: "Sorry, I'm having a little trouble thinking right now. Please try again later." };
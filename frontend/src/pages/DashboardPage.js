@@ -34,7 +34,7 @@ function DashboardPage() {
     document.title = 'Features | HealthPrism';
   }, []);
   const { user } = useAuth();
-  const { predictionHistory, latestPrediction, loading } = usePrediction();
+  const { predictionHistory, predictionTotal, latestPrediction, loading } = usePrediction();
 
   useEffect(() => {
     console.log("DEBUG: DashboardPage loaded. User:", user?.email);
@@ -84,8 +84,8 @@ function DashboardPage() {
         <section className="history-chart-section">
           <h2 className="section-heading">Your Prediction History</h2>
           <p className="section-subheading">
-            Track your progress over time. See how your lifestyle changes
-            impact your score.
+            Track your progress over time: your latest {predictionHistory.length} of {predictionTotal} predictions.
+            See how your lifestyle changes impact your score.
           </p>
           <div className="chart-container">
             <ResponsiveContainer width="100%" height={400}>
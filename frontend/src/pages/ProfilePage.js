@@ -6,7 +6,11 @@ import { FaUserCircle, FaHeartbeat, FaBrain } from 'react-icons/fa';
 
 function ProfilePage() {
   const { user } = useAuth();
-  const { predictionHistory, stressHistory, loading } = usePrediction();
+  const {
+    predictionHistory, stressHistory, predictionTotal, stressTotal,
+    hasMorePredictions, hasMoreStress, loadMorePredictions, loadMoreStress,
+    loadingMore, loading
+  } = usePrediction();
 
   if (loading) {
     return <div className="profile-loading">Loading history...</div>;
@@ -30,7 +34,7 @@ function ProfilePage() {
           <section className="history-section">
             <div className="section-title">
               <FaHeartbeat className="icon-heart" />
-              <h2>Heart Risk History</h2>
+              <h2>Heart Risk History ({predictionTotal})</h2>
             </div>
             {predictionHistory.length > 0 ? (
               <div className="history-table-wrapper">
@@ -56,6 +60,11 @@ function ProfilePage() {
                     ))}
                   </tbody>
                 </table>
+                {hasMorePredictions && (
+                  <button className="load-more-button" onClick={loadMorePredictions} disabled={loadingMore}>
+                    {loadingMore ? 'Loading...' : `Load more (${predictionHistory.length} of ${predictionTotal})`}
+                  </button>
+                )}
               </div>
             ) : (
               <p className="no-data">No heart predictions found.</p>
@@ -66,7 +75,7 @@ function ProfilePage() {
           <section className="history-section">
             <div className="section-title">
               <FaBrain className="icon-stress" />
-              <h2>Stress Level History</h2>
+              <h2>Stress Level History ({stressTotal})</h2>
             </div>
             {stressHistory.length > 0 ? (
               <div className="history-table-wrapper">
@@ -94,6 +103,11 @@ function ProfilePage() {
                     ))}
                   </tbody>
                 </table>
+                {hasMoreStress && (
+                  <button className="load-more-button" onClick={loadMoreStress} disabled={loadingMore}>
+                    {loadingMore ? 'Loading...' : `Load more (${stressHistory.length} of ${stressTotal})`}
+                  </button>
+                )}
               </div>
             ) : (
               <p className="no-data">No stress tests found.</p>
@@ -0,0 +1,55 @@
+// frontend/src/streamGenAI.js
+
+// Calls a GenAI route in streaming mode and hands each chunk of the answer to
+// onText as soon as the server relays it (Server-Sent Events over a POST, so
+// we read the body ourselves instead of using EventSource).
+// Resolves with the full answer. If the server answers with plain JSON
+// instead, the answer is read from data[jsonField].
+export async function streamGenAI(url, payload, onText, jsonField) {
+  const response = await fetch(`${url}?stream=1`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json', Accept: 'text/event-stream' },
+    body: JSON.stringify(payload),
+  });
+  if (!response.ok) {
+    throw new Error(`Request failed with status ${response.status}`);
+  }
+
+  const contentType = response.headers.get('Content-Type') || '';
+  if (!contentType.includes('text/event-stream') || !response.body) {
+    const data = await response.json();
+    const text = data[jsonField] || '';
+    onText(text);
+    return text;
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let answer = '';
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    // Events are separated by a blank line
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const block = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      let event = 'message';
+      let data = '';
+      for (const line of block.split('\n')) {
+        if (line.startsWith('event:')) event = line.slice(6).trim();
+        else if (line.startsWith('data:')) data += line.slice(5).trim();
+      }
+      if (!data) continue;
+      const parsed = JSON.parse(data);
+      if (event === 'error') throw new Error(parsed.error);
+      if (event === 'done') return answer;
+      answer += parsed.text;
+      onText(parsed.text);
+    }
+  }
+  return answer;
+}